@@ -0,0 +1,318 @@
+#!/usr/bin/python3
+
+"""
+Export of the data of several layers into one file.
+
+The layers are exported in one pass over their data. Each layer passes its
+columns in chunks, which are formatted with vectorized numpy operations and
+written to the file before the next chunk is read, so that large and
+memory-mapped layers can be exported without handling each row in Python.
+The formats are comma and tab separated text, numpy arrays (one array for all
+layers, or an archive with one array per layer) and a GeoJSON-like feature
+collection. This module does not depend on Gtk.
+"""
+
+from collections import OrderedDict
+import itertools
+import json
+import os
+import zipfile
+import numpy as np
+
+#Number of rows that are formatted and written at once
+EXPORT_ROWS = 100000
+
+#Number of decimals that are written to the text formats
+DECIMALS = 6
+
+#Line ending of the text formats, the same as the one of the csv-module
+LINE_END = "\r\n"
+
+#File extensions and names of the export formats
+EXPORT_FORMATS = OrderedDict([(".csv", "CSV"),
+                              (".tsv", "TSV"),
+                              (".npy", "NumPy Array"),
+                              (".npz", "NumPy Archive"),
+                              (".json", "GeoJSON")])
+
+#Names of the columns of each layer type
+FIELDNAMES = {"plane": ["dip-direction", "dip", "stratigraphy"],
+              "line": ["dip-direction", "dip", "sense"],
+              "faultplane": ["plane-dip-direction", "plane-dip",
+                             "linear-dip-direction", "linear-dip",
+                             "linear-sense"],
+              "smallcircle": ["dip-direction", "dip", "opening-angle"],
+              "eigenvector": ["dip-direction", "dip", "eigenvalue"]}
+
+#Columns that hold text instead of numbers
+TEXT_FIELDS = {"stratigraphy", "sense", "linear-sense"}
+
+
+def export_format(filename):
+    """
+    Returns the extension of the export format of a file name.
+
+    Files with an unknown extension are exported as CSV.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in EXPORT_FORMATS:
+        return extension
+    return ".csv"
+
+
+def layer_fields(layers):
+    """
+    Returns the names of the columns of all layers in their first order.
+    """
+    fields = []
+    for label, layer_type, count, chunks in layers:
+        for field in FIELDNAMES[layer_type]:
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+def format_floats(values):
+    """
+    Formats an array of numbers as an array of strings.
+
+    The numbers are rounded to DECIMALS decimals, and trailing zeros are
+    removed, so numbers with fewer decimals are written like Python writes
+    them. Missing numbers become empty strings.
+    """
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values)
+    scale = 10 ** DECIMALS
+    scaled = np.round(np.abs(np.where(finite, values, 0)) *
+                      scale).astype(np.int64)
+    fraction = np.char.rstrip(np.char.zfill((scaled % scale).astype(str),
+                                            DECIMALS), "0")
+    fraction = np.where(fraction == "", "0", fraction)
+    text = np.char.add(np.char.add((scaled // scale).astype(str), "."),
+                       fraction)
+    text = np.where((values < 0) & (scaled > 0), np.char.add("-", text), text)
+    return np.where(finite, text, "")
+
+
+def format_texts(values, delimiter):
+    """
+    Formats an array of text for a delimited file.
+
+    Texts that contain the delimiter, quotes or line breaks are quoted like
+    the csv-module quotes them.
+    """
+    values = np.asarray(values).astype(str)
+    special = np.zeros(values.shape, dtype=bool)
+    for character in [delimiter, '"', "\n", "\r"]:
+        special |= np.char.find(values, character) >= 0
+    quoted = np.char.add(np.char.add('"', np.char.replace(values, '"', '""')),
+                         '"')
+    return np.where(special, quoted, values)
+
+
+def write_delimited(filename, layers, delimiter):
+    """
+    Writes the layers to a comma or tab separated text file.
+
+    The header contains the columns of all layers. If more than one layer is
+    exported, the first column holds the label of the layer, and columns that
+    a layer does not have stay empty. Returns the number of rows.
+    """
+    fields = layer_fields(layers)
+    header = fields if len(layers) == 1 else ["layer"] + fields
+    rows = 0
+    with open(filename, "w", newline="") as text_file:
+        text_file.write(delimiter.join(format_texts(header, delimiter)) +
+                        LINE_END)
+        for label, layer_type, count, chunks in layers:
+            label_text = str(format_texts([label], delimiter)[0])
+            for chunk in chunks():
+                length = len(chunk[0])
+                if length == 0:
+                    continue
+                values = dict(zip(FIELDNAMES[layer_type], chunk))
+                texts = [] if len(layers) == 1 else [
+                                                itertools.repeat(label_text)]
+                for field in fields:
+                    if field not in values:
+                        texts.append(itertools.repeat(""))
+                    elif field in TEXT_FIELDS:
+                        texts.append(format_texts(values[field],
+                                                  delimiter).tolist())
+                    else:
+                        texts.append(format_floats(values[field]).tolist())
+                text_file.write(LINE_END.join(map(delimiter.join,
+                                                  zip(*texts))) + LINE_END)
+                rows += length
+    return rows
+
+
+def array_dtype(layers, fields, label_field):
+    """
+    Returns the structured dtype for the rows of the layers.
+
+    Numbers are stored as floats. The width of the text columns is taken from
+    the first chunk of each layer, because all chunks of a layer share their
+    dtype. If label_field is True, the first field holds the layer label.
+    """
+    widths = {field: 1 for field in fields if field in TEXT_FIELDS}
+    for label, layer_type, count, chunks in layers:
+        chunk = next(iter(chunks()), None)
+        if chunk is None:
+            continue
+        for field, column in zip(FIELDNAMES[layer_type], chunk):
+            if field in widths:
+                width = np.asarray(column).astype(str).dtype.itemsize // 4
+                widths[field] = max(widths[field], width)
+
+    dtype = []
+    if label_field:
+        width = max([len(layer[0]) for layer in layers] + [1])
+        dtype.append(("layer", "U{}".format(width)))
+    for field in fields:
+        if field in widths:
+            dtype.append((field, "U{}".format(widths[field])))
+        else:
+            dtype.append((field, float))
+    return np.dtype(dtype)
+
+
+def write_array(array_file, layers, fields, label_field):
+    """
+    Writes the rows of the layers into an open file as one .npy array.
+
+    The header is written first with the total number of rows, and then the
+    chunks are appended as raw data. Numbers that a layer does not have are
+    NaN and missing texts are empty. Returns the number of rows.
+    """
+    dtype = array_dtype(layers, fields, label_field)
+    count = sum(layer[2] for layer in layers)
+    np.lib.format.write_array_header_1_0(array_file,
+                    {"descr": np.lib.format.dtype_to_descr(dtype),
+                     "fortran_order": False, "shape": (count,)})
+    rows = 0
+    for label, layer_type, count, chunks in layers:
+        for chunk in chunks():
+            array = np.zeros(len(chunk[0]), dtype=dtype)
+            for field in fields:
+                if field not in TEXT_FIELDS:
+                    array[field] = np.nan
+            if label_field:
+                array["layer"] = label
+            for field, column in zip(FIELDNAMES[layer_type], chunk):
+                array[field] = column
+            array_file.write(array.tobytes())
+            rows += len(array)
+    return rows
+
+
+def write_npy(filename, layers):
+    """
+    Writes all layers into one structured .npy array.
+
+    The fields are the columns of all layers. If more than one layer is
+    exported, the first field holds the label of the layer. Returns the
+    number of rows.
+    """
+    with open(filename, "wb") as array_file:
+        return write_array(array_file, layers, layer_fields(layers),
+                           len(layers) > 1)
+
+
+def write_npz(filename, layers):
+    """
+    Writes each layer as its own structured array into a .npz archive.
+
+    The arrays are named after the labels of the layers, and are streamed
+    into the uncompressed archive chunk by chunk. Returns the number of rows.
+    """
+    rows = 0
+    names = set()
+    with zipfile.ZipFile(filename, "w", zipfile.ZIP_STORED,
+                         allowZip64=True) as archive:
+        for layer in layers:
+            name = layer[0].replace("/", "_")
+            number = 1
+            while name in names:
+                number += 1
+                name = "{}_{}".format(layer[0].replace("/", "_"), number)
+            names.add(name)
+            with archive.open(name + ".npy", "w",
+                              force_zip64=True) as array_file:
+                rows += write_array(array_file, [layer],
+                                    FIELDNAMES[layer[1]], False)
+    return rows
+
+
+def json_values(values, field):
+    """
+    Formats an array of values as JSON.
+
+    Texts are encoded once for each distinct text. Missing numbers become
+    null.
+    """
+    if field in TEXT_FIELDS:
+        distinct, inverse = np.unique(np.asarray(values).astype(str),
+                                      return_inverse=True)
+        encoded = np.array([json.dumps(text) for text in distinct.tolist()])
+        return encoded[inverse.ravel()]
+    text = format_floats(values)
+    return np.where(text == "", "null", text)
+
+
+def write_geojson(filename, layers):
+    """
+    Writes the layers as a GeoJSON-like feature collection.
+
+    Each row becomes a point feature. The coordinates are the
+    dip-direction and dip of the row, and the properties hold the label and
+    type of the layer and all columns of the row. Returns the number of rows.
+    """
+    rows = 0
+    separator = "\n"
+    with open(filename, "w") as json_file:
+        json_file.write('{"type": "FeatureCollection", "features": [')
+        for label, layer_type, count, chunks in layers:
+            fields = FIELDNAMES[layer_type]
+            for chunk in chunks():
+                if len(chunk[0]) == 0:
+                    continue
+                texts = [json_values(column, field).tolist()
+                         for field, column in zip(fields, chunk)]
+                parts = ['{"type": "Feature", "geometry": {"type": "Point", '
+                         '"coordinates": [', texts[0], ", ", texts[1],
+                         ']}, "properties": {"layer": ' + json.dumps(label) +
+                         ', "layer-type": ' + json.dumps(layer_type)]
+                for field, text in zip(fields, texts):
+                    parts.extend([", " + json.dumps(field) + ": ", text])
+                parts.append("}}")
+                parts = [itertools.repeat(part) if isinstance(part, str)
+                         else part for part in parts]
+                json_file.write(separator +
+                                ",\n".join(map("".join, zip(*parts))))
+                separator = ",\n"
+                rows += len(texts[0])
+        json_file.write("\n]}\n")
+    return rows
+
+
+def export_layers(filename, layers):
+    """
+    Exports layers into a file. The format is chosen by the file extension.
+
+    Expects the file name and a list of layers. Each layer is a tuple of its
+    label, its layer type, its number of rows and a function without
+    arguments that returns an iterable of chunks. Each chunk is a list with
+    one array for each column of the layer type. Returns the number of rows
+    that were written.
+    """
+    extension = export_format(filename)
+    if extension == ".tsv":
+        return write_delimited(filename, layers, "\t")
+    elif extension == ".npy":
+        return write_npy(filename, layers)
+    elif extension == ".npz":
+        return write_npz(filename, layers)
+    elif extension == ".json":
+        return write_geojson(filename, layers)
+    return write_delimited(filename, layers, ",")
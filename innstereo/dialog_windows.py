@@ -11,7 +11,11 @@ and FileChooserParse-class.
 from gi.repository import Gtk
 import matplotlib.colors as colors
 import os, sys
+import csv
 from .i18n import i18n, translate_gui
+from .project_archive import ARCHIVE_EXTENSION
+from .mapped_data import MAPPED_EXTENSION
+from .data_export import EXPORT_FORMATS
 
 
 _ = i18n().language().gettext
@@ -329,6 +333,10 @@ class FileChooserParse(object):
         self.filefilters = self.builder.get_object("filefilter_parse")
         self.filefilters.set_name(_("Text Files"))
         self.dialog.add_filter(self.filefilters)
+        filter_mapped = Gtk.FileFilter()
+        filter_mapped.add_pattern("*" + MAPPED_EXTENSION)
+        filter_mapped.set_name(_("Numpy Arrays (mapped as new layer)"))
+        self.dialog.add_filter(filter_mapped)
         self.run_file_parser = run_file_parser
         self.builder.connect_signals(self)
         if sys.platform == "win32":
@@ -399,10 +407,12 @@ class FileChooserExport(object):
     Sets up and handles the signals of the FileChooser for exporting data.
 
     This class handles the actions of the filechooserdialog that is used
-    to export data.
+    to export data. The dialog offers one filter for each of the formats,
+    which are a dictionary of file extensions and names. By default these
+    are the formats of the layer export.
     """
 
-    def __init__(self, export_data, main_window):
+    def __init__(self, export_data, main_window, formats=EXPORT_FORMATS):
         self.builder = Gtk.Builder()
         self.builder.set_translation_domain(i18n().get_ts_domain())
         self.export_data = export_data
@@ -413,6 +423,14 @@ class FileChooserExport(object):
             ("filechooserdialog_export", ""))
         self.dialog = self.builder.get_object("filechooserdialog_export")
         self.dialog.set_transient_for(main_window)
+        self.formats = formats
+        self.filter_extensions = {}
+        for extension, name in formats.items():
+            filefilter = Gtk.FileFilter()
+            filefilter.add_pattern("*" + extension)
+            filefilter.set_name(name)
+            self.dialog.add_filter(filefilter)
+            self.filter_extensions[filefilter] = extension
         self.builder.connect_signals(self)
         if sys.platform == "win32":
             translate_gui(self.builder)
@@ -471,9 +489,15 @@ class FileChooserExport(object):
 
         The user should navigate to a desired location and type a filename. The
         filename is called and passes to the MainWindow's export_data function.
-        The dialog is hidden afterwards.
+        Files without a known extension get the extension of the selected
+        filter, which chooses the export format. The dialog is hidden
+        afterwards.
         """
         self.filename = self.dialog.get_filename()
+        extension = os.path.splitext(self.filename)[1].lower()
+        if extension not in self.formats:
+            self.filename = self.filename + self.filter_extensions.get(
+                            self.dialog.get_filter(), next(iter(self.formats)))
         if os.path.exists(self.filename) == True:
             overwrite = OverwriteDialog(self.call_overwrite, self.dialog)
             overwrite.run()
@@ -557,10 +581,11 @@ class FileChooserSave(object):
     to save the project.
     """
 
-    def __init__(self, main_window, data):
+    def __init__(self, main_window, serialize_project, save_archive):
         self.builder = Gtk.Builder()
         self.builder.set_translation_domain(i18n().get_ts_domain())
-        self.data = data
+        self.serialize_project = serialize_project
+        self.save_archive = save_archive
         script_dir = os.path.dirname(__file__)
         rel_path = "gui_layout.glade"
         abs_path = os.path.join(script_dir, rel_path)
@@ -568,6 +593,14 @@ class FileChooserSave(object):
             ("filechooserdialog_save", ""))
         self.dialog = self.builder.get_object("filechooserdialog_save")
         self.dialog.set_transient_for(main_window)
+        self.filter_json = Gtk.FileFilter()
+        self.filter_json.add_pattern("*.json")
+        self.filter_json.set_name("JSON")
+        self.dialog.add_filter(self.filter_json)
+        self.filter_archive = Gtk.FileFilter()
+        self.filter_archive.add_pattern("*" + ARCHIVE_EXTENSION)
+        self.filter_archive.set_name(_("Project Archive"))
+        self.dialog.add_filter(self.filter_archive)
         self.builder.connect_signals(self)
         if sys.platform == "win32":
             translate_gui(self.builder)
@@ -624,11 +657,17 @@ class FileChooserSave(object):
         """
         Saves the project.
 
-        If the file already exists a dialog will confirm the overwrite.
+        The format is chosen by the file extension. Files without a known
+        extension get the extension of the selected filter. If the file
+        already exists a dialog will confirm the overwrite.
         """
         self.filename = self.dialog.get_filename()
-        if self.filename[-5:] != ".json":
-            self.filename = self.filename + ".json"
+        if (self.filename[-5:] != ".json" and
+                not self.filename.endswith(ARCHIVE_EXTENSION)):
+            if self.dialog.get_filter() == self.filter_archive:
+                self.filename = self.filename + ARCHIVE_EXTENSION
+            else:
+                self.filename = self.filename + ".json"
         if os.path.exists(self.filename) == True:
             overwrite = OverwriteDialog(self.write_data, self.dialog)
             overwrite.run()
@@ -640,10 +679,14 @@ class FileChooserSave(object):
         """
         Writes the data to the file.
 
-        Opens the file the user has inputted and writes the data to that file.
+        Project archives are written by the save_archive function of the main
+        window. Otherwise the project is serialized and written to the file.
         """
-        with open(self.filename, "w") as new_file:
-            new_file.write(self.data)
+        if self.filename.endswith(ARCHIVE_EXTENSION):
+            self.save_archive(self.filename)
+        else:
+            with open(self.filename, "w") as new_file:
+                new_file.write(self.serialize_project())
         self.dialog.hide()
 
 
@@ -670,6 +713,10 @@ class FileChooserOpen(object):
         filter_json.add_pattern("*.json")
         filter_json.set_name("JSON")
         self.dialog.add_filter(filter_json)
+        filter_archive = Gtk.FileFilter()
+        filter_archive.add_pattern("*" + ARCHIVE_EXTENSION)
+        filter_archive.set_name(_("Project Archive"))
+        self.dialog.add_filter(filter_archive)
         filter_all = Gtk.FileFilter()
         filter_all.add_pattern("*")
         filter_all.set_name(_("All Files"))
@@ -737,3 +784,280 @@ class FileChooserOpen(object):
         """
         self.dialog.hide()
 
+
+
+class DuplicateDialog(object):
+
+    """
+    This class lists groups of duplicate measurements and merges them.
+
+    The dialog is created in code. Each group is shown with its number of
+    rows, the orientation of its first row and the row numbers. The merging
+    itself is done by a function of the main window, that is passed when the
+    dialog is initialized.
+    """
+
+    def __init__(self, main_window, groups, data, merge_groups):
+        """
+        Initializes the DuplicateDialog.
+
+        Expects the main window, a list of arrays of row numbers, the data of
+        the layer as a list of rows, and the function that merges the groups.
+        The function receives the groups and either "first" or "average".
+        """
+        self.groups = groups
+        self.merge_groups = merge_groups
+        self.dialog = Gtk.Dialog(title=_("Duplicate Measurements"),
+                                 transient_for=main_window, modal=True)
+        self.dialog.add_button(_("Cancel"), Gtk.ResponseType.CANCEL)
+        self.dialog.add_button(_("Merge"), Gtk.ResponseType.APPLY)
+        self.dialog.set_default_size(450, 400)
+
+        store = Gtk.ListStore(int, int, str, str)
+        for key, group in enumerate(groups):
+            row_numbers = ", ".join(str(row + 1) for row in group[:10])
+            if len(group) > 10:
+                row_numbers += ", ..."
+            first = data[group[0]]
+            store.append([key + 1, len(group),
+                          "{0:03.0f} / {1:02.0f}".format(first[0], first[1]),
+                          row_numbers])
+
+        treeview = Gtk.TreeView(model=store)
+        for column, title in enumerate([_("Group"), _("Rows"),
+                                        _("Orientation"), _("Row Numbers")]):
+            treeview.append_column(Gtk.TreeViewColumn(title,
+                                    Gtk.CellRendererText(), text=column))
+        scrolled = Gtk.ScrolledWindow(vexpand=True)
+        scrolled.add(treeview)
+
+        duplicates = sum(len(group) - 1 for group in groups)
+        label = Gtk.Label(label=_("{0} groups, {1} rows can be removed.")
+                          .format(len(groups), duplicates), xalign=0)
+        self.combo_mode = Gtk.ComboBoxText()
+        self.combo_mode.append("first", _("Keep the first row of each group"))
+        self.combo_mode.append("average", _("Replace each group by its mean"))
+        self.combo_mode.set_active_id("first")
+
+        box = self.dialog.get_content_area()
+        box.set_spacing(6)
+        box.set_border_width(6)
+        box.pack_start(label, False, False, 0)
+        box.pack_start(scrolled, True, True, 0)
+        box.pack_start(self.combo_mode, False, False, 0)
+
+    def run(self):
+        """
+        Runs the dialog and merges the groups if the user confirms.
+        """
+        self.dialog.show_all()
+        response = self.dialog.run()
+        if response == Gtk.ResponseType.APPLY:
+            self.merge_groups(self.groups, self.combo_mode.get_active_id())
+        self.dialog.destroy()
+
+
+class KinematicDialog(object):
+
+    """
+    This class shows the results of a kinematic slope analysis.
+
+    The dialog is created in code. It lists the number and percentage of
+    critical planes or wedges for each failure mode. Selecting a mode calls a
+    function of the main window that highlights the critical planes.
+    """
+
+    def __init__(self, main_window, results, highlight_mode):
+        """
+        Initializes the KinematicDialog.
+
+        Expects the main window, a list of tuples (mode, name, critical,
+        tested) and the function that highlights a mode. The function
+        receives the mode of the selected row.
+        """
+        self.highlight_mode = highlight_mode
+        self.dialog = Gtk.Dialog(title=_("Kinematic Analysis"),
+                                 transient_for=main_window)
+        self.dialog.add_button(_("Close"), Gtk.ResponseType.CLOSE)
+
+        store = Gtk.ListStore(str, str, int, int, str)
+        for mode, name, critical, tested in results:
+            if tested > 0:
+                percentage = "{0:.1f} %".format(100.0 * critical / tested)
+            else:
+                percentage = "-"
+            store.append([mode, name, critical, tested, percentage])
+
+        treeview = Gtk.TreeView(model=store)
+        for column, title in enumerate([_("Failure Mode"), _("Critical"),
+                                        _("Tested"), _("Percentage")]):
+            treeview.append_column(Gtk.TreeViewColumn(title,
+                                    Gtk.CellRendererText(), text=column + 1))
+        treeview.get_selection().connect("changed", self.on_mode_changed)
+
+        box = self.dialog.get_content_area()
+        box.set_spacing(6)
+        box.set_border_width(6)
+        box.pack_start(Gtk.Label(label=_("Select a failure mode to "
+                                         "highlight the critical planes."),
+                                 xalign=0), False, False, 0)
+        box.pack_start(treeview, True, True, 0)
+
+    def on_mode_changed(self, selection):
+        """
+        Highlights the critical planes of the selected failure mode.
+        """
+        model, treeiter = selection.get_selected()
+        if treeiter is not None:
+            self.highlight_mode(model[treeiter][0])
+
+    def run(self):
+        """
+        Runs the dialog until it is closed.
+        """
+        self.dialog.show_all()
+        self.dialog.run()
+        self.dialog.destroy()
+
+
+class FabricDialog(object):
+
+    """
+    This class shows the fabric and uniformity statistics of layers.
+
+    The dialog is created in code. Each row of the table contains the
+    statistics of one layer, as returned by
+    orientation_statistics.uniformity_tests. The table can be saved as a
+    comma separated file.
+    """
+
+    columns = [("n", "count"), ("S1", 0), ("S2", 1), ("S3", 2),
+               ("K", "shape"), ("C", "strength"), ("Rayleigh", "rayleigh"),
+               ("p (Rayleigh)", "rayleigh_p"), ("Bingham", "bingham"),
+               ("p (Bingham)", "bingham_p"), ("p (C)", "strength_p")]
+
+    def __init__(self, main_window, results):
+        """
+        Initializes the FabricDialog.
+
+        Expects the main window and a list of tuples of a layer label and
+        the dictionary of statistics of that layer.
+        """
+        self.rows = []
+        for label, stats in results:
+            row = [label]
+            for title, key in self.columns:
+                if isinstance(key, int):
+                    value = None if stats["eigenvalues"] is None else \
+                            stats["eigenvalues"][key]
+                else:
+                    value = stats[key]
+                if value is None:
+                    row.append("-")
+                elif key == "count":
+                    row.append(str(value))
+                else:
+                    row.append("{0:.4f}".format(value))
+            self.rows.append(row)
+
+        self.dialog = Gtk.Dialog(title=_("Fabric Statistics"),
+                                 transient_for=main_window)
+        self.dialog.add_button(_("Save Table"), Gtk.ResponseType.APPLY)
+        self.dialog.add_button(_("Close"), Gtk.ResponseType.CLOSE)
+        self.dialog.set_default_size(700, 250)
+
+        store = Gtk.ListStore(*([str] * (len(self.columns) + 1)))
+        for row in self.rows:
+            store.append(row)
+        treeview = Gtk.TreeView(model=store)
+        for column, title in enumerate([_("Layer")] +
+                                       [title for title, key in self.columns]):
+            treeview.append_column(Gtk.TreeViewColumn(title,
+                                    Gtk.CellRendererText(), text=column))
+        scrolled = Gtk.ScrolledWindow(vexpand=True, hexpand=True)
+        scrolled.add(treeview)
+        box = self.dialog.get_content_area()
+        box.set_border_width(6)
+        box.pack_start(scrolled, True, True, 0)
+
+    def write_table(self, filename):
+        """
+        Writes the table of statistics to a comma separated file.
+        """
+        with open(filename, "w", newline="") as table_file:
+            writer = csv.writer(table_file)
+            writer.writerow(["Layer"] + [title for title, key in self.columns])
+            writer.writerows(self.rows)
+
+    def run(self):
+        """
+        Runs the dialog until it is closed.
+
+        The table can be saved any number of times before. The table is
+        always written as CSV, so the file chooser only offers that format.
+        """
+        self.dialog.show_all()
+        while self.dialog.run() == Gtk.ResponseType.APPLY:
+            FileChooserExport(self.write_table, self.dialog,
+                              {".csv": "CSV"}).run()
+        self.dialog.destroy()
+
+
+class ProgressDialog(object):
+
+    """
+    This class shows the progress of a task that runs in the background.
+
+    The dialog is created in code. It contains a label, a progress bar and a
+    cancel button. It does not run its own main loop, so the main window is
+    redrawn while the task is running.
+    """
+
+    def __init__(self, main_window, title, cancel):
+        """
+        Initializes the ProgressDialog.
+
+        Expects the main window, the title of the dialog and a function
+        without arguments that cancels the task. The function is called when
+        the user clicks cancel or closes the dialog.
+        """
+        self.cancel = cancel
+        self.dialog = Gtk.Dialog(title=title, transient_for=main_window)
+        self.dialog.add_button(_("Cancel"), Gtk.ResponseType.CANCEL)
+        self.dialog.set_default_size(350, -1)
+        self.dialog.connect("response", self.on_response)
+
+        self.label = Gtk.Label(label=title, xalign=0)
+        self.progressbar = Gtk.ProgressBar(show_text=True)
+        box = self.dialog.get_content_area()
+        box.set_spacing(6)
+        box.set_border_width(6)
+        box.pack_start(self.label, False, False, 0)
+        box.pack_start(self.progressbar, False, False, 0)
+
+    def show(self):
+        """
+        Shows the dialog without blocking the main loop.
+        """
+        self.dialog.show_all()
+
+    def set_progress(self, fraction, text=None):
+        """
+        Sets the fraction of the progress bar and optionally the label text.
+        """
+        self.progressbar.set_fraction(min(max(fraction, 0), 1))
+        if text is not None:
+            self.label.set_text(text)
+
+    def on_response(self, dialog, response):
+        # pylint: disable=unused-argument
+        """
+        Cancels the task when the dialog is closed or cancel is clicked.
+        """
+        self.cancel()
+
+    def destroy(self):
+        """
+        Destroys the dialog when the task is finished.
+        """
+        self.dialog.destroy()
@@ -8,8 +8,87 @@ loads the GUI from the glade file and connects all the GUI signals.
 """
 
 from gi.repository import Gtk
+from itertools import islice
+import numpy as np
 import re
 import os
+from .import_worker import ImportWorker, CHUNK_ROWS
+from .i18n import i18n
+
+_ = i18n().language().gettext
+
+#Number of lines that the dialog shows as a preview of the parsing
+PREVIEW_LINES = 200
+
+
+def split_line(line):
+    """
+    Splits one line of a file into a list of strings.
+
+    Columns can be separated by commas or semicolons. The list is padded
+    with empty strings to at least 8 columns, the number of columns that the
+    dialog can assign.
+    """
+    string_list = re.split(r"[;,]", line.rstrip())
+    while len(string_list) < 8:
+        string_list.append("")
+    return string_list
+
+
+def parse_floats(strings):
+    """
+    Converts an array of strings into an array of floats.
+
+    Cells that do not contain a number become nan, so that the rows they
+    belong to can be removed by the validation of the import.
+    """
+    try:
+        return np.asarray(strings).astype(float)
+    except ValueError:
+        values = np.empty(len(strings))
+        for i, string in enumerate(strings):
+            try:
+                values[i] = float(string)
+            except ValueError:
+                values[i] = np.nan
+        return values
+
+
+def parse_columns(lines, float_columns, text_columns):
+    """
+    Parses a list of lines into arrays of the selected columns.
+
+    Expects the lines of a file and two lists of column-numbers. Returns an
+    (n, k)-array of floats for the float columns and a list of string arrays
+    for the text columns. The lines are parsed by numpy in one call. If that
+    fails, because some lines are too short or contain text where a number is
+    expected, the lines are split one by one and the invalid cells become
+    nan. A "#" is read as text, not as the start of a comment. Empty lines
+    are skipped before parsing, so numpy never receives a chunk without
+    data.
+    """
+    lines = [line for line in "".join(lines).replace(";", ",").splitlines()
+             if line.strip() != ""]
+    if len(lines) == 0:
+        return (np.empty((0, len(float_columns))),
+                [np.array([], dtype=str) for column in text_columns])
+    try:
+        if len(float_columns) > 0:
+            floats = np.loadtxt(lines, delimiter=",", usecols=float_columns,
+                                comments=None, ndmin=2)
+        texts = [np.loadtxt(lines, delimiter=",", usecols=(column,),
+                            dtype=str, comments=None, ndmin=1)
+                 for column in text_columns]
+        if len(float_columns) == 0:
+            floats = np.empty((len(texts[0]) if texts else 0, 0))
+    except ValueError:
+        rows = [split_line(line) for line in lines]
+        floats = np.empty((len(rows), len(float_columns)))
+        for i, column in enumerate(float_columns):
+            floats[:, i] = parse_floats([row[column] for row in rows])
+        texts = [np.array([row[column] for row in rows], dtype=str)
+                 for column in text_columns]
+    return floats, texts
 
 
 class FileParseDialog(object):
@@ -23,13 +102,13 @@ class FileParseDialog(object):
     defined in Glade and are connected to this class.
     """
 
-    def __init__(self, text_file, layer_obj, redraw_plot,
-                 append_plane, append_line, append_faultplane, main_window):
+    def __init__(self, text_file, layer_obj, redraw_plot, main_window,
+                 statbar):
         """
         Initializes the file parser dialog and connects the signals.
 
-        The GUI-layout is loaded from the project Glade file. The functions
-        that the dialog needs to import the data and refresh the plot are
+        The GUI-layout is loaded from the project Glade file. The function
+        that the dialog needs to refresh the plot after the import is
         assigned. Then the treestore and treeview are set up. A few buttons
         are hidden, depending on the layer that was chosen for the import. Then
         the signals are connected and the dialog does the first parsing of the
@@ -47,11 +126,10 @@ class FileParseDialog(object):
         self.dialog = self.builder.get_object("file_parse_dialog")
         self.dialog.set_transient_for(main_window)
         self.redraw_plot = redraw_plot
+        self.statbar = statbar
         self.layer_obj = layer_obj
-        self.append_plane = append_plane
-        self.append_line = append_plane
-        self.append_faultplane = append_faultplane
         self.file = text_file
+        self.worker = None
         self.load_gui_elements()
         self.create_treeview()
         self.hide_buttons()
@@ -76,6 +154,8 @@ class FileParseDialog(object):
         self.combobox_line_sense = self.builder.\
                                         get_object("combobox_line_sense")
         self.scr_win = self.builder.get_object("scrolledwindow_file_parser")
+        self.button_apply = self.builder.get_object("button_parse_apply")
+        self.progressbar = self.builder.get_object("progressbar_import")
         self.grid_planes = self.builder.get_object("grid_planes")
         self.grid_linears = self.builder.get_object("grid_linears")
 
@@ -122,32 +202,57 @@ class FileParseDialog(object):
         Receives a list of strings and appends them to the parsing TreeStore.
 
         This method receives a list of strings that are the result of the
-        file parsing. The list corresponds to one row of the parsed file.
-        If the row has less than 8 entries, a while-loop will append empty
-        columns to it. Then the values are appended to the TreeStore.
+        file parsing. The list corresponds to one row of the parsed file and
+        has at least 8 entries. The first 8 values are appended to the
+        TreeStore.
+        """
+        self.store.append(st_lst[:8])
+
+    def read_rows(self, start_line=0, count=None):
         """
-        while len(st_lst) < 8:
-            st_lst.append("")
-        self.store.append([st_lst[0], st_lst[1], st_lst[2], st_lst[3],
-                          st_lst[4], st_lst[5], st_lst[6], st_lst[7]])
+        Reads the file from the starting line and yields the parsed rows.
+
+        The file is read line by line, so it never has to be held in memory.
+        If a count is given, at most that many rows are read.
+        """
+        stop_line = None if count is None else start_line + count
+        with open(self.file, "r") as parse_file:
+            for line in islice(parse_file, start_line, stop_line):
+                yield split_line(line)
+
+    def read_chunks(self, float_columns, text_columns):
+        """
+        Reads the file from the starting line and yields parsed chunks.
+
+        The file is read in chunks of CHUNK_ROWS lines. Each chunk is parsed
+        into arrays of the selected columns by the parse_columns function.
+        Yields the float array, the list of string arrays and the number of
+        characters of the chunk, which is used to show the progress. This
+        method does not access the GUI, so it can run in a worker thread.
+        """
+        with open(self.file, "r") as parse_file:
+            lines = islice(parse_file, self.start_line, None)
+            while True:
+                chunk = list(islice(lines, CHUNK_ROWS))
+                if len(chunk) == 0:
+                    break
+                floats, texts = parse_columns(chunk, float_columns,
+                                              text_columns)
+                yield floats, texts, sum(len(line) for line in chunk)
 
     def parse_file(self, start_line=0):
         """
-        Parses the file according to the settings and updates the TreeView.
+        Parses the beginning of the file and updates the TreeView.
 
-        The old parsing result are cleared from the TreeStore. Then each
-        row of the file is re-iterated and all rows before the starting
-        row are omitted. The rows are passed to the append_data-method.
+        The old parsing result are cleared from the TreeStore. Only the first
+        PREVIEW_LINES rows after the starting line are read and shown, so
+        large files can be previewed without delay. The whole file is only
+        read when the data is imported.
         """
+        self.start_line = int(start_line)
         self.store.clear()
-        parse_file = open(self.file, "r")
-        for key, line in enumerate(parse_file):
-            if key < start_line:
-                continue
-            else:
-                line = line.rstrip()
-                string_list = re.split(r"[;,]", line)
-                self.append_data(string_list)
+        for string_list in self.read_rows(self.start_line, PREVIEW_LINES):
+            self.append_data(string_list)
 
     def on_spinbutton_start_line_value_changed(self, spinbutton):
         """
@@ -175,9 +280,10 @@ class FileParseDialog(object):
         Triggered when the dialog is closed. Hides the dialog.
 
         When the dialog is closed using the x-button, the dialog is hidden
-        and no importing actions are triggered. The results of the parsing
-        are lost.
+        and no importing actions are triggered. A running import is
+        cancelled. The results of the parsing are lost.
         """
+        self.cancel_import()
         self.dialog.hide()
 
     def on_file_parse_dialog_destroy(self, widget):
@@ -185,9 +291,10 @@ class FileParseDialog(object):
         """
         Runs when the dialog is destroyed. Hides the dialog.
 
-        When the dialog is destroyed it hidden and no other actions are taken.
-        The results of the parsing are lost.
+        When the dialog is destroyed it hidden and a running import is
+        cancelled. The results of the parsing are lost.
         """
+        self.cancel_import()
         self.dialog.hide()
 
     def on_file_parse_dialog_response(self, widget, response):
@@ -195,140 +302,174 @@ class FileParseDialog(object):
         """
         Executes when a response is triggered. Hides the dialog.
 
-        When the dialog-response is triggered the dialog is hidden. No other
-        actions are taken and the results of the parsing are lost.
+        When the dialog-response is triggered the dialog is hidden and a
+        running import is cancelled. The results of the parsing are lost.
         """
+        self.cancel_import()
         self.dialog.hide()
 
-    def on_button_parse_apply_clicked(self, button):
-        # pylint: disable=unused-argument
+    def get_column(self, combobox):
         """
-        Clicking apply appends the parsed data to the layer.
+        Returns the file column that is assigned in a combobox, or None.
+        """
+        column = combobox.get_active()
+        if 0 <= column < 8:
+            return column
+        return None
 
-        When apply is clicked this method appends all the data to the
-        liststore of the active layer. The method first gets all the column-
-        numbers from the dialog. The column-numbers match the parsed-column
-        with the internal column for the data (e.g. plane dip-direction is in
-        the 3rd column in the parsed file, but needs to go into the 1st column
-        of a plane-layer).
-        """
-        cb_pl_dipdir = self.combobox_plane_dipdir.get_active()
-        cb_pl_dip = self.combobox_plane_dip.get_active()
-        cb_pl_strat = self.combobox_strat.get_active()
-        cb_ln_dipdir = self.combobox_line_dipdir.get_active()
-        cb_ln_dip = self.combobox_line_dip.get_active()
-        cb_ln_sense = self.combobox_line_sense.get_active()
-        layer_store = self.layer_obj.get_data_treestore()
-        layer_type = self.layer_obj.get_layer_type()
-        self.checkbutton_tectonicsfpl = \
-                            self.builder.get_object("checkbutton_tectonicsfpl")
-        self.use_tfpl = self.checkbutton_tectonicsfpl.get_active()
+    def translate_senses(self, senses):
+        """
+        Translates an array of T-TECTO sense codes into sense labels.
 
-        def iterate_over_planes(m, p, i):
-            """
-            Iterates over all parsed rows and adds them to a plane-layer.
+        Only the first character of each cell is used. Cells with an unknown
+        code become an empty string.
+        """
+        codes = senses.astype("U1")
+        labels = np.full(len(codes), "", dtype=object)
+        for code, label in self.tfpl_dic.items():
+            labels[codes == code] = label
+        return labels
 
-            Replaces the values with a default so there is no IndexError.
-            Calls the add_planar_feature function from the MainWindow class.
-            """
-            #m = model, p = path, i = itr
-            if cb_pl_dipdir == -1:
-                dipdir = 0
-            else:
-                dipdir = float(m[p][cb_pl_dipdir])
-            if cb_pl_dip == -1:
-                dip = 0
-            else:
-                dip = float(m[p][cb_pl_dip])
-            if cb_pl_strat == -1:
-                strat = ""
-            else:
-                strat = str(m[p][cb_pl_strat])
-            self.append_plane(layer_store, dipdir, dip, strat)
-
-        def iterate_over_lines(m, p, i):
-            """
-            Iterates over all parsed rows and adds them to a line-layer.
-
-            Replaces the values with a default so there is no IndexError.
-            Calls the add_linear_feature function from the MainWindow class.
-            """
-            #m = model, p = path, i = itr
-            if cb_ln_dipdir == -1:
-                dipdir = 0
-            else:
-                dipdir = float(m[p][cb_ln_dipdir])
+    def layer_columns(self, floats, texts):
+        """
+        Converts a parsed chunk into the columns of the layer.
 
-            if cb_ln_dip == -1:
-                dip = 0
+        Rows in which an assigned number column does not contain a number are
+        skipped and counted, so the import can report them. Unassigned
+        columns are filled with 0 or an empty string and T-TECTO codes are
+        translated if they are used. Returns a list of arrays, one for each
+        column of the layer.
+        """
+        valid = np.isfinite(floats).all(axis=1)
+        self.skipped_rows += len(valid) - np.count_nonzero(valid)
+        floats = floats[valid]
+        count = len(floats)
+        columns = []
+        for column in self.float_columns:
+            if column is None:
+                columns.append(np.zeros(count))
             else:
-                dip = float(m[p][cb_ln_dip])
+                columns.append(floats[:, self.assigned.index(column)])
+        if self.text_column is None:
+            columns.append(np.full(count, "", dtype=object))
+        elif self.senses is True and self.use_tfpl is True:
+            columns.append(self.translate_senses(texts[0][valid]))
+        else:
+            columns.append(texts[0][valid])
+        return columns
+
+    def insert_chunk(self, chunk):
+        """
+        Appends one parsed chunk to the layer and shows the progress.
 
-            if cb_ln_sense == -1:
-                sense = ""
-            else:
-                if self.use_tfpl is True:
-                    sense = self.tfpl_dic[m[p][cb_ln_sense][0:1]]
-                else:
-                    sense = str(m[p][cb_ln_sense])
-
-            self.append_line(layer_store, dipdir, dip, sense)
-
-        def iterate_over_faultplanes(m, p, i):
-            """
-            Iterates over all parsed rows and adds them to a faultplane-layer.
-
-            Replaces the values with a default so there is no IndexError.
-            Calls the add_faultplane_feature function from the MainWindow class.
-            """
-            #m = model, p = path, i = itr
-            if cb_pl_dipdir == -1:
-                pl_dipdir = 0
-            else:
-                pl_dipdir = float(m[p][cb_pl_dipdir])
+        Called by the ImportWorker in the main thread. All rows of the chunk
+        are added to the layer in one batch.
+        """
+        floats, texts, length = chunk
+        self.layer_obj.add_features(*self.layer_columns(floats, texts))
+        self.characters_read += length
+        self.progressbar.set_fraction(
+                            min(self.characters_read / self.file_size, 1))
 
-            if cb_pl_dip == -1:
-                pl_dip = 0
-            else:
-                pl_dip = float(m[p][cb_pl_dip])
+    def finish_import(self, cancelled, error):
+        """
+        Finishes the import. Called by the ImportWorker in the main thread.
 
-            if cb_ln_dipdir == -1:
-                ln_dipdir = 0
-            else:
-                ln_dipdir = float(m[p][cb_ln_dipdir])
+        The plot is redrawn with the imported rows, and the number of rows
+        that were skipped is shown in the statusbar. If the import was
+        stopped by an error, the error is shown in the progress bar and the
+        dialog stays open. Otherwise the dialog is hidden.
+        """
+        self.worker = None
+        self.button_apply.set_sensitive(True)
+        self.redraw_plot()
+        if self.skipped_rows > 0:
+            self.statbar.push(1, _("{} rows without valid numbers were "
+                                   "skipped.").format(self.skipped_rows))
+        if error is not None:
+            self.progressbar.set_text(str(error))
+            return
+        self.dialog.hide()
 
-            if cb_ln_dip == -1:
-                ln_dip = 0
-            else:
-                ln_dip = float(m[p][cb_ln_dip])
+    def cancel_import(self):
+        """
+        Cancels the running import. Returns True if there was one.
+        """
+        if self.worker is None or not self.worker.is_running():
+            return False
+        self.worker.cancel()
+        return True
 
-            if cb_ln_sense == -1:
-                ln_sense = ""
-            else:
-                if self.use_tfpl is True:
-                    ln_sense = self.tfpl_dic[m[p][cb_ln_sense][0:1]]
-                else:
-                    ln_sense = str(m[p][cb_ln_sense])
+    def on_button_parse_apply_clicked(self, button):
+        # pylint: disable=unused-argument
+        """
+        Clicking apply appends the parsed data to the layer.
 
-            self.append_faultplane(layer_store, pl_dipdir, pl_dip, ln_dipdir,
-                                   ln_dip, ln_sense)
+        When apply is clicked the assigned column-numbers are read from the
+        dialog. The column-numbers match the parsed-column with the internal
+        column for the data (e.g. plane dip-direction is in the 3rd column in
+        the parsed file, but needs to go into the 1st column of a
+        plane-layer). Then an ImportWorker reads the whole file, starting at
+        the chosen line, in a worker thread. The parsed chunks are appended
+        to the layer in the main thread, while the progress bar shows how
+        much of the file has been read.
+        """
+        if self.worker is not None:
+            return
+
+        pl_dipdir = self.get_column(self.combobox_plane_dipdir)
+        pl_dip = self.get_column(self.combobox_plane_dip)
+        pl_strat = self.get_column(self.combobox_strat)
+        ln_dipdir = self.get_column(self.combobox_line_dipdir)
+        ln_dip = self.get_column(self.combobox_line_dip)
+        ln_sense = self.get_column(self.combobox_line_sense)
+        layer_type = self.layer_obj.get_layer_type()
+        self.checkbutton_tectonicsfpl = \
+                            self.builder.get_object("checkbutton_tectonicsfpl")
+        self.use_tfpl = self.checkbutton_tectonicsfpl.get_active()
 
         if layer_type == "plane":
-            self.store.foreach(iterate_over_planes)
+            self.float_columns = [pl_dipdir, pl_dip]
+            self.text_column = pl_strat
+            self.senses = False
         elif layer_type == "line":
-            self.store.foreach(iterate_over_lines)
+            self.float_columns = [ln_dipdir, ln_dip]
+            self.text_column = ln_sense
+            self.senses = True
         elif layer_type == "faultplane":
-            self.store.foreach(iterate_over_faultplanes)
-        self.redraw_plot()
-        self.dialog.hide()
+            self.float_columns = [pl_dipdir, pl_dip, ln_dipdir, ln_dip]
+            self.text_column = ln_sense
+            self.senses = True
+        else:
+            self.dialog.hide()
+            return
+
+        self.assigned = [column for column in self.float_columns
+                         if column is not None]
+        text_columns = [] if self.text_column is None else [self.text_column]
+        self.file_size = max(os.path.getsize(self.file), 1)
+        self.characters_read = 0
+        self.skipped_rows = 0
+        self.layer_obj.clear_results()
+        self.progressbar.set_text(None)
+        self.progressbar.set_fraction(0)
+        self.button_apply.set_sensitive(False)
+        self.worker = ImportWorker(
+                    lambda: self.read_chunks(self.assigned, text_columns),
+                    self.insert_chunk, self.finish_import)
+        self.worker.start()
 
     def on_button_cancel_clicked(self, button):
         # pylint: disable=unused-argument
         """
         Cancels the file parsing. Hides the dialog.
 
-        Triggered when "Cancel" is clicked in the dialog. This method hides
-        the dialog. No other actions are taken and the results of the parsing
+        Triggered when "Cancel" is clicked in the dialog. If an import is
+        running, it is cancelled and the dialog is hidden when the worker has
+        stopped. The rows that were already imported stay in the layer.
+        Otherwise this method hides the dialog and the results of the parsing
         are lost.
         """
+        if self.cancel_import():
+            return
         self.dialog.hide()
@@ -0,0 +1,165 @@
+#!/usr/bin/python3
+
+"""
+This module contains the ImportWorker-class.
+
+Large files are read and parsed in a worker thread, so that the GTK main loop
+stays responsive during the import. The worker passes the finished chunks to
+the main thread, where they are inserted into the layers.
+"""
+
+from gi.repository import GLib
+import queue
+import threading
+import time
+
+#Number of rows that are parsed and inserted at once
+CHUNK_ROWS = 20000
+
+#Number of parsed chunks that can wait for their insertion
+QUEUE_CHUNKS = 4
+
+#Interval in milliseconds in which the main thread inserts waiting chunks
+INSERT_INTERVAL = 20
+
+#Seconds that the main thread spends inserting chunks before it redraws
+INSERT_TIME = 0.05
+
+#Seconds that the worker waits for space in the queue before it checks again
+#if the import was cancelled or finished
+PUT_TIMEOUT = 0.1
+
+
+class ImportWorker(object):
+
+    """
+    This class runs an import in a worker thread.
+
+    The worker thread iterates over the chunks of a file and puts them into a
+    queue. The main thread takes the chunks from the queue in a GLib timeout
+    and inserts them one by one, so the GUI can redraw between two chunks.
+    The queue is bounded, so a fast worker can not fill the memory with
+    chunks that are still waiting for their insertion. Errors in the worker
+    thread or in the insertion stop the import and are passed to the finish
+    function, so a partial import is never reported as a success.
+    """
+
+    def __init__(self, read_chunks, insert_chunk, finish):
+        """
+        Initializes the worker.
+
+        Expects a function without arguments that returns an iterable of
+        chunks, which is called in the worker thread and must not access the
+        GUI. The insert_chunk function is called in the main thread with each
+        chunk. The finish function is called in the main thread when the
+        import is done, with a boolean that tells if it was cancelled and the
+        error that stopped the import, or None.
+        """
+        self.read_chunks = read_chunks
+        self.insert_chunk = insert_chunk
+        self.finish = finish
+        self.chunks = queue.Queue(QUEUE_CHUNKS)
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.error = None
+        self.running = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """
+        Starts the worker thread and the insertion in the main thread.
+        """
+        self.running = True
+        self.thread.start()
+        GLib.timeout_add(INSERT_INTERVAL, self.insert_chunks)
+
+    def cancel(self):
+        """
+        Cancels the import.
+
+        The worker stops after the chunk it is currently reading. Chunks that
+        were already inserted stay in the layers.
+        """
+        self.cancelled.set()
+
+    def is_running(self):
+        """
+        Returns True until the finish function has been called.
+        """
+        return self.running
+
+    def put(self, chunk):
+        """
+        Puts a chunk into the queue. Runs in the thread.
+
+        While the queue is full, the worker checks regularly whether the
+        import was cancelled, in which case the chunk is dropped, or whether
+        the main thread has finished the import and stopped taking chunks.
+        The end marker None is only dropped in the second case, because the
+        main thread waits for it after a cancellation. Returns False if the
+        chunk was dropped.
+        """
+        while not self.finished.is_set():
+            if chunk is not None and self.cancelled.is_set():
+                return False
+            try:
+                self.chunks.put(chunk, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(self):
+        """
+        Reads the chunks and puts them into the queue. Runs in the thread.
+
+        Any error that occurs while reading or parsing is stored and passed
+        to the finish function. The end of the import is marked by None.
+        """
+        try:
+            for chunk in self.read_chunks():
+                if self.cancelled.is_set() or not self.put(chunk):
+                    break
+        except Exception as error:
+            self.error = error
+        finally:
+            self.put(None)
+
+    def stop(self, error):
+        """
+        Ends the import in the main thread and calls the finish function.
+        """
+        self.running = False
+        self.finished.set()
+        self.finish(self.cancelled.is_set(), error)
+
+    def insert_chunks(self):
+        """
+        Inserts the waiting chunks. Called by a GLib timeout.
+
+        Chunks are inserted until the queue is empty or INSERT_TIME seconds
+        have passed, so that many small chunks do not have to wait for the
+        next timeout each. Chunks of a cancelled import are only taken from
+        the queue, so the worker thread can finish. If a chunk can not be
+        inserted, the import is cancelled and finished with that error.
+        Returns False after the last chunk, which removes the timeout.
+        """
+        start = time.monotonic()
+        while time.monotonic() - start < INSERT_TIME:
+            try:
+                chunk = self.chunks.get_nowait()
+            except queue.Empty:
+                return True
+
+            if chunk is None:
+                self.stop(self.error)
+                return False
+
+            if not self.cancelled.is_set():
+                try:
+                    self.insert_chunk(chunk)
+                except Exception as error:
+                    self.cancel()
+                    self.stop(error)
+                    return False
+        return True
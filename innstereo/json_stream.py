@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+
+"""
+Incremental reading of "InnStereo data file 1.0" JSON projects.
+
+The JsonStream-class decodes a JSON document piece by piece from a file, so
+that large arrays can be iterated without holding the whole document in
+memory. The read_project function uses it to yield the layers of a project
+one after the other, with their rows split into chunks. This module does not
+depend on Gtk, so it can be used in a worker thread.
+"""
+
+import json
+import os
+import re
+
+#Number of characters that are read from the file at once
+READ_SIZE = 1048576
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class JsonStream(object):
+
+    """
+    This class decodes a JSON document from a file in small pieces.
+
+    Only a buffer of the file is kept in memory. Containers can be entered
+    with the keys and items methods, and complete values are decoded with the
+    value method.
+    """
+
+    def __init__(self, json_file):
+        """
+        Initializes the stream with a file that is opened for reading.
+        """
+        self.file = json_file
+        self.buffer = ""
+        self.position = 0
+        self.consumed = 0
+        self.decoder = json.JSONDecoder()
+
+    def tell(self):
+        """
+        Returns the number of characters that have been decoded so far.
+        """
+        return self.consumed + self.position
+
+    def fill(self):
+        """
+        Reads the next part of the file into the buffer.
+
+        The decoded part of the buffer is dropped. Returns False at the end
+        of the file.
+        """
+        data = self.file.read(READ_SIZE)
+        if len(data) == 0:
+            return False
+        self.consumed += self.position
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character.
+        """
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                raise ValueError("Unexpected end of the JSON file")
+
+    def expect(self, character):
+        """
+        Skips the next character, which has to be the expected one.
+        """
+        if self.peek() != character:
+            raise ValueError("Expected '{0}' at character {1}".format(
+                                                    character, self.tell()))
+        self.position += 1
+
+    def value(self):
+        """
+        Decodes the next complete value and returns it.
+
+        If the value is not complete in the buffer, more of the file is read.
+        A value that ends exactly at the end of the buffer could be a cut off
+        number, so it is decoded again with more data.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer,
+                                                     self.position)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.position = end
+            return value
+
+    def items(self):
+        """
+        Iterates over the elements of the next array.
+
+        Yields once for each element. Before the next iteration the element
+        has to be read, e.g. with the value method.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield
+            separator = self.peek()
+            self.position += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError("Expected ',' or ']' at character {}".format(
+                                                                self.tell()))
+
+    def keys(self):
+        """
+        Iterates over the keys of the next object.
+
+        Yields each key. Before the next iteration the value of the key has
+        to be read.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            separator = self.peek()
+            self.position += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError("Expected ',' or '}}' at character {}".format(
+                                                                self.tell()))
+
+
+def read_project(filename, chunk_rows):
+    """
+    Reads an "InnStereo data file 1.0" JSON project incrementally.
+
+    Yields tuples of a kind, its content and the fraction of the file that
+    has been read. The kinds are "layer" with the path and properties of a
+    layer, "rows" with the columns of up to chunk_rows rows of the last
+    layer, and "settings" with the settings of the project. The properties
+    of each layer are yielded before its rows. Raises a ValueError if the
+    file is not valid JSON or has another filetype.
+    """
+    size = max(os.path.getsize(filename), 1)
+    with open(filename, "r") as json_file:
+        stream = JsonStream(json_file)
+        for key in stream.keys():
+            if key == "layers":
+                for _ in stream.items():
+                    stream.expect("[")
+                    path = stream.value()
+                    stream.expect(",")
+                    properties = stream.value()
+                    stream.expect(",")
+                    yield "layer", (path, properties), stream.tell() / size
+
+                    rows = []
+                    for _ in stream.items():
+                        rows.append(stream.value())
+                        if len(rows) == chunk_rows:
+                            yield ("rows", list(zip(*rows)),
+                                   stream.tell() / size)
+                            rows = []
+                    if len(rows) > 0:
+                        yield "rows", list(zip(*rows)), stream.tell() / size
+                    stream.expect("]")
+            elif key == "settings":
+                yield "settings", stream.value(), stream.tell() / size
+            elif key == "filetype":
+                if stream.value() != "InnStereo data file 1.0":
+                    raise ValueError("Not a valid InnStereo data file")
+            else:
+                stream.value()
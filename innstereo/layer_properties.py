@@ -13,6 +13,9 @@ import matplotlib.colors as colors
 import os, sys
 import numpy as np
 from .i18n import i18n, translate_gui
+from . import vector_math
+
+_ = i18n().language().gettext
 
 
 class LayerProperties(object):
@@ -76,6 +79,7 @@ class LayerProperties(object):
         self.load_fault_properties()
         self.load_contour_properties()
         self.load_rose_properties()
+        self.load_eigenvector_page()
         self.hide_gui_elements()
         self.set_contour_range_label()
         self.builder.connect_signals(self)
@@ -308,6 +312,41 @@ class LayerProperties(object):
         self.set_rose_spacing_label()
         self.set_dip_rose_spacing_label()
 
+    def load_eigenvector_page(self):
+        """
+        Adds a page with the eigenvectors of the layer to the notebook.
+
+        Only plane and linear layers have this page. The eigenvectors are
+        calculated from the orientation tensor that the layer keeps up to
+        date, so opening the dialog does not parse the data.
+        """
+        if self.layer.get_layer_type() not in ["plane", "line"]:
+            return
+
+        notebook = self.builder.get_object("notebook1")
+        grid = Gtk.Grid(row_spacing=6, column_spacing=18, border_width=12)
+        tensor, count = self.layer.get_orientation_tensor()
+        grid.attach(Gtk.Label(label=_("Number of features: {}").format(count),
+                              xalign=0), 0, 0, 3, 1)
+
+        if count > 0:
+            dipdir, dip, values = vector_math.tensor_eigenvectors(tensor,
+                                                                  count)
+            for column, header in enumerate([_("Eigenvector"),
+                                             _("Dip-Direction / Dip"),
+                                             _("Eigenvalue")]):
+                grid.attach(Gtk.Label(label=header, xalign=0), column, 1, 1, 1)
+            for k in range(3):
+                grid.attach(Gtk.Label(label="E{}".format(k + 1), xalign=0),
+                            0, k + 2, 1, 1)
+                grid.attach(Gtk.Label(label="{0:03.0f} / {1:02.0f}".format(
+                            dipdir[k], dip[k]), xalign=0), 1, k + 2, 1, 1)
+                grid.attach(Gtk.Label(label="{:.3f}".format(values[k]),
+                            xalign=0), 2, k + 2, 1, 1)
+
+        grid.show_all()
+        notebook.append_page(grid, Gtk.Label(label=_("Eigenvectors")))
+
     def hide_gui_elements(self):
         """
         Hides some elements of the GUI depending on the layer type
@@ -319,6 +358,7 @@ class LayerProperties(object):
         3: Fault Plots
         4: Contours
         5: Rose Diagram
+        6: Eigenvectors (only plane and line layers)
         """
         self.notebook = \
                         self.builder.get_object("notebook1")
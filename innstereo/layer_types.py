@@ -12,9 +12,15 @@ the layer properties dialog is opened. Changes in the layer properties dialog
 are stored in these classes.
 """
 
-from gi.repository import Gdk, GdkPixbuf
+from gi.repository import Gtk, Gdk, GdkPixbuf
 from collections import OrderedDict
+import numpy as np
+import os
+import scipy.spatial as spatial
 from .i18n import i18n
+from . import vector_math
+from . import mapped_data
+from . import orientation_statistics
 
 _ = i18n().language().gettext
 
@@ -29,16 +35,28 @@ class PlaneLayer(object):
     additional get-rgba-method.
     """
 
-    def __init__(self, treestore, treeview):
+    #Types of the columns of the data-treestore
+    column_types = (float, float, str)
+
+    #Values of the columns of a feature that is added without them
+    feature_defaults = (0, 0, "")
+
+    def __init__(self, create_view):
         """
         Initalizes the PlaneLayer class with default settings.
 
-        The settings that are applied here are also set for the layers, that
-        inherit from the PlaneLayer class, even if some settings are not used
-        for certain layer-types.
+        Expects a function that creates the data TreeView for a given
+        TreeStore. The TreeStore and TreeView are only created when they are
+        first needed. Until then the data is kept in arrays. The settings
+        that are applied here are also set for the layers, that inherit from
+        the PlaneLayer class, even if some settings are not used for certain
+        layer-types.
         """
-        self.data_treestore = treestore
-        self.data_treeview = treeview
+        self.create_view = create_view
+        self.data_treestore = None
+        self.data_treeview = None
+        self.data_columns = None
+        self.data_chunks = []
 
         self.props = OrderedDict(sorted({"type": "plane",
                       "label": "Plane layer",
@@ -99,6 +117,663 @@ class PlaneLayer(object):
                       }.items()))
         self.props["label"] = _("Plane Layer")
 
+        self.data_version = 0
+        self.data_cache = {}
+        self.data_source = None
+        self.archive_source = None
+        self.load_error = None
+        self.data_handlers = []
+        self.tensor = np.zeros((3, 3))
+        self.tensor_count = 0
+        self.tensor_rows = []
+
+    def create_store(self):
+        """
+        Creates the data-treestore and moves the data arrays into it.
+
+        The signals of the treestore are connected, so that every change
+        increases the data version, removes the stored results and updates
+        the orientation tensor. The rows of the arrays are inserted with the
+        signal handlers blocked, and the vectors of the rows are kept for the
+        incremental updates of the tensor.
+        """
+        self.data_treestore = Gtk.ListStore(*self.column_types)
+        for signal in ["row-changed", "row-inserted", "row-deleted",
+                       "rows-reordered"]:
+            self.data_handlers.append(
+                    self.data_treestore.connect(signal, self.data_changed))
+            self.data_handlers.append(
+                    self.data_treestore.connect(signal, self.rows_edited))
+        for signal, handler in [("row-inserted", self.tensor_row_inserted),
+                                ("row-changed", self.tensor_row_changed),
+                                ("row-deleted", self.tensor_row_deleted),
+                                ("rows-reordered", self.rebuild_tensor)]:
+            self.data_handlers.append(
+                    self.data_treestore.connect(signal, handler))
+
+        columns = self.join_chunks()
+        self.data_columns = None
+        if columns is None:
+            return
+        self.insert_rows(columns)
+        vectors = self.to_vectors(columns[0], columns[1])
+        if vectors is None:
+            self.tensor_rows = [None] * len(columns[0])
+        else:
+            self.tensor_rows = list(vectors)
+
+    def insert_rows(self, columns):
+        """
+        Inserts rows into the data-treestore with the signal handlers blocked.
+
+        If the treeview exists it is detached from the treestore during the
+        insertion.
+        """
+        rows = zip(*[np.asarray(column).tolist() for column in columns])
+        for handler in self.data_handlers:
+            self.data_treestore.handler_block(handler)
+        if self.data_treeview is not None:
+            self.data_treeview.set_model(None)
+        try:
+            append = self.data_treestore.append
+            for row in rows:
+                append(row)
+        finally:
+            if self.data_treeview is not None:
+                self.data_treeview.set_model(self.data_treestore)
+            for handler in self.data_handlers:
+                self.data_treestore.handler_unblock(handler)
+
+    def join_chunks(self):
+        """
+        Joins the chunks that were appended before the treestore exists.
+
+        The chunks are only collected while they are appended, so a layer
+        that is filled chunk by chunk copies its data once, when it is read
+        for the first time. Returns the data arrays or None.
+        """
+        if len(self.data_chunks) > 0:
+            chunks = self.data_chunks
+            if self.data_columns is not None:
+                chunks = [self.data_columns] + chunks
+            self.data_columns = [np.concatenate(parts)
+                                 for parts in zip(*chunks)]
+            self.data_chunks = []
+        return self.data_columns
+
+    def get_columns(self):
+        """
+        Returns the data of the layer as a list of arrays, one per column.
+
+        Before the treestore exists the data arrays are returned directly.
+        Returns None if the layer has no rows.
+        """
+        self.load_data()
+        if self.data_treestore is None:
+            return self.join_chunks()
+        if len(self.data_treestore) == 0:
+            return None
+        rows = [row[:] for row in self.data_treestore]
+        return [np.array(column) for column in zip(*rows)]
+
+    def get_rows(self):
+        """
+        Returns the rows of the layer for reading.
+
+        If the treestore exists it is returned. Otherwise a list of tuples is
+        created from the data arrays, so that reading the data does not
+        create the treestore.
+        """
+        self.load_data()
+        if self.data_treestore is not None:
+            return self.data_treestore
+        columns = self.join_chunks()
+        if columns is None:
+            return []
+        return list(zip(*[column.tolist() for column in columns]))
+
+    def iter_chunks(self, rows=mapped_data.CHUNK_ROWS):
+        """
+        Iterates over the data of the layer in chunks of rows.
+
+        Yields lists with one array for each column. Layers without rows
+        yield nothing.
+        """
+        columns = self.get_columns()
+        if columns is None:
+            return
+        yield from mapped_data.iter_chunks(columns, rows)
+
+    def is_mapped(self):
+        """
+        Returns True if the data of the layer is mapped from a file.
+
+        Mapped layers can not be edited. See the MappedLayer-class.
+        """
+        return False
+
+    def get_row_count(self):
+        """
+        Returns the number of rows of the layer.
+        """
+        self.load_data()
+        if self.data_treestore is not None:
+            return len(self.data_treestore)
+        count = sum(len(chunk[0]) for chunk in self.data_chunks)
+        if self.data_columns is not None:
+            count += len(self.data_columns[0])
+        return count
+
+    def get_row(self, key):
+        """
+        Returns the values of one row as a list.
+
+        Reading a single row does not create the treestore.
+        """
+        self.load_data()
+        if self.data_treestore is not None:
+            return self.data_treestore[key][:]
+        return [column[key] for column in self.join_chunks()]
+
+    def data_changed(self, *args):
+        """
+        Increases the data version of the layer.
+
+        Connected to the signals of the data-treestore. Every change of the
+        data gives the layer a new version, which invalidates all results that
+        were cached for older versions.
+        """
+        self.data_version += 1
+
+    def rows_edited(self, *args):
+        """
+        Removes the stored results when the user edits the rows.
+
+        Connected to the signals of the data-treestore, which are blocked
+        while rows are inserted in batches. A density grid or stress
+        inversion no longer matches the rows once they are edited, so it is
+        removed and the layer is drawn from its rows again.
+        """
+        self.clear_results()
+
+    def set_data_source(self, load):
+        """
+        Sets a function that loads the data of the layer when it is needed.
+
+        The function has no arguments and returns the list of columns of the
+        layer. It is called once, the first time the data is accessed.
+        """
+        self.data_source = load
+
+    def is_loaded(self):
+        """
+        Returns False while the data source of the layer has not been read.
+        """
+        return self.data_source is None
+
+    def load_data(self):
+        """
+        Loads the data from the data source of the layer, if it has one.
+
+        If the data came unchanged from a project archive before, it still
+        does after loading. If the data can not be read, e.g. because the
+        archive was moved or the array is missing, the layer stays empty and
+        the error is kept until it is reported (see get_load_error).
+        """
+        if self.data_source is None:
+            return
+        load = self.data_source
+        self.data_source = None
+        archive_source = self.get_archive_source()
+        try:
+            columns = load()
+        except (OSError, ValueError, KeyError) as error:
+            self.load_error = error
+            self.archive_source = None
+            return
+        if len(columns) > 0:
+            self.add_features(*columns)
+        if archive_source is not None:
+            self.set_archive_source(*archive_source)
+
+    def get_load_error(self):
+        """
+        Returns the error that stopped the loading of the data, or None.
+        """
+        return self.load_error
+
+    def set_load_error(self, error):
+        """
+        Sets the load error. Set to None after the error was reported.
+        """
+        self.load_error = error
+
+    def set_archive_source(self, filename, name):
+        """
+        Remembers that the current data is stored in a project archive.
+
+        Expects the file name of the archive and the name of the array of the
+        layer in it.
+        """
+        self.archive_source = (filename, name, self.data_version)
+
+    def get_archive_source(self):
+        """
+        Returns the archive file and array name that hold the current data.
+
+        Returns None if the data was changed after it was loaded or saved.
+        """
+        if self.archive_source is None:
+            return None
+        filename, name, version = self.archive_source
+        if version != self.data_version or not os.path.exists(filename):
+            return None
+        return filename, name
+
+    def get_data_version(self):
+        """
+        Returns the current data version of the layer.
+
+        The version is an integer that is increased each time a row of the
+        layer is added, edited, removed or moved.
+        """
+        return self.data_version
+
+    def get_cached(self, key, calculate):
+        """
+        Returns a cached result for the current data version.
+
+        Expects a key and a function without arguments. If the result stored
+        under that key was calculated for an older data version, or nothing
+        is stored yet, the function is called and its result is cached.
+        """
+        version, result = self.data_cache.get(key, (None, None))
+        if version != self.data_version:
+            result = calculate()
+            self.data_cache[key] = (self.data_version, result)
+        return result
+
+    def store_result(self, key, result):
+        """
+        Stores the result of a calculation for the current data version.
+
+        Results that cannot be calculated from the data of the layer itself
+        (for example a density grid of other layers) are stored with this
+        method. They are dropped as soon as the data of the layer changes.
+        """
+        self.data_cache[key] = (self.data_version, result)
+
+    def get_result(self, key):
+        """
+        Returns a stored result, or None if it belongs to older data.
+        """
+        version, result = self.data_cache.get(key, (None, None))
+        if version != self.data_version:
+            return None
+        return result
+
+    def set_density_grid(self, density):
+        """
+        Stores a precomputed density grid for the contours of the layer.
+
+        Expects the (gridsize, gridsize)-array of densities on the counting
+        grid of orientation_statistics.counting_grid, as it is returned by
+        orientation_statistics.beta_density. The densities are stored in the
+        "density_grid" property, so the grid is saved, copied and dragged
+        with the layer. It is removed when the rows of the layer are edited
+        (see rows_edited).
+        """
+        density = np.asarray(density, dtype=float)
+        if density.ndim != 2 or density.shape[0] != density.shape[1]:
+            raise ValueError("The density grid has to be square")
+        self.props["density_grid"] = np.round(density, 6).tolist()
+
+    def get_density_grid(self):
+        """
+        Returns the precomputed density grid of the layer.
+
+        Returns a tuple of longitudes, latitudes and densities, or None if
+        the layer has no grid. The longitudes and latitudes are the counting
+        grid of the size of the densities.
+        """
+        density = self.props.get("density_grid")
+        if density is None:
+            return None
+        density = np.array(density, dtype=float)
+        lon, lat = orientation_statistics.counting_grid(len(density))
+        return lon, lat, density
+
+    def clear_results(self):
+        """
+        Removes the results that were calculated from other layers.
+
+        Used when the properties of a layer are copied to a layer with other
+        data, e.g. by the rotation dialog, and when its rows are replaced or
+        edited.
+        """
+        self.props.pop("density_grid", None)
+        self.props.pop("stress_inversion", None)
+        self.data_cache.pop("fault_stresses", None)
+
+    def set_stress_inversion(self, result):
+        """
+        Stores the result of a stress inversion.
+
+        Expects the dictionary returned by
+        orientation_statistics.stress_inversion. Like the density grid, the
+        result is stored as lists in the "stress_inversion" property, so the
+        misfit histogram and Mohr diagram are kept when the layer is saved,
+        copied or dragged.
+        """
+        self.props["stress_inversion"] = {key: np.asarray(value).tolist()
+                                          for key, value in result.items()}
+        self.data_cache.pop("fault_stresses", None)
+
+    def get_stress_inversion(self):
+        """
+        Returns the stored stress inversion, or None.
+
+        The values of the dictionary are returned as arrays.
+        """
+        result = self.props.get("stress_inversion")
+        if result is None:
+            return None
+        return {key: np.array(value) for key, value in result.items()}
+
+    def get_fault_stresses(self):
+        """
+        Returns the stresses of the faults of a stored stress inversion.
+
+        The tensor of the inversion is resolved onto all faults at once, and
+        the result is cached together with the misfit histogram, so the
+        paleostress view can be redrawn without new calculations. Returns a
+        dictionary with the normal stress ("normal"), shear stress ("shear"),
+        misfit angles ("misfits"), the histogram of the misfits ("counts",
+        "edges") and the principal stresses ("principal"), or None.
+        """
+        if self.props.get("stress_inversion") is None:
+            return None
+
+        def calculate():
+            result = self.get_stress_inversion()
+            normal, shear, misfits = vector_math.fault_stresses(
+                        result["tensor"], result["normals"], result["slips"])
+            counts, edges = np.histogram(misfits, bins=18, range=(0, 180))
+            return {"normal": normal, "shear": shear, "misfits": misfits,
+                    "counts": counts, "edges": edges,
+                    "principal": np.linalg.eigvalsh(result["tensor"])[::-1]}
+
+        return self.get_cached("fault_stresses", calculate)
+
+    def to_vectors(self, dipdir, dip):
+        """
+        Converts the first two columns of the layer into unit vectors.
+
+        For planes these are the poles of the planes. Expects two array-likes
+        and returns an (n, 3)-array. Layer types that have no directions
+        return None.
+        """
+        return vector_math.plane_to_vector(dipdir, dip)
+
+    def row_vector(self, row):
+        """
+        Returns the vector that a row adds to the orientation tensor.
+        """
+        vectors = self.to_vectors(row[0], row[1])
+        if vectors is None:
+            return None
+        return vectors[0]
+
+    def get_vectors(self):
+        """
+        Returns the directions of all rows as an (n, 3)-array of unit vectors.
+
+        The array is cached until the data of the layer changes.
+        """
+        def calculate():
+            columns = self.get_columns()
+            if columns is None:
+                return self.to_vectors([], [])
+            return self.to_vectors(columns[0], columns[1])
+
+        return self.get_cached("vectors", calculate)
+
+    def get_histogram(self, column, bins, limits):
+        """
+        Returns a histogram of one column of the layer.
+
+        Expects the number of the column, the number of bins and a tuple of
+        the lower and upper limit. Returns the counts and the edges of the
+        bins like numpy.histogram. The histogram is cached until the data of
+        the layer changes.
+        """
+        def calculate():
+            columns = self.get_columns()
+            values = [] if columns is None else columns[column]
+            return np.histogram(values, bins, range=limits)
+
+        return self.get_cached(("histogram", column, bins, limits), calculate)
+
+    def tensor_row_inserted(self, model, path, itr):
+        """
+        Adds a new row to the orientation tensor.
+
+        Connected to the "row-inserted" signal of the data-treestore. The
+        vector of each row is kept, so that it can be removed again when the
+        row is edited or deleted.
+        """
+        vector = self.row_vector(model[itr])
+        self.tensor_rows.insert(path.get_indices()[0], vector)
+        if vector is not None:
+            self.tensor += np.outer(vector, vector)
+            self.tensor_count += 1
+
+    def tensor_row_changed(self, model, path, itr):
+        """
+        Replaces the contribution of an edited row in the orientation tensor.
+        """
+        key = path.get_indices()[0]
+        old_vector = self.tensor_rows[key]
+        new_vector = self.row_vector(model[itr])
+        if old_vector is not None:
+            self.tensor -= np.outer(old_vector, old_vector)
+            self.tensor_count -= 1
+        if new_vector is not None:
+            self.tensor += np.outer(new_vector, new_vector)
+            self.tensor_count += 1
+        self.tensor_rows[key] = new_vector
+
+    def tensor_row_deleted(self, model, path):
+        """
+        Removes a deleted row from the orientation tensor.
+        """
+        vector = self.tensor_rows.pop(path.get_indices()[0])
+        if vector is not None:
+            self.tensor -= np.outer(vector, vector)
+            self.tensor_count -= 1
+        if self.tensor_count == 0:
+            self.tensor = np.zeros((3, 3))
+
+    def rebuild_tensor(self, *args):
+        """
+        Calculates the orientation tensor from all rows of the layer.
+
+        Called when the rows are reordered and whenever the incremental
+        updates have to be replaced by a complete calculation.
+        """
+        self.tensor = np.zeros((3, 3))
+        self.tensor_count = 0
+        self.tensor_rows = []
+        for row in self.data_treestore:
+            vector = self.row_vector(row)
+            self.tensor_rows.append(vector)
+            if vector is not None:
+                self.tensor += np.outer(vector, vector)
+                self.tensor_count += 1
+
+    def wrap_columns(self, columns):
+        """
+        Wraps the angles of new features into their normal range.
+
+        Expects a list of columns and returns it with the dip-directions
+        wrapped into 0 to 360 degrees and the dips into 0 to 90 degrees.
+        Layer types that store other angles override this method.
+        """
+        columns[0] = vector_math.wrap_angles(columns[0], 360)
+        columns[1] = vector_math.wrap_angles(columns[1], 90)
+        return columns
+
+    def add_features(self, *columns):
+        """
+        Adds many features to the layer at once.
+
+        Expects one array-like for each column of the layer, starting with the
+        dip-directions and dips. Columns that are left out at the end are
+        filled with the defaults of the layer type. The angles are wrapped
+        with vectorized arithmetic and all rows are appended in one batch.
+        """
+        columns = [np.ravel(column) for column in columns]
+        count = len(columns[0])
+        for default in self.feature_defaults[len(columns):]:
+            columns.append(np.full(count, default))
+        self.append_rows(self.wrap_columns(columns))
+
+    def append_rows(self, columns):
+        """
+        Appends many rows to the data of the layer in one batch.
+
+        Expects a list with one array-like for each column of the
+        data-treestore. If the treestore does not exist yet, the rows are
+        collected as a chunk of the data arrays (see join_chunks). Otherwise
+        they are inserted with insert_rows. Afterwards the orientation tensor is updated with one
+        vectorized calculation and the data version is increased once. Data
+        that has not been loaded from the data source yet is loaded first, so
+        the new rows are appended after it.
+        """
+        self.load_data()
+        columns = [np.asarray(column) for column in columns]
+        count = len(columns[0])
+        if count == 0:
+            return
+
+        vectors = self.to_vectors(columns[0], columns[1])
+        if self.data_treestore is None:
+            self.data_chunks.append(columns)
+        else:
+            self.insert_rows(columns)
+            if vectors is None:
+                self.tensor_rows.extend([None] * count)
+            else:
+                self.tensor_rows.extend(vectors)
+
+        if vectors is not None:
+            self.tensor += np.dot(vectors.T, vectors)
+            self.tensor_count += count
+        self.data_changed()
+
+    def replace_rows(self, columns):
+        """
+        Replaces all rows of the layer in one batch.
+
+        Expects a list with one array-like for each column of the
+        data-treestore. The old rows are cleared with the signal handlers
+        blocked, and the new rows are added with append_rows, so the
+        orientation tensor is recalculated once instead of once per row. The
+        stored results of the old rows are removed.
+        """
+        self.load_data()
+        self.data_columns = None
+        self.data_chunks = []
+        if self.data_treestore is not None:
+            for handler in self.data_handlers:
+                self.data_treestore.handler_block(handler)
+            if self.data_treeview is not None:
+                self.data_treeview.set_model(None)
+            try:
+                self.data_treestore.clear()
+            finally:
+                if self.data_treeview is not None:
+                    self.data_treeview.set_model(self.data_treestore)
+                for handler in self.data_handlers:
+                    self.data_treestore.handler_unblock(handler)
+        self.tensor = np.zeros((3, 3))
+        self.tensor_count = 0
+        self.tensor_rows = []
+        self.clear_results()
+        self.data_changed()
+        self.append_rows(columns)
+
+    def get_orientation_tensor(self):
+        """
+        Returns the orientation tensor and the number of rows it contains.
+
+        The tensor is the sum of the outer products of the vectors of all
+        rows. Tensors of several layers can be added, and divided by the total
+        count to get the normalized tensor of the combined data.
+        """
+        self.load_data()
+        return self.tensor.copy(), self.tensor_count
+
+    def get_spatial_index(self):
+        """
+        Returns a KD-tree of the directions of the layer.
+
+        The tree holds the unit vectors of all rows and their antipodes, so
+        that directions close to the primitive circle are also found from the
+        opposite side. It is built when it is first needed and cached until
+        the data of the layer changes. Returns None for empty layers.
+        """
+        def build():
+            vectors = self.get_vectors()
+            if vectors is None or len(vectors) == 0:
+                return None
+            return spatial.cKDTree(np.concatenate((vectors, -vectors)))
+
+        return self.get_cached("spatial_index", build)
+
+    def find_nearest_row(self, vector):
+        """
+        Returns the row that is closest to a direction.
+
+        Expects a unit vector. Returns the row number and the angle in degrees
+        between the direction and the row. Returns None and None if the layer
+        has no directions.
+        """
+        tree = self.get_spatial_index()
+        if tree is None:
+            return None, None
+
+        distance, index = tree.query(vector)
+        angle = np.degrees(2 * np.arcsin(min(distance / 2, 1)))
+        return int(index % (len(tree.data) // 2)), angle
+
+    def get_statistics(self):
+        """
+        Returns the summary statistics of the layer.
+
+        The statistics are calculated at most once for each data version and
+        Fisher confidence. Returns the dictionary of
+        vector_math.fisher_statistics, extended by the eigenvectors of the
+        orientation tensor ("eigenvectors" as a tuple of dip-directions, dips
+        and eigenvalues). Layers without directions return None.
+        """
+        confidence = self.props["fisher_conf"]
+
+        def calculate():
+            vectors = self.get_vectors()
+            if vectors is None:
+                return None
+            stats = vector_math.fisher_statistics(vectors, confidence)
+            tensor, count = self.get_orientation_tensor()
+            if count > 0:
+                stats["eigenvectors"] = vector_math.tensor_eigenvectors(
+                                                            tensor, count)
+            else:
+                stats["eigenvectors"] = None
+            return stats
+
+        return self.get_cached(("statistics", confidence), calculate)
+
     def get_page(self):
         """
         Returns the current page
@@ -215,6 +890,9 @@ class PlaneLayer(object):
         This method returns the TreeStore that stores the data of this layer.
         The TreeStore contains all the individual features as rows.
         """
+        self.load_data()
+        if self.data_treestore is None:
+            self.create_store()
         return self.data_treestore
 
     def get_data_treeview(self):
@@ -223,8 +901,13 @@ class PlaneLayer(object):
 
         Each layer stores a TreeView that is linked to the layers' TreeStore.
         This method is called when the selection in the main windows' layer
-        view is changed.
+        view is changed. The TreeView is created the first time the layer is
+        selected.
         """
+        store = self.get_data_treestore()
+        if self.data_treeview is None:
+            self.data_treeview = self.create_view(store)
+            self.data_treeview.set_layer_object(self)
         return self.data_treeview
 
     def get_layer_type(self):
@@ -948,12 +1631,17 @@ class PlaneLayer(object):
         Returns the data in stored for this layer as a list.
 
         Iterates over the treestore associated with this layer and copies all
-        data into a list of rows. Returns the list.
+        data into a list of rows. Returns the list. If the treestore has not
+        been created yet, the rows are copied from the data arrays.
         """
+        self.load_data()
+        if self.data_treestore is None:
+            return [list(row) for row in self.get_rows()]
+
         store_data = []
         def iterate_over_data(model, path, itr):
             row = model[path]
-            store_data.append([row[0], row[1], row[2]])
+            store_data.append(row[:])
 
         self.data_treestore.foreach(iterate_over_data)
         return store_data
@@ -1075,34 +1763,30 @@ class FaultPlaneLayer(PlaneLayer):
     the PlaneLayer-class.
     """
 
-    def __init__(self, treestore, treeview):
+    column_types = (float, float, float, float, str)
+    feature_defaults = (0, 0, 0, 0, "")
+
+    def __init__(self, create_view):
         """
         Initializes the FaultPlaneLayer-class. Sets the type and label.
 
         The type is set to "faultplane" and the label is set to "Faultplane
-        layer". Requires a treestore and treeview to initialize.
+        layer". Requires the function that creates the data TreeView.
         """
-        PlaneLayer.__init__(self, treestore, treeview)
+        PlaneLayer.__init__(self, create_view)
         self.props["type"] = "faultplane"
         self.props["label"] = _("Faultplane Layer")
         self.props["line_color"] = "#000000"
         self.props["marker_fill"] = "#ffffff"
 
-    def return_data(self):
+    def wrap_columns(self, columns):
         """
-        Returns the data stored in a fautplane layer
+        Returns the columns unchanged.
 
-        Overrides the defualt 'return_data' method. Iterates over the
-        treestore associated with this layer and copies all
-        data into a list of rows. Returns the list.
+        Faultplanes are stored as they are entered, like single faultplanes
+        that are added by hand.
         """
-        store_data = []
-        def iterate_over_data(model, path, itr):
-            row = model[path]
-            store_data.append([row[0], row[1], row[2], row[3], row[4]])
-
-        self.data_treestore.foreach(iterate_over_data)
-        return store_data
+        return columns
 
 
 class LineLayer(PlaneLayer):
@@ -1111,26 +1795,35 @@ class LineLayer(PlaneLayer):
     The LineLayer class inherits from PlaneLayer but changes the type and label
 
     The LineLayer class only changes the layer-type to "line" and the label to
-    "Linear layer". For initialization it needs a treestore and treeview which
-    are passed to the PlaneLayer class. The class also overrides the get_pixbuf
-    method, because the colored square from the layer-view should reflect the
-    fill of the marker.
+    "Linear layer". For initialization it needs the function that creates the
+    data treeview, which is passed to the PlaneLayer class. The class also
+    overrides the get_pixbuf method, because the colored square from the
+    layer-view should reflect the fill of the marker.
     """
 
-    def __init__(self, treestore, treeview):
+    def __init__(self, create_view):
         """
         Initializes the LineLayer class with type = "line" and a label.
 
-        The initialization requires a treestore and treeview that hold the
-        data of the layer. They are passed to the PlaneLayer class. The
-        layer-type is set to line and the label to "Linear layer".
+        The initialization requires the function that creates the data
+        TreeView, which is passed to the PlaneLayer class. The layer-type is
+        set to line and the label to "Linear layer".
         """
-        PlaneLayer.__init__(self, treestore, treeview)
+        PlaneLayer.__init__(self, create_view)
         self.props["type"] = "line"
         self.props["label"] = _("Linear Layer")
         self.props["page"] = 1
         self.props["marker_fill"] = "#69b3ff"
 
+    def to_vectors(self, dipdir, dip):
+        """
+        Converts the first two columns of the layer into unit vectors.
+
+        Overrides the PlaneLayer method, because the linears themselves are
+        used.
+        """
+        return vector_math.line_to_vector(dipdir, dip)
+
     def get_pixbuf(self):
         """
         This returns the pixbuf-color to be used for the squares in layer-view.
@@ -1154,22 +1847,34 @@ class EigenVectorLayer(PlaneLayer):
     This class is used for the results of eigenvector calculations
 
     It inherits from the PlaneLayer class and defines a new type and label.
-    On init it expects a treestore and treeview that are passed to the
-    PlaneLayer class.
+    On init it expects the function that creates the data treeview, which is
+    passed to the PlaneLayer class.
     """
 
-    def __init__(self, treestore, treeview):
+    column_types = (float, float, float)
+    feature_defaults = (0, 0, 0)
+
+    def __init__(self, create_view):
         """
         Initializes the EigenVectorLayer class.
 
-        Expects a treestore and treeview that are passed to the PlaneLayer
-        class. Overrides the self.type and self.label of the PlaneLayer class.
+        Expects the function that creates the data TreeView, which is passed
+        to the PlaneLayer class. Overrides the self.type and self.label of the
+        PlaneLayer class.
         """
-        PlaneLayer.__init__(self, treestore, treeview)
+        PlaneLayer.__init__(self, create_view)
         self.props["type"] = "eigenvector"
         self.props["label"] = _("Eigenvector Layer")
         self.props["page"] = 1
 
+    def to_vectors(self, dipdir, dip):
+        """
+        Converts the first two columns of the layer into unit vectors.
+
+        Eigenvectors are linears, so the linears themselves are used.
+        """
+        return vector_math.line_to_vector(dipdir, dip)
+
     def get_pixbuf(self):
         """
         Returns the pixbuf for eigenvectors, which is based on the marker fill.
@@ -1195,15 +1900,259 @@ class SmallCircleLayer(PlaneLayer):
     class.
     """
 
-    def __init__(self, treestore, treeview):
+    column_types = (float, float, float)
+    feature_defaults = (0, 0, 10)
+
+    def __init__(self, create_view):
         """
         Initializes the SmallCircleLayer-class.
 
-        Expects a TreeStore and TreeView that are passed to the PlaneLayer-
-        class. The layer type is set to "smallcircle" and the label is set
-        to "Small circle layer".
+        Expects the function that creates the data TreeView, which is passed
+        to the PlaneLayer-class. The layer type is set to "smallcircle" and
+        the label is set to "Small circle layer".
         """
-        PlaneLayer.__init__(self, treestore, treeview)
+        PlaneLayer.__init__(self, create_view)
         self.props["type"] = "smallcircle"
         self.props["label"] = _("Small-Circle Layer")
 
+    def to_vectors(self, dipdir, dip):
+        """
+        Small circles have no directions. Always returns None.
+        """
+        return None
+
+    def wrap_columns(self, columns):
+        """
+        Returns the columns unchanged.
+
+        Small circles are stored as they are entered, like single small
+        circles that are added by hand.
+        """
+        return columns
+
+
+class MappedLayer(object):
+
+    """
+    This class adds memory-mapped data to the plane and linear layers.
+
+    The columns of a mapped layer are read from a .npy file that is opened
+    with numpy.load in mmap_mode, so the data is never copied into the
+    memory. The statistics, the orientation tensor, the histograms of the
+    rose diagrams and the density contours are reduced over all rows in
+    chunks. Everything that works on single rows (drawing the features, the
+    data view, the nearest feature and the calculation tools) uses a
+    level-of-detail sample of evenly spaced rows. Mapped layers can not be
+    edited. The file name is stored in the "mapped_file" property, so it is
+    saved with the project. This class is combined with the PlaneLayer and
+    LineLayer classes by the MappedPlaneLayer and MappedLineLayer classes.
+    """
+
+    def map_file(self, filename):
+        """
+        Opens the file that holds the data of the layer.
+
+        Raises an OSError if the file can not be read and a ValueError if it
+        does not hold the columns of a layer.
+        """
+        self.mapped_columns = mapped_data.open_columns(filename)
+        self.props["mapped_file"] = filename
+
+    def is_mapped(self):
+        """
+        Returns True, because the data of the layer is mapped from a file.
+        """
+        return True
+
+    def complete_columns(self, columns):
+        """
+        Completes columns that were read from the file.
+
+        Columns that are not stored in the file, or numeric columns where
+        the layer stores text, are filled with the defaults of the layer
+        type. The angles are wrapped like the angles of features that are
+        added to other layers.
+        """
+        completed = []
+        for column, column_type in zip(columns, self.column_types):
+            if column_type is str and column.dtype.kind not in "US":
+                break
+            completed.append(column)
+        for default in self.feature_defaults[len(completed):]:
+            completed.append(np.full(len(columns[0]), default))
+        return self.wrap_columns(completed)
+
+    def iter_chunks(self, rows=mapped_data.CHUNK_ROWS):
+        """
+        Iterates over all rows of the file in chunks of completed columns.
+        """
+        for chunk in mapped_data.iter_chunks(self.mapped_columns, rows):
+            yield self.complete_columns(chunk)
+
+    def get_row_count(self):
+        """
+        Returns the number of rows in the file.
+        """
+        return len(self.mapped_columns[0])
+
+    def get_columns(self):
+        """
+        Returns the columns of the level-of-detail sample of the layer.
+
+        The sample is completed like the chunks of the file and cached.
+        Returns None if the file has no rows.
+        """
+        def calculate():
+            rows = mapped_data.sample_rows(self.get_row_count())
+            return self.complete_columns([np.asarray(column[rows])
+                                          for column in self.mapped_columns])
+
+        if self.get_row_count() == 0:
+            return None
+        return self.get_cached("sample", calculate)
+
+    def get_rows(self):
+        """
+        Returns the rows of the level-of-detail sample.
+        """
+        columns = self.get_columns()
+        if columns is None:
+            return []
+        return list(zip(*[column.tolist() for column in columns]))
+
+    def get_row(self, key):
+        """
+        Returns the values of one row of the level-of-detail sample.
+        """
+        return [column[key] for column in self.get_columns()]
+
+    def create_store(self):
+        """
+        Creates a treestore that shows the level-of-detail sample.
+
+        No signals are connected, because the data of a mapped layer does not
+        change.
+        """
+        self.data_treestore = Gtk.ListStore(*self.column_types)
+        columns = self.get_columns()
+        if columns is not None:
+            self.insert_rows(columns)
+
+    def get_data_treeview(self):
+        """
+        Returns the TreeView of the layer, in which no cell can be edited.
+        """
+        if self.data_treeview is None:
+            view = PlaneLayer.get_data_treeview(self)
+            for column in view.get_columns():
+                for cell in column.get_cells():
+                    cell.set_property("editable", False)
+        return self.data_treeview
+
+    def get_vector_sums(self):
+        """
+        Returns the resultant, orientation tensor and count of all rows.
+
+        The sums are reduced over the file in chunks and cached.
+        """
+        return self.get_cached("vector_sums",
+                    lambda: mapped_data.vector_sums(self.iter_chunks(),
+                                                    self.to_vectors))
+
+    def get_orientation_tensor(self):
+        """
+        Returns the orientation tensor of all rows and their number.
+        """
+        resultant, tensor, count = self.get_vector_sums()
+        return tensor.copy(), count
+
+    def get_statistics(self):
+        """
+        Returns the summary statistics of all rows of the file.
+
+        Returns the same dictionary as the PlaneLayer method, calculated from
+        the sums of the vectors instead of the vectors themselves.
+        """
+        confidence = self.props["fisher_conf"]
+
+        def calculate():
+            resultant, tensor, count = self.get_vector_sums()
+            stats = vector_math.resultant_statistics(resultant, count,
+                                                     confidence)
+            if count > 0:
+                stats["eigenvectors"] = vector_math.tensor_eigenvectors(
+                                                            tensor, count)
+            else:
+                stats["eigenvectors"] = None
+            return stats
+
+        return self.get_cached(("statistics", confidence), calculate)
+
+    def get_histogram(self, column, bins, limits):
+        """
+        Returns a histogram of one column of all rows of the file.
+        """
+        return self.get_cached(("histogram", column, bins, limits),
+                    lambda: mapped_data.chunked_histogram(self.iter_chunks(),
+                                                          column, bins,
+                                                          limits))
+
+    def get_density_grid(self):
+        """
+        Returns the density grid of all rows of the file.
+
+        A stored grid is returned first. Otherwise the grid is calculated in
+        chunks for the contour method, resolution and sigma of the layer, but
+        only if contours are drawn, and cached.
+        """
+        grid = super().get_density_grid()
+        if grid is not None:
+            return grid
+        if not (self.get_draw_contour_fills() or
+                self.get_draw_contour_lines()):
+            return None
+
+        method = self.get_contour_method()
+        gridsize = self.get_contour_resolution()
+        sigma = self.get_contour_sigma()
+        return self.get_cached(("density", method, gridsize, sigma),
+                    lambda: mapped_data.density_grid(self.iter_chunks(),
+                                                     self.to_vectors,
+                                                     gridsize, sigma,
+                                                     method=method))
+
+
+class MappedPlaneLayer(MappedLayer, PlaneLayer):
+
+    """
+    A plane layer whose data is mapped from a .npy file.
+    """
+
+    def __init__(self, create_view, filename):
+        """
+        Initializes the layer and maps the file.
+
+        Expects the function that creates the data TreeView and the name of
+        the file. The label is set to the name of the file.
+        """
+        PlaneLayer.__init__(self, create_view)
+        self.map_file(filename)
+        self.props["label"] = os.path.basename(filename)
+
+
+class MappedLineLayer(MappedLayer, LineLayer):
+
+    """
+    A linear layer whose data is mapped from a .npy file.
+    """
+
+    def __init__(self, create_view, filename):
+        """
+        Initializes the layer and maps the file.
+
+        Expects the function that creates the data TreeView and the name of
+        the file. The label is set to the name of the file.
+        """
+        LineLayer.__init__(self, create_view)
+        self.map_file(filename)
+        self.props["label"] = os.path.basename(filename)
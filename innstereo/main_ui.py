@@ -23,10 +23,10 @@ import numpy as np
 import scipy.spatial as spatial
 import webbrowser
 import os, sys
-import csv
 from matplotlib.lines import Line2D
 import json
 from collections import OrderedDict
+from functools import partial
 
 #Internal imports
 from .dataview_classes import (PlaneDataView, LineDataView,
@@ -34,17 +34,27 @@ from .dataview_classes import (PlaneDataView, LineDataView,
                               EigenVectorView)
 from .layer_view import LayerTreeView
 from .layer_types import (PlaneLayer, FaultPlaneLayer, LineLayer,
-                         SmallCircleLayer, EigenVectorLayer)
+                         SmallCircleLayer, EigenVectorLayer,
+                         MappedPlaneLayer, MappedLineLayer)
 from .dialog_windows import (AboutDialog, StereonetProperties,
                             FileChooserParse, FileChooserExport,
-                            FileChooserSave, FileChooserOpen)
+                            FileChooserSave, FileChooserOpen,
+                            DuplicateDialog, KinematicDialog, FabricDialog,
+                            ProgressDialog)
 from .layer_properties import LayerProperties
 from .plot_control import PlotSettings
 from .polar_axes import NorthPolarAxes
 from .file_parser import FileParseDialog
+from .import_worker import ImportWorker, CHUNK_ROWS
+from . import project_archive
+from . import json_stream
+from . import data_export
+from .mapped_data import MAPPED_EXTENSION
 from .rotation_dialog import RotationDialog
 from .viridis import viridis
 from .settings import AppSettings
+from . import vector_math
+from . import orientation_statistics
 
 from .i18n import i18n, translate_gui
 
@@ -127,6 +137,15 @@ class MainWindow(object):
 
         #Set up event-handlers
         self.set_up_fisher_menu()
+        self.set_up_bootstrap_menu()
+        self.set_up_cluster_menu()
+        self.set_up_duplicate_menu()
+        self.set_up_beta_menu()
+        self.set_up_kinematic_menu()
+        self.set_up_dihedra_menu()
+        self.set_up_stress_menu()
+        self.set_up_small_circle_menu()
+        self.set_up_fabric_menu()
         self.canvas.mpl_connect('motion_notify_event', 
             self.mpl_motion_event)
         self.canvas.mpl_connect('button_press_event',
@@ -184,16 +203,15 @@ class MainWindow(object):
             total_dip = []
             for row in row_list:
                 lyr_obj = model[row][3]
-                store = lyr_obj.get_data_treestore()
-                dipdir, dip, sense = self.parse_lines(store)
+                dipdir, dip, sense = self.parse_lines(lyr_obj.get_rows())
                 for x, y in zip(dipdir, dip):
                     total_dipdir.append(x)
                     total_dip.append(y)
 
             vector, stats = mplstereonet.find_fisher_stats(total_dip, total_dipdir, conf=confidence)
-            new_store, new_lyr_obj = self.add_layer_dataset("smallcircle")
+            new_lyr_obj = self.add_layer_object("smallcircle")
             new_lyr_obj.set_label("Fisher Confidence: {} %".format(confidence))
-            self.add_linear_feature(new_store, vector[1], vector[0], stats[1])
+            new_lyr_obj.add_features([vector[1]], [vector[0]], [stats[1]])
 
             self.redraw_plot()
 
@@ -223,6 +241,759 @@ class MainWindow(object):
         btn_calc.connect("clicked", add_fisher_confidence, entry_conf, tb_fisher, pom_fisher)
         tb_fisher.connect("clicked", on_click, pom_fisher)
 
+    def set_up_bootstrap_menu(self):
+        """
+        Sets up and handles the signal of the bootstrap confidence popover.
+
+        The popover contains entries for the number of resamples and the
+        confidence, and comboboxes to choose between eigenvectors and the mean
+        vector, and between confidence cones and contoured resamples. The
+        cones are added as a smallcircle layer, the resamples as one linear
+        layer for each direction, which is drawn as contour lines.
+        """
+        def add_bootstrap_confidence():
+            """
+            Calculates the bootstrap confidence regions.
+
+            Collects the directions of all selected layers (including the
+            layers in selected folders). Eigenvectors can be calculated for
+            plane or linear layers, the mean vector only for linear layers.
+            """
+            selection = self.layer_view.get_selection()
+            model, row_list = selection.get_selected_rows()
+            layers = self.get_selected_layers(model, row_list)
+
+            if len(layers) == 0:
+                return
+
+            try:
+                samples = int(entry_samples.get_text())
+                confidence = float(entry_conf.get_text())
+            except ValueError:
+                self.statbar.push(1, _("Please enter valid numbers!"))
+                return
+            if samples < 1 or not 0 < confidence <= 100:
+                self.statbar.push(1, _("Please enter at least one resample "
+                                       "and a confidence between 0 and 100!"))
+                return
+
+            layer_types = [lyr_obj.get_layer_type() for lyr_obj in layers]
+            result = combo_result.get_active_id()
+            if result == "mean" and layer_types.count("line") != len(layers):
+                self.statbar.push(1, _("Please select only line layers!"))
+                return
+            if layer_types.count(layer_types[0]) != len(layers) or \
+                    layer_types[0] not in ["plane", "line"]:
+                self.statbar.push(1,
+                            _("Please select only plane or line layers!"))
+                return
+
+            vectors = np.concatenate([lyr_obj.get_vectors()
+                                      for lyr_obj in layers])
+            if len(vectors) < 2:
+                return
+
+            if result == "mean":
+                center, cone, resampled = (
+                    orientation_statistics.bootstrap_mean_vector(
+                                        vectors, samples, confidence))
+                centers = [center]
+                cones = [cone]
+                clouds = [resampled]
+                labels = [_("Mean Vector")]
+            else:
+                centers, cones, resampled = (
+                    orientation_statistics.bootstrap_eigenvectors(
+                                        vectors, samples, confidence))
+                clouds = [resampled[:, k] for k in range(3)]
+                labels = ["E1", "E2", "E3"]
+
+            if combo_output.get_active_id() == "cones":
+                lyr_obj = self.add_layer_object("smallcircle")
+                lyr_obj.set_label(_("Bootstrap Confidence: {} %").format(
+                                                                confidence))
+                dipdir, dip = vector_math.vector_to_line(centers)
+                lyr_obj.add_features(dipdir, dip, cones)
+            else:
+                for label, cloud in zip(labels, clouds):
+                    lyr_obj = self.add_layer_object("line")
+                    lyr_obj.set_label(_("Bootstrap {}").format(label))
+                    lyr_obj.set_draw_linears(False)
+                    lyr_obj.set_draw_contour_lines(True)
+                    lyr_obj.add_features(*vector_math.vector_to_line(cloud))
+
+            self.redraw_plot()
+
+        entry_samples = Gtk.Entry(width_chars=5, max_width_chars=5,
+                                  text="1000")
+        entry_conf = Gtk.Entry(width_chars=3, max_width_chars=3, text="95")
+        combo_result = Gtk.ComboBoxText()
+        combo_result.append("eigenvectors", _("Eigenvectors"))
+        combo_result.append("mean", _("Mean Vector"))
+        combo_result.set_active_id("eigenvectors")
+        combo_output = Gtk.ComboBoxText()
+        combo_output.append("cones", _("Confidence Cones"))
+        combo_output.append("contours", _("Contoured Resamples"))
+        combo_output.set_active_id("cones")
+
+        self.set_up_tool_popover("toolbutton_bootstrap",
+                                 [(_("Resamples"), entry_samples),
+                                  (_("Confidence"), entry_conf),
+                                  (_("Direction"), combo_result),
+                                  (_("Result"), combo_output)],
+                                 add_bootstrap_confidence)
+
+    def set_up_cluster_menu(self):
+        """
+        Sets up and handles the signal of the set-clustering popover.
+
+        The popover contains entries for the number of sets and the number of
+        random restarts. The selected plane or linear layers are divided into
+        sets by spherical k-means clustering, and each set is added as a new
+        layer of the same type.
+        """
+        def add_cluster_sets():
+            """
+            Clusters the selected layers and adds one layer for each set.
+
+            Collects the columns and directions of all selected layers
+            (including the layers in selected folders). The directions are
+            treated as axes, so that poles or linears on opposite sides of the
+            stereonet belong to the same set. The rows of each set are added
+            to its layer in one batch.
+            """
+            selection = self.layer_view.get_selection()
+            model, row_list = selection.get_selected_rows()
+            layers = self.get_selected_layers(model, row_list)
+
+            if len(layers) == 0:
+                return
+
+            try:
+                sets = int(entry_sets.get_text())
+                restarts = int(entry_restarts.get_text())
+            except ValueError:
+                self.statbar.push(1, _("Please enter valid numbers!"))
+                return
+
+            layer_types = [lyr_obj.get_layer_type() for lyr_obj in layers]
+            if layer_types.count(layer_types[0]) != len(layers) or \
+                    layer_types[0] not in ["plane", "line"]:
+                self.statbar.push(1,
+                            _("Please select only plane or line layers!"))
+                return
+
+            columns = [lyr_obj.get_columns() for lyr_obj in layers]
+            columns = [np.concatenate(parts) for parts in
+                       zip(*[c for c in columns if c is not None])]
+            vectors = np.concatenate([lyr_obj.get_vectors()
+                                      for lyr_obj in layers])
+            if sets < 1 or len(vectors) < sets:
+                self.statbar.push(1, _("Not enough data for {} sets!").format(
+                                                                        sets))
+                return
+
+            centers, labels = orientation_statistics.cluster_sets(vectors,
+                                                    sets, max(1, restarts))
+            if layer_types[0] == "plane":
+                center_dir, center_dip = vector_math.vector_to_plane(centers)
+            else:
+                center_dir, center_dip = vector_math.vector_to_line(centers)
+
+            for k in range(sets):
+                lyr_obj = self.add_layer_object(layer_types[0])
+                lyr_obj.set_label(_("Set {0} ({1:03.0f}/{2:02.0f})").format(
+                                        k + 1, center_dir[k], center_dip[k]))
+                color = self.settings.get_set_color(k)
+                lyr_obj.set_line_color(color)
+                lyr_obj.set_pole_fill(color)
+                lyr_obj.set_marker_fill(color)
+                lyr_obj.add_features(*[column[labels == k]
+                                       for column in columns])
+            self.redraw_plot()
+
+        entry_sets = Gtk.Entry(width_chars=3, max_width_chars=3, text="3")
+        entry_restarts = Gtk.Entry(width_chars=3, max_width_chars=3, text="8")
+        self.set_up_tool_popover("toolbutton_cluster",
+                                 [(_("Number of Sets"), entry_sets),
+                                  (_("Random Restarts"), entry_restarts)],
+                                 add_cluster_sets)
+
+    def set_up_beta_menu(self):
+        """
+        Sets up and handles the signal of the beta-diagram popover.
+
+        The popover contains an entry for the number of intersections that
+        are added as linears, and a combobox to choose between contouring
+        all intersections and contouring only these samples. The result is
+        added as a new linear layer.
+        """
+        def add_beta_diagram():
+            """
+            Calculates the intersections of all selected planes.
+
+            Collects the poles of all selected plane and faultplane layers
+            (including the layers in selected folders). The density of all
+            pairwise intersections is calculated in batches, so it is never
+            necessary to hold all of them in memory.
+            """
+            selection = self.layer_view.get_selection()
+            model, row_list = selection.get_selected_rows()
+            layers = self.get_selected_layers(model, row_list)
+
+            if len(layers) == 0:
+                return
+
+            try:
+                samples = int(entry_samples.get_text())
+            except ValueError:
+                self.statbar.push(1, _("Please enter valid numbers!"))
+                return
+
+            for lyr_obj in layers:
+                if lyr_obj.get_layer_type() not in ["plane", "faultplane"]:
+                    self.statbar.push(1, _("Please select only plane or "
+                                           "faultplane layers!"))
+                    return
+
+            vectors = np.concatenate([lyr_obj.get_vectors()
+                                      for lyr_obj in layers])
+            if len(vectors) < 2:
+                return
+
+            lines = orientation_statistics.sample_intersections(vectors,
+                                                            max(0, samples))
+            lyr_obj = self.add_layer_object("line")
+            lyr_obj.set_label(_("Beta Diagram"))
+            lyr_obj.set_draw_linears(False)
+            lyr_obj.set_draw_contour_fills(True)
+            lyr_obj.add_features(*vector_math.vector_to_line(lines))
+
+            if combo_output.get_active_id() == "all":
+                density, count = orientation_statistics.beta_density(
+                                vectors, lyr_obj.get_contour_resolution(),
+                                lyr_obj.get_contour_sigma())[2:]
+                lyr_obj.set_density_grid(density)
+                self.statbar.push(1, _("{} intersections contoured.").format(
+                                                                    count))
+            self.redraw_plot()
+
+        entry_samples = Gtk.Entry(width_chars=5, max_width_chars=5,
+                                  text="2000")
+        combo_output = Gtk.ComboBoxText()
+        combo_output.append("all", _("All Intersections"))
+        combo_output.append("samples", _("Sampled Intersections"))
+        combo_output.set_active_id("all")
+        self.set_up_tool_popover("toolbutton_beta",
+                                 [(_("Sampled Intersections"), entry_samples),
+                                  (_("Contours"), combo_output)],
+                                 add_beta_diagram)
+
+    def set_up_kinematic_menu(self):
+        """
+        Sets up and handles the signal of the kinematic-analysis popover.
+
+        The popover contains entries for the dip-direction and dip of the
+        slope face, the friction angle and the lateral limit. The selected
+        plane and faultplane layers are tested for planar sliding, flexural
+        toppling and wedge sliding, and the results are shown in a dialog.
+        """
+        def run_kinematic_analysis():
+            """
+            Tests the selected planes and shows the results.
+
+            Collects the poles of all selected layers (including the layers
+            in selected folders). Wedges are formed by all pairs of planes,
+            also across layers. The critical rows of each layer are stored as
+            sets, so they can be passed to plot_layer as subsets.
+            """
+            selection = self.layer_view.get_selection()
+            model, row_list = selection.get_selected_rows()
+            layers = self.get_selected_layers(model, row_list)
+
+            if len(layers) == 0:
+                return
+
+            try:
+                slope_dipdir = float(entry_dipdir.get_text())
+                slope_dip = float(entry_dip.get_text())
+                friction = float(entry_friction.get_text())
+                lateral = float(entry_lateral.get_text())
+            except ValueError:
+                self.statbar.push(1, _("Please enter valid numbers!"))
+                return
+
+            for lyr_obj in layers:
+                if lyr_obj.get_layer_type() not in ["plane", "faultplane"]:
+                    self.statbar.push(1, _("Please select only plane or "
+                                           "faultplane layers!"))
+                    return
+
+            vectors = np.concatenate([lyr_obj.get_vectors()
+                                      for lyr_obj in layers])
+            if len(vectors) == 0:
+                return
+
+            dipdir, dip = vector_math.vector_to_plane(vectors)
+            planar = vector_math.planar_sliding(dipdir, dip, slope_dipdir,
+                                            slope_dip, friction, lateral)
+            toppling = vector_math.flexural_toppling(dipdir, dip,
+                                slope_dipdir, slope_dip, friction, lateral)
+            wedge_counts, wedges, pairs = (
+                orientation_statistics.wedge_analysis(vectors, slope_dipdir,
+                                                      slope_dip, friction))
+
+            subsets = {}
+            offsets = np.cumsum([0] + [len(lyr_obj.get_vectors())
+                                       for lyr_obj in layers])
+            for mode, critical in [("planar", planar),
+                                   ("toppling", toppling),
+                                   ("wedge", wedge_counts > 0)]:
+                subsets[mode] = [set(np.flatnonzero(
+                                        critical[start:stop]).tolist())
+                                 for start, stop in zip(offsets[:-1],
+                                                        offsets[1:])]
+
+            def highlight_mode(mode):
+                """
+                Redraws the plot and highlights the critical planes.
+
+                The slope face and the friction cone are drawn for reference.
+                """
+                self.redraw_plot()
+                self.ax_stereo.plane(slope_dipdir - 90, slope_dip,
+                                     color="#000000", linewidth=2,
+                                     label=_("Slope Face"))
+                self.ax_stereo.cone(90, 0, 90 - friction, facecolor="None",
+                                    edgecolor="#000000", linestyle="dashed",
+                                    label=_("Friction Angle"))
+                for lyr_obj, subset in zip(layers, subsets[mode]):
+                    if len(subset) > 0:
+                        self.plot_layer(lyr_obj, subset, highlight=True)
+                self.canvas.draw()
+
+            results = [("planar", _("Planar Sliding"), int(np.sum(planar)),
+                        len(vectors)),
+                       ("toppling", _("Flexural Toppling"),
+                        int(np.sum(toppling)), len(vectors)),
+                       ("wedge", _("Wedge Sliding"), wedges, pairs)]
+            dialog = KinematicDialog(self.main_window, results,
+                                     highlight_mode)
+            dialog.run()
+            self.redraw_plot()
+
+        entry_dipdir = Gtk.Entry(width_chars=3, max_width_chars=3,
+                                 text="180")
+        entry_dip = Gtk.Entry(width_chars=3, max_width_chars=3, text="60")
+        entry_friction = Gtk.Entry(width_chars=3, max_width_chars=3,
+                                   text="30")
+        entry_lateral = Gtk.Entry(width_chars=3, max_width_chars=3,
+                                  text="20")
+        self.set_up_tool_popover("toolbutton_kinematic",
+                                 [(_("Slope Dip-Direction"), entry_dipdir),
+                                  (_("Slope Dip"), entry_dip),
+                                  (_("Friction Angle"), entry_friction),
+                                  (_("Lateral Limit"), entry_lateral)],
+                                 run_kinematic_analysis)
+
+    def set_up_dihedra_menu(self):
+        """
+        Sets up and handles the signal of the right-dihedra popover.
+
+        The popover contains an entry for the resolution of the grid. One
+        faultplane layer has to be selected. The percentage of faults that
+        put each grid node into their compressional dihedra is added as the
+        density grid of a new linear layer, which is drawn as filled contours.
+        """
+        def add_right_dihedra():
+            """
+            Calculates the right-dihedra diagram of the selected faultplanes.
+
+            Faults without a sense of movement are skipped.
+            """
+            selection = self.layer_view.get_selection()
+            model, row_list = selection.get_selected_rows()
+
+            if len(row_list) != 1:
+                self.statbar.push(1, _("Please select one faultplane layer!"))
+                return
+
+            lyr_obj = model[row_list[0]][3]
+            if lyr_obj is None or \
+                    lyr_obj.get_layer_type() != "faultplane":
+                self.statbar.push(1, _("Please select one faultplane layer!"))
+                return
+
+            try:
+                gridsize = int(entry_grid.get_text())
+            except ValueError:
+                self.statbar.push(1, _("Please enter valid numbers!"))
+                return
+
+            data = lyr_obj.return_data()
+            if len(data) == 0 or gridsize < 2:
+                return
+
+            plane_dir, plane_dip, line_dir, line_dip, sense = zip(*data)
+            normal, slip, valid = vector_math.fault_slip_vectors(plane_dir,
+                                        plane_dip, line_dir, line_dip, sense)
+            if np.count_nonzero(valid) == 0:
+                self.statbar.push(1, _("No faults with a sense of movement!"))
+                return
+
+            percentage = orientation_statistics.right_dihedra(
+                                    normal[valid], slip[valid], gridsize)[2]
+            new_lyr_obj = self.add_layer_object("line")
+            new_lyr_obj.set_label(_("Right Dihedra"))
+            new_lyr_obj.set_draw_linears(False)
+            new_lyr_obj.set_draw_contour_fills(True)
+            new_lyr_obj.set_density_grid(percentage)
+            self.redraw_plot()
+
+        entry_grid = Gtk.Entry(width_chars=4, max_width_chars=4, text="100")
+        self.set_up_tool_popover("toolbutton_dihedra",
+                                 [(_("Grid Resolution"), entry_grid)],
+                                 add_right_dihedra)
+
+    def set_up_stress_menu(self):
+        """
+        Sets up and handles the signal of the stress-inversion popover.
+
+        The popover contains an entry for the spacing of the search grid. One
+        faultplane layer has to be selected. The principal axes of the best
+        reduced stress tensor are added as a new eigenvector layer, and the
+        misfit angles of the faults are drawn into the fluctuation histogram
+        of the paleostress view.
+        """
+        def add_stress_inversion():
+            """
+            Inverts the selected faultplanes for the reduced stress tensor.
+
+            Faults without a sense of movement are skipped.
+            """
+            selection = self.layer_view.get_selection()
+            model, row_list = selection.get_selected_rows()
+
+            if len(row_list) != 1:
+                self.statbar.push(1, _("Please select one faultplane layer!"))
+                return
+
+            lyr_obj = model[row_list[0]][3]
+            if lyr_obj is None or \
+                    lyr_obj.get_layer_type() != "faultplane":
+                self.statbar.push(1, _("Please select one faultplane layer!"))
+                return
+
+            try:
+                spacing = float(entry_spacing.get_text())
+            except ValueError:
+                self.statbar.push(1, _("Please enter valid numbers!"))
+                return
+
+            data = lyr_obj.return_data()
+            if len(data) == 0 or spacing <= 0:
+                return
+
+            plane_dir, plane_dip, line_dir, line_dip, sense = zip(*data)
+            normal, slip, valid = vector_math.fault_slip_vectors(plane_dir,
+                                        plane_dip, line_dir, line_dip, sense)
+            if np.count_nonzero(valid) == 0:
+                self.statbar.push(1, _("No faults with a sense of movement!"))
+                return
+
+            result = orientation_statistics.stress_inversion(normal[valid],
+                                                        slip[valid], spacing)
+            new_lyr_obj = self.add_layer_object("eigenvector")
+            new_lyr_obj.set_label(_("Stress Inversion (R = {:.2f})").format(
+                                                            result["ratio"]))
+            dipdir, dip = vector_math.vector_to_line(result["axes"])
+            new_lyr_obj.add_features(dipdir, dip, [1, result["ratio"], 0])
+            new_lyr_obj.set_stress_inversion(result)
+            self.statbar.push(1, _("Mean misfit: {:.1f}°").format(
+                                                np.mean(result["misfits"])))
+            self.redraw_plot()
+
+        entry_spacing = Gtk.Entry(width_chars=3, max_width_chars=3, text="10")
+        self.set_up_tool_popover("toolbutton_stress",
+                                 [(_("Grid Spacing (°)"), entry_spacing)],
+                                 add_stress_inversion)
+
+    def set_up_small_circle_menu(self):
+        """
+        Sets up and handles the signal of the small-circle fitting popover.
+
+        The popover contains an entry for the number of starts of the
+        optimization. The best-fit small circle of the selected layers is
+        added as a new smallcircle layer. This is used for conical folds.
+        """
+        def add_small_circle():
+            """
+            Fits a small circle to the selected plane or linear layers.
+
+            Collects the directions of all selected layers (including the
+            layers in selected folders). Planes are represented by their
+            poles.
+            """
+            selection = self.layer_view.get_selection()
+            model, row_list = selection.get_selected_rows()
+            layers = self.get_selected_layers(model, row_list)
+
+            if len(layers) == 0:
+                return
+
+            try:
+                starts = int(entry_starts.get_text())
+            except ValueError:
+                self.statbar.push(1, _("Please enter valid numbers!"))
+                return
+
+            for lyr_obj in layers:
+                if lyr_obj.get_layer_type() not in ["plane", "faultplane",
+                                                    "line"]:
+                    self.statbar.push(1,
+                                _("Please select only plane or line layers!"))
+                    return
+
+            vectors = np.concatenate([lyr_obj.get_vectors()
+                                      for lyr_obj in layers])
+            if len(vectors) < 3:
+                return
+
+            axis, angle, misfit = orientation_statistics.fit_small_circle(
+                                                        vectors, starts)
+            dipdir, dip = vector_math.vector_to_line(axis)
+            lyr_obj = self.add_layer_object("smallcircle")
+            lyr_obj.set_label(_("Best-Fit Small Circle"))
+            lyr_obj.add_features(dipdir, dip, [angle])
+            self.statbar.push(1, _("Axis: {0:03.0f}/{1:02.0f}, opening "
+                                   "angle: {2:.1f}°, misfit: {3:.1f}°")
+                              .format(dipdir[0], dip[0], angle, misfit))
+            self.redraw_plot()
+
+        entry_starts = Gtk.Entry(width_chars=3, max_width_chars=3, text="8")
+        self.set_up_tool_popover("toolbutton_small_circle",
+                                 [(_("Starts"), entry_starts)],
+                                 add_small_circle)
+
+    def set_up_fabric_menu(self):
+        """
+        Sets up and handles the signal of the fabric-statistics popover.
+
+        The popover contains an entry for the number of Monte Carlo
+        simulations. The fabric shape and uniformity statistics of each
+        selected plane or linear layer are shown in a dialog.
+        """
+        def show_fabric_statistics():
+            """
+            Calculates the statistics of the selected layers.
+
+            Each selected layer (including the layers in selected folders)
+            gets one row. If more than one layer is selected, the combined
+            data of all layers gets an additional row.
+            """
+            selection = self.layer_view.get_selection()
+            model, row_list = selection.get_selected_rows()
+            layers = self.get_selected_layers(model, row_list)
+
+            if len(layers) == 0:
+                return
+
+            try:
+                simulations = int(entry_simulations.get_text())
+            except ValueError:
+                self.statbar.push(1, _("Please enter valid numbers!"))
+                return
+
+            for lyr_obj in layers:
+                if lyr_obj.get_layer_type() not in ["plane", "faultplane",
+                                                    "line"]:
+                    self.statbar.push(1,
+                                _("Please select only plane or line layers!"))
+                    return
+
+            datasets = [(lyr_obj.get_label(), lyr_obj.get_vectors())
+                        for lyr_obj in layers]
+            if len(datasets) > 1:
+                datasets.append((_("All Selected"), np.concatenate(
+                                    [vectors for label, vectors in datasets])))
+
+            results = [(label, orientation_statistics.uniformity_tests(
+                                                    vectors, simulations))
+                       for label, vectors in datasets]
+            dialog = FabricDialog(self.main_window, results)
+            dialog.run()
+
+        entry_simulations = Gtk.Entry(width_chars=5, max_width_chars=5,
+                                      text="10000")
+        self.set_up_tool_popover("toolbutton_fabric",
+                                 [(_("Simulations"), entry_simulations)],
+                                 show_fabric_statistics)
+
+    def set_up_duplicate_menu(self):
+        """
+        Sets up and handles the signal of the duplicate-measurement popover.
+
+        The popover contains an entry for the angular tolerance. One plane,
+        linear or faultplane layer has to be selected. The groups of
+        duplicates are shown in a dialog, where they can be merged.
+        """
+        def find_duplicates():
+            """
+            Finds the duplicates of the selected layer and shows the dialog.
+
+            Faultplanes also need matching lineations and the same sense of
+            movement to count as duplicates.
+            """
+            selection = self.layer_view.get_selection()
+            model, row_list = selection.get_selected_rows()
+
+            if len(row_list) != 1:
+                self.statbar.push(1, _("Please select one layer!"))
+                return
+
+            lyr_obj = model[row_list[0]][3]
+            if lyr_obj is None or lyr_obj.get_layer_type() not in ["plane",
+                                                    "line", "faultplane"]:
+                self.statbar.push(1, _("Please select a plane, line or "
+                                       "faultplane layer!"))
+                return
+            if not self.check_editable(lyr_obj):
+                return
+
+            try:
+                tolerance = float(entry_tolerance.get_text())
+            except ValueError:
+                self.statbar.push(1, _("Please enter valid numbers!"))
+                return
+
+            data = lyr_obj.return_data()
+            lineations = None
+            if lyr_obj.get_layer_type() == "faultplane" and len(data) > 0:
+                columns = list(zip(*data))
+                lineations = vector_math.line_to_vector(columns[2],
+                                                        columns[3])
+
+            groups = vector_math.duplicate_groups(lyr_obj.get_vectors(),
+                                                  tolerance, lineations)
+            if lyr_obj.get_layer_type() == "faultplane":
+                groups = [np.array(same_sense) for group in groups
+                          for same_sense in self.split_by_sense(group, data)
+                          if len(same_sense) > 1]
+
+            if len(groups) == 0:
+                self.statbar.push(1, _("No duplicates found."))
+                return
+
+            dialog = DuplicateDialog(self.main_window, groups, data,
+                lambda groups, mode: self.merge_duplicates(lyr_obj, groups,
+                                                           mode))
+            dialog.run()
+
+        entry_tolerance = Gtk.Entry(width_chars=4, max_width_chars=4,
+                                    text="0.5")
+        self.set_up_tool_popover("toolbutton_duplicates",
+                                 [(_("Tolerance (°)"), entry_tolerance)],
+                                 find_duplicates)
+
+    def split_by_sense(self, group, data):
+        """
+        Splits a group of faultplane rows by their sense of movement.
+
+        Returns a list of lists of row numbers with the same sense.
+        """
+        senses = OrderedDict()
+        for row in group:
+            senses.setdefault(data[row][4], []).append(row)
+        return list(senses.values())
+
+    def merge_duplicates(self, lyr_obj, groups, mode):
+        """
+        Merges groups of duplicate rows of a layer.
+
+        The first row of each group is kept and all other rows are removed.
+        If the mode is "average", the first row is replaced by the mean
+        orientation of the group. For faultplanes the mean of the planes and
+        the mean of the lineations are used. The kept rows are computed on
+        the columns of the layer, which then replace its rows in one batch.
+        """
+        layer_type = lyr_obj.get_layer_type()
+        columns = [np.array(column) for column in lyr_obj.get_columns()]
+        vectors = lyr_obj.get_vectors()
+        if layer_type == "faultplane":
+            lineations = vector_math.line_to_vector(columns[2], columns[3])
+
+        keep = np.ones(len(columns[0]), dtype=bool)
+        for group in groups:
+            first = int(group[0])
+            if mode == "average":
+                mean = vector_math.axial_mean(vectors[group])
+                if layer_type == "line":
+                    dipdir, dip = vector_math.vector_to_line(mean)
+                else:
+                    dipdir, dip = vector_math.vector_to_plane(mean)
+                columns[0][first] = dipdir[0]
+                columns[1][first] = dip[0]
+                if layer_type == "faultplane":
+                    line_dir, line_dip = vector_math.vector_to_line(
+                                vector_math.axial_mean(lineations[group]))
+                    columns[2][first] = line_dir[0]
+                    columns[3][first] = line_dip[0]
+            keep[np.asarray(group[1:], dtype=int)] = False
+
+        removed = len(keep) - np.count_nonzero(keep)
+        lyr_obj.replace_rows([column[keep] for column in columns])
+        self.statbar.push(1, _("{} duplicate rows removed.").format(removed))
+        self.redraw_plot()
+
+    def set_up_tool_popover(self, toolbutton_name, rows, calculate):
+        """
+        Sets up the popover of a calculation toolbutton.
+
+        Expects the name of the toolbutton in the glade file, a list of tuples
+        with a label and a widget for each row of the popover, and a function
+        without arguments. The popover ends with a button that hides the
+        popover and calls the function.
+        """
+        def on_click(button, popovermenu):
+            """
+            Toggles the respective popovermenu.
+            """
+            if popovermenu.get_visible():
+                popovermenu.hide()
+            else:
+                popovermenu.show_all()
+
+        def on_calculate(button, popovermenu):
+            """
+            Hides the popover and starts the calculation.
+            """
+            popovermenu.hide()
+            calculate()
+
+        toolbutton = self.builder.get_object(toolbutton_name)
+        popover = Gtk.Popover(relative_to=toolbutton)
+        listbox = Gtk.ListBox()
+        popover.add(listbox)
+
+        for label, widget in rows:
+            row = Gtk.ListBoxRow()
+            hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0,
+                           border_width=10)
+            row.add(hbox)
+            hbox.pack_start(Gtk.Label(label=label, xalign=0), True, True, 3)
+            hbox.pack_start(widget, False, False, 3)
+            listbox.add(row)
+
+        btn_calc = Gtk.Button(label=_("Calculate"))
+        row_btn = Gtk.ListBoxRow()
+        box = Gtk.Box()
+        box.pack_start(btn_calc, True, True, 0)
+        row_btn.add(box)
+        listbox.add(row_btn)
+
+        btn_calc.connect("clicked", on_calculate, popover)
+        toolbutton.connect("clicked", on_click, popover)
+
     def copy_layer(self):
         """
         Copies the contents of a layer and all its children.
@@ -259,7 +1030,11 @@ class MainWindow(object):
                 copy["layers"].append([path_str, folder_props, []])
             else:
                 properties = lyr_obj.get_properties()
-                data = lyr_obj.return_data()
+                #Mapped layers only store the name of their file
+                if lyr_obj.is_mapped():
+                    data = []
+                else:
+                    data = lyr_obj.return_data()
                 copy["layers"].append([path_str, properties, data])
 
         def iterate_over_store(model, path, itr, start_path):
@@ -346,7 +1121,8 @@ class MainWindow(object):
             split_path = layer[0].split(":")
             lyr_dict = layer[1]
             lyr_data = layer[2]
-            lyr_obj_new, lyr_store, lyr_view = self.create_layer(lyr_dict["type"])
+            lyr_obj_new = self.create_layer(lyr_dict["type"],
+                                            lyr_dict.get("mapped_file"))
 
             if lyr_obj_new is not None:
                 lyr_obj_new.set_properties(lyr_dict)
@@ -371,12 +1147,8 @@ class MainWindow(object):
                 itr = insert_layer(lyr_obj_new, lyr_dict, ins_itr)
                 iter_dict[path_len] = itr
 
-            for f in lyr_data:
-                if lyr_dict["type"] == "faultplane":
-                    #Passing a list or tuple to the add feature function would be better.
-                    self.add_feature(lyr_dict["type"], lyr_store, f[0], f[1], f[2], f[3], f[4])
-                else:
-                    self.add_feature(lyr_dict["type"], lyr_store, f[0], f[1], f[2])
+            if lyr_obj_new is not None and len(lyr_data) > 0:
+                lyr_obj_new.add_features(*zip(*lyr_data))
 
             if insert_rows == False:
                 self.redraw_plot()
@@ -552,6 +1324,32 @@ class MainWindow(object):
             self.view_mode = "pt"
             self.redraw_plot()
 
+    def on_menuitem_woodcock_view_activate(self, radiomenuitem):
+        # pylint: disable=unused-argument
+        """
+        Switches to the Woodcock diagram view.
+
+        Triggered from the menu bar. Each visible plane or linear layer and
+        each folder is plotted as one point in a Woodcock diagram.
+        """
+        if self.view_mode != "woodcock":
+            self.view_changed = True
+            self.view_mode = "woodcock"
+            self.redraw_plot()
+
+    def on_menuitem_vollmer_view_activate(self, radiomenuitem):
+        # pylint: disable=unused-argument
+        """
+        Switches to the Vollmer triangle view.
+
+        Triggered from the menu bar. Each visible plane or linear layer and
+        each folder is plotted as one point in a Vollmer triangle.
+        """
+        if self.view_mode != "vollmer":
+            self.view_changed = True
+            self.view_mode = "vollmer"
+            self.redraw_plot()
+
     def change_night_mode(self):
         """
         Changes the night mode.
@@ -576,84 +1374,71 @@ class MainWindow(object):
         """
         Calculates the eigenvectors and eigenvalues of one or more layers.
 
-        Triggered when the user calls the calculation. It checks if all the
-        selected layers are either planes or linear-layers. If different
-        layers are selected the calculation is aborted. A successful
+        Triggered when the user calls the calculation. Selected folders are
+        searched for layers. It checks if all the layers are either planes or
+        linear-layers. If different layers are selected the calculation is
+        aborted. The orientation tensors that each layer keeps up to date are
+        added, so the data itself does not have to be parsed. A successful
         calculation adds a new eigenvector-layer.
         """
         selection = self.layer_view.get_selection()
         model, row_list = selection.get_selected_rows()
-        values = []
-
-        #Check if all selected layers are the same
-        layers_equal = True
-        layer_list = []
-        for row in row_list:
-            lyr_obj = model[row][3]
+        layers = self.get_selected_layers(model, row_list)
 
-            if lyr_obj is None:
-                return
-            else:
-                layer_list.append(lyr_obj.get_layer_type())
-        for a in layer_list:
-            for b in layer_list:
-                if a is not b:
-                    layers_equal = False
+        if len(layers) == 0:
+            return
 
-        if layers_equal == False:
+        #Check if all selected layers are the same
+        layer_list = [lyr_obj.get_layer_type() for lyr_obj in layers]
+        if layer_list.count(layer_list[0]) != len(layer_list):
             self.statbar.push(1, ("Please select only layers of the same type!"))
             return
 
-        def evaluate_planes():
-            total_strike = []
-            total_dip = []
-            for row in row_list:
-                lyr_obj = model[row][3]
-                strike, dipdir, dip = self.parse_planes(
-                                                    lyr_obj.get_data_treestore())
-                for x in strike:
-                    total_strike.append(x)
-                for y in dip:
-                    total_dip.append(y)
-
-            dip, dipdir, values = mplstereonet.eigenvectors(total_strike, total_dip)
-            return dip, dipdir, values
-
-        def evaluate_lines():
-            total_dipdir = []
-            total_dip = []
-            for row in row_list:
-                lyr_obj = model[row][3]
-                dipdir, dip, sense = \
-                                self.parse_lines(lyr_obj.get_data_treestore())
-                for x in dipdir:
-                    total_dipdir.append(x)
-                for y in dip:
-                    total_dip.append(y)
+        if layer_list[0] != "plane" and layer_list[0] != "line":
+            self.statbar.push(1, ("Please select only plane or line layers!"))
+            return
 
-            dip, dipdir, values = mplstereonet.eigenvectors(total_dip,
-                                                            total_dipdir,
-                                                            measurement="lines")
-            return dip, dipdir, values
+        total_tensor = np.zeros((3, 3))
+        total_count = 0
+        for lyr_obj in layers:
+            tensor, count = lyr_obj.get_orientation_tensor()
+            total_tensor += tensor
+            total_count += count
 
-        #Check how data should be interpreted:
-        if layer_list[0] == "plane":
-            dip, dipdir, values = evaluate_planes()
-        elif layer_list[0] == "line":
-            dip, dipdir, values = evaluate_lines()
-        else:
-            self.statbar.push(1, ("Please select only plane or line layers!"))
+        if total_count == 0:
             return
 
-        #Normalize to 1
-        values = values/np.sum(values)
+        dipdir, dip, values = vector_math.tensor_eigenvectors(total_tensor,
+                                                              total_count)
 
-        store, new_lyr_obj = self.add_layer_dataset("eigenvector")
-        self.add_eigenvector_feature(store, dipdir[0], dip[0], values[0])
-        self.add_eigenvector_feature(store, dipdir[1], dip[1], values[1])
-        self.add_eigenvector_feature(store, dipdir[2], dip[2], values[2])
+        new_lyr_obj = self.add_layer_object("eigenvector")
+        new_lyr_obj.add_features(dipdir, dip, values)
         self.redraw_plot()
 
+    def get_selected_layers(self, model, row_list):
+        """
+        Returns the layer-objects of the selected rows of the layer-view.
+
+        Selected folders are searched recursively, so that all layers inside
+        them are returned as well. Each layer is only returned once, even if
+        it is selected together with its folder.
+        """
+        layers = []
+
+        def add_layer(itr):
+            lyr_obj = model[itr][3]
+            if lyr_obj is None:
+                child = model.iter_children(itr)
+                while child is not None:
+                    add_layer(child)
+                    child = model.iter_next(child)
+            elif lyr_obj not in layers:
+                layers.append(lyr_obj)
+
+        for row in row_list:
+            add_layer(model.get_iter(row))
+        return layers
+
     def on_toolbutton_rotate_layer_clicked(self, toolbutton):
         # pylint: disable=unused-argument
         """
@@ -680,7 +1465,7 @@ class MainWindow(object):
 
         rotate_dialog = RotationDialog(self.main_window, self.settings,
                                        data_rows, self.add_layer_dataset,
-                                       self.add_feature, self.redraw_plot)
+                                       self.redraw_plot)
         rotate_dialog.run()
 
     def on_toolbutton_new_project_clicked(self, widget):
@@ -716,17 +1501,6 @@ class MainWindow(object):
         selection = self.layer_view.get_selection()
         model, row_list = selection.get_selected_rows()
 
-        def iterate_over_data(model, path, itr, n):
-            """
-            Copies data to new layer.
-
-            Receives a model, path and itr of a layer, plus the datastore
-            of the new layer. Converts the plane orientation into a pole
-            orientation and adds it to the new layer.
-            """
-            r = model[path]
-            self.add_linear_feature(n, 180 + r[0], 90 - r[1])
-
         for row in row_list:
             lyr_obj = model[row][3]
 
@@ -738,24 +1512,26 @@ class MainWindow(object):
             if layer_type == "line":
                 return
 
-        #n = new datastore
-        n, new_lyr_obj = self.add_layer_dataset("line")
+        new_lyr_obj = self.add_layer_object("line")
 
         for row in row_list:
             lyr_obj = model[row][3]
-            datastore = lyr_obj.get_data_treestore()
-            datastore.foreach(iterate_over_data, n)
+            data = lyr_obj.return_data()
+            if len(data) == 0:
+                continue
+            columns = list(zip(*data))
+            #Converts the plane orientations into pole orientations.
+            new_lyr_obj.add_features(np.add(columns[0], 180),
+                                     np.subtract(90, columns[1]))
 
         self.redraw_plot()
 
-    def on_toolbutton_save_clicked(self, widget, testing=False):
-        # pylint: disable=unused-argument
+    def serialize_project(self):
         """
-        Triggered from the GUI. Saves the project.
+        Returns the project as an "InnStereo data file 1.0" JSON string.
 
-        Iterates over all layers and stores the data in a dictionary. Passes
-        the dictionary to the FileChooserSave dialog, which handles writing
-        the file to the harddisk.
+        Iterates over all layers and stores the data in a dictionary, which
+        is serialized with json.
         """
         copy = {}
         copy["filetype"] = "InnStereo data file 1.0"
@@ -780,7 +1556,11 @@ class MainWindow(object):
                 copy["layers"].append([path_str, folder_props, []])
             else:
                 properties = lyr_obj.get_properties()
-                data = lyr_obj.return_data()
+                #Mapped layers only store the name of their file
+                if lyr_obj.is_mapped():
+                    data = []
+                else:
+                    data = lyr_obj.return_data()
                 copy["layers"].append([path_str, properties, data])
 
         def iterate_over_store(model, path, itr):
@@ -797,11 +1577,75 @@ class MainWindow(object):
 
         self.layer_store.foreach(iterate_over_store)
         copy = OrderedDict(sorted(copy.items()))
-        dump = json.dumps(copy)
-        if testing == False:
-            dlg = FileChooserSave(self.main_window, dump)
-            dlg.run()
-        return dump
+        return json.dumps(copy)
+
+    def save_archive(self, archive_file):
+        """
+        Saves the project as a project archive.
+
+        The manifest stores the layer tree, the properties of the layers and
+        the settings. Each layer with data gets one array in the archive.
+        Layers whose data has not changed since they were loaded from or
+        saved to an archive are copied from that archive, without reading
+        their rows. Layers that have not been loaded yet stay unloaded, and
+        read their data from the new archive, because the arrays can get new
+        names when an archive is saved over itself.
+        """
+        manifest = OrderedDict([("filetype", project_archive.ARCHIVE_TYPE),
+                                ("settings", self.settings.get_properties()),
+                                ("layers", [])])
+        arrays = []
+        saved = []
+
+        def iterate_over_store(model, path, itr):
+            """
+            Appends a layer to the manifest and its data to the arrays.
+            """
+            path_str = str(path)
+            lyr_obj = model[itr][3]
+            if lyr_obj is None:
+                folder_props = {"type": "folder", "label": model[itr][2]}
+                folder_props = OrderedDict(sorted(folder_props.items()))
+                manifest["layers"].append([path_str, folder_props, None])
+                return
+
+            name = "layers/{}.npy".format(len(arrays))
+            content = lyr_obj.get_archive_source()
+            if lyr_obj.is_mapped():
+                content = None
+            elif content is None:
+                data = lyr_obj.return_data()
+                content = list(zip(*data)) if len(data) > 0 else None
+            if content is None:
+                name = None
+            else:
+                arrays.append((name, content))
+                saved.append((lyr_obj, name))
+            manifest["layers"].append([path_str, lyr_obj.get_properties(),
+                                       name])
+
+        self.layer_store.foreach(iterate_over_store)
+        project_archive.write_archive(archive_file, manifest, arrays)
+        for lyr_obj, name in saved:
+            if not lyr_obj.is_loaded():
+                lyr_obj.set_data_source(partial(project_archive.read_layer,
+                                                archive_file, name))
+            lyr_obj.set_archive_source(archive_file, name)
+
+    def on_toolbutton_save_clicked(self, widget, testing=False):
+        # pylint: disable=unused-argument
+        """
+        Triggered from the GUI. Saves the project.
+
+        Runs the FileChooserSave dialog, which saves the project either as a
+        JSON file or as a project archive. When testing, the JSON
+        serialization of the project is returned instead.
+        """
+        if testing == True:
+            return self.serialize_project()
+        dlg = FileChooserSave(self.main_window, self.serialize_project,
+                              self.save_archive)
+        dlg.run()
 
     def on_toolbutton_open_clicked(self, toolbutton):
         # pylint: disable=unused-argument
@@ -814,64 +1658,106 @@ class MainWindow(object):
         dlg = FileChooserOpen(self.main_window, self.open_project)
         dlg.run()
 
+    def insert_saved_layer(self, iter_dict, path_str, lyr_dict):
+        """
+        Inserts a layer of a saved project into the layer tree.
+
+        Expects the dictionary of the last inserted iters for each path
+        length, the saved path of the layer and its properties. The layer is
+        created with its saved properties and returned. Folders return None.
+        """
+        lyr_obj_new = self.create_layer(lyr_dict["type"],
+                                        lyr_dict.get("mapped_file"))
+        if lyr_obj_new == None:
+            lyr_pixbuf = self.settings.get_folder_icon()
+            lyr_label = lyr_dict["label"]
+        else:
+            lyr_obj_new.set_properties(lyr_dict)
+            lyr_pixbuf = lyr_obj_new.get_pixbuf()
+            lyr_label = lyr_obj_new.get_label()
+
+        #The last path length is assigned to the dictionary
+        #If the next layer has a longer path it will use the
+        #previous entry as parent. It is not overwritten, which
+        #produces a depth-first iteration.
+        path_len = len(path_str.split(":"))
+        ins_itr = self.layer_store.insert_before(iter_dict[path_len-1], None,
+                                    [True, lyr_pixbuf, lyr_label, lyr_obj_new])
+        iter_dict[path_len] = ins_itr
+        return lyr_obj_new
+
     def open_project(self, project_file):
         """
         Opens a saved project. Adds all the saved layers to the current window
 
-        The opened file is passed from the FileChooserOpen dialog. The file
-        is read and then the json is parsed. The function then checks if
-        the file is valid. Then each layer is added to the project. For each
-        layer the saved properties are set and all the data rows are loaded.
-        """
-        with open(project_file, "r") as prj_file:
-            read_data = prj_file.read()
-        parse = json.loads(read_data)
-        if parse["filetype"] != "InnStereo data file 1.0":
-            print("Not a valid InnStereo data file")
+        The opened file is passed from the FileChooserOpen dialog. Project
+        archives are opened by open_archive. JSON files are decoded
+        incrementally by json_stream.read_project in the worker thread of an
+        ImportWorker, so only a small part of the file is held in memory.
+        In the main thread each layer is added to the project with its saved
+        properties as soon as they are read, and its rows are added in
+        batches of up to CHUNK_ROWS rows. A ProgressDialog shows the progress
+        and can cancel the import, in which case the layers that were already
+        loaded are kept.
+        """
+        if project_archive.is_archive(project_file):
+            self.open_archive(project_file)
+            return
 
-        self.settings.set_properties(parse["settings"])
+        iter_dict = {0: None}
+        state = {"layer": None}
+
+        def insert_chunk(chunk):
+            kind, content, fraction = chunk
+            if kind == "settings":
+                self.settings.set_properties(content)
+            elif kind == "layer":
+                state["layer"] = self.insert_saved_layer(iter_dict,
+                                                         content[0],
+                                                         content[1])
+            elif kind == "rows":
+                state["layer"].add_features(*content)
+            progress.set_progress(fraction)
+
+        def finish(cancelled, error):
+            progress.destroy()
+            if error is not None:
+                self.statbar.push(1, _("Could not open the project: {}")
+                                  .format(error))
+            self.redraw_plot()
 
-        def insert_layer(lyr_obj_new, lyr_dict, ins_iter):
-            if lyr_obj_new == None:
-                lyr_pixbuf = self.settings.get_folder_icon()
-                lyr_label = lyr_dict["label"]
-            else:
-                lyr_obj_new.set_properties(lyr_dict)
-                lyr_pixbuf = lyr_obj_new.get_pixbuf()
-                lyr_label = lyr_obj_new.get_label()
+        worker = ImportWorker(
+                    lambda: json_stream.read_project(project_file, CHUNK_ROWS),
+                    insert_chunk, finish)
+        progress = ProgressDialog(self.main_window, _("Opening project"),
+                                  worker.cancel)
+        progress.show()
+        worker.start()
 
-            ins_itr = self.layer_store.insert_before(ins_iter, None,
-                                    [True, lyr_pixbuf, lyr_label, lyr_obj_new])
-            return ins_itr
+    def open_archive(self, archive_file):
+        """
+        Opens a project archive. Adds all the saved layers to the window.
 
-        def create_and_insert(ins_itr, lyr_dict):
-            lyr_obj_new, lyr_store, lyr_view = self.create_layer(lyr_dict["type"])
-            ins_itr = insert_layer(lyr_obj_new, lyr_dict, ins_itr)
-            if lyr_obj_new is not None:
-                lyr_obj_new.set_properties(lyr_dict)
-            return ins_itr, lyr_store
+        Only the manifest of the archive is read. The layers are inserted
+        with their properties, and each layer gets a data source that reads
+        its array from the archive the first time its data is needed, e.g.
+        when the layer is drawn or selected.
+        """
+        try:
+            manifest = project_archive.read_manifest(archive_file)
+        except (OSError, ValueError, KeyError) as error:
+            self.statbar.push(1, _("Could not open the project: {}")
+                              .format(error))
+            return
 
+        self.settings.set_properties(manifest["settings"])
         iter_dict = {0: None}
-        for layer in parse["layers"]:
-            split_path = layer[0].split(":")
-            path_len = len(split_path)
-            lyr_dict = layer[1]
-            features = layer[2]
-            #The last path length is assigned to the dictionary
-            #If the next layer has a longer path it will use the
-            #previous entry as parent. It is not overwritten, which
-            #produces a depth-first iteration.
-            ins_itr = iter_dict[path_len-1]
-            itr, lyr_store = create_and_insert(ins_itr, lyr_dict)
-            iter_dict[path_len] = itr
-
-            for f in features:
-                if lyr_dict["type"] == "faultplane":
-                #Passing a list or tuple to the add feature function would be better.
-                    self.add_feature(lyr_dict["type"], lyr_store, f[0], f[1], f[2], f[3], f[4])
-                else:
-                    self.add_feature(lyr_dict["type"], lyr_store, f[0], f[1], f[2])
-
+        for path_str, lyr_dict, name in manifest["layers"]:
+            lyr_obj = self.insert_saved_layer(iter_dict, path_str, lyr_dict)
+            if lyr_obj is not None and name is not None:
+                lyr_obj.set_data_source(partial(project_archive.read_layer,
+                                                archive_file, name))
+                lyr_obj.set_archive_source(archive_file, name)
         self.redraw_plot()
 
     def on_toolbutton_show_table_clicked(self, widget):
@@ -988,8 +1874,7 @@ class MainWindow(object):
         total_dip = []
         for row in row_list:
             lyr_obj = model[row][3]
-            dipdir, dip, sense = self.parse_lines(
-                                            lyr_obj.get_data_treestore())
+            dipdir, dip, sense = self.parse_lines(lyr_obj.get_rows())
             for x in dipdir:
                 total_dipdir.append(x)
             for y in dip:
@@ -998,8 +1883,8 @@ class MainWindow(object):
         fit_strike, fit_dip = mplstereonet.fit_girdle(total_dip, total_dipdir,
                                 measurement="lines")
 
-        store, new_lyr_obj = self.add_layer_dataset("plane")
-        self.add_planar_feature(store, fit_strike + 90, fit_dip)
+        new_lyr_obj = self.add_layer_object("plane")
+        new_lyr_obj.add_features([fit_strike + 90], [fit_dip])
         self.redraw_plot()
 
     def on_toolbutton_plane_intersect_clicked(self, widget):
@@ -1033,8 +1918,7 @@ class MainWindow(object):
         #Iterate over layers and rows, gather poles
         for row in row_list:
             lyr_obj = model[row][3]
-            strike, dipdir, dip = self.parse_planes(
-                                            lyr_obj.get_data_treestore())
+            strike, dipdir, dip = self.parse_planes(lyr_obj.get_rows())
             for x in strike:
                 total_dipdir.append(270 + x)
             for y in dip:
@@ -1044,8 +1928,8 @@ class MainWindow(object):
         fit_strike, fit_dip = mplstereonet.fit_girdle(total_dip, total_dipdir,
                                 measurement="lines")
 
-        store, new_lyr_obj = self.add_layer_dataset("line")
-        self.add_linear_feature(store, fit_strike + 270, 90 - fit_dip)
+        new_lyr_obj = self.add_layer_object("line")
+        new_lyr_obj.add_features([fit_strike + 270], [90 - fit_dip])
         self.redraw_plot()
 
     def on_toolbutton_linears_to_planes_clicked(self, toolbutton):
@@ -1075,14 +1959,13 @@ class MainWindow(object):
         if only_lines is False:
             return
 
-        store, new_lyr_obj = self.add_layer_dataset("plane")
+        new_lyr_obj = self.add_layer_object("plane")
 
         for row in row_list:
             lyr_obj = model[row][3]
-            strike, dipdir, sense = self.parse_lines(
-                                            lyr_obj.get_data_treestore())
-            for strike, dipdir in zip(strike, dipdir):
-                self.add_linear_feature(store, strike + 180, 90 - dipdir)
+            strike, dipdir, sense = self.parse_lines(lyr_obj.get_rows())
+            new_lyr_obj.add_features(np.add(strike, 180),
+                                     np.subtract(90, dipdir))
 
         self.redraw_plot()
 
@@ -1115,16 +1998,15 @@ class MainWindow(object):
         total_dip = []
         for row in row_list:
             lyr_obj = model[row][3]
-            store = lyr_obj.get_data_treestore()
-            dipdir, dip, sense = self.parse_lines(store)
+            dipdir, dip, sense = self.parse_lines(lyr_obj.get_rows())
             for x, y in zip(dipdir, dip):
                 total_dipdir.append(x)
                 total_dip.append(y)
 
         vector, r_value = mplstereonet.find_mean_vector(dip, dipdir)
-        new_store, new_lyr_obj = self.add_layer_dataset("eigenvector")
+        new_lyr_obj = self.add_layer_object("eigenvector")
         new_lyr_obj.set_label("Mean Vector")
-        self.add_linear_feature(new_store, vector[1], vector[0], r_value)
+        new_lyr_obj.add_features([vector[1]], [vector[0]], [r_value])
         self.redraw_plot()
 
     def convert_lonlat_to_dipdir(self, lon, lat):
@@ -1214,8 +2096,11 @@ class MainWindow(object):
         Calculates the PT-Axis of a faultplane, and add adds them to the project
 
         Triggered from the toolbar. One faultplane layer has to be selected.
-        Iterates over the rows and calculates the p-, t, and b-axis for each
-        of them.
+        The whole layer is converted into normals and slip-vectors, and the
+        p-, b- and t-axes of all rows are calculated at once. The b-axis is
+        the cross product of normal and slip-vector, the p- and t-axis are
+        rotated by 30° away from the faultplane. Faults without a sense of
+        movement only receive a b-axis.
         """
         selection = self.layer_view.get_selection()
         model, row_list = selection.get_selected_rows()
@@ -1233,67 +2118,40 @@ class MainWindow(object):
         if lyr_type != "faultplane":
             return
 
-        def iterate_over_data(model, path, itr, pbt_store):
-            """
-            Iterates over the faultplane and adds the pt-axis for each row.
-
-            For each row the pole-linear-layer is calculated. The pole of
-            that layer is the rotation axis and the b-axis. The linear is
-            then rotated for the p-axis and t-axis.
-            """
-            drow = model[path]
-            p_store = pbt_store[0]
-            b_store = pbt_store[1]
-            t_store = pbt_store[2]
-
-            fit_strike, fit_dip = mplstereonet.fit_girdle(
-                                    [float(drow[3]), 90 - float(drow[1])],
-                                    [float(drow[2]), float(drow[0]) + 180],
-                                    measurement="lines")
-            #Plane between pole and linear
-            self.ax_stereo.plane(fit_strike, fit_dip)
-
-            #Rotation axis is pole of pole-linear-plane
-            raxis = [fit_strike - 90, 90 - fit_dip]
-
-            #B-Axis is rotation axis
-            self.add_linear_feature(b_store, raxis[0], raxis[1])
-
-            #Rotate 30° to P-axis
-            if drow[4] == "dn" or drow[4] == "dex":
-                rot = 30
-            else:
-                rot = -30
-            p_dipdir, p_dip = self.rotate_data(raxis, rot, drow[2], drow[3])
-            self.add_linear_feature(p_store, p_dipdir, p_dip)
+        data = lyr_obj.return_data()
+        if len(data) == 0:
+            return
 
-            #Rotate 30°+120=150 to T-axis
-            if drow[4] == "dn" or drow[4] == "dex":
-                rot = -60
-            else:
-                rot = 60
-            t_dipdir, t_dip = self.rotate_data(raxis, rot, drow[2], drow[3])
-            self.add_linear_feature(t_store, t_dipdir, t_dip)
+        plane_dir, plane_dip, line_dir, line_dip, sense = zip(*data)
+        normal, slip, valid = vector_math.fault_slip_vectors(plane_dir,
+                                            plane_dip, line_dir, line_dip,
+                                            sense)
+        p_axis, b_axis, t_axis = vector_math.pt_axes(normal, slip)
+        p_axis = p_axis[valid]
+        t_axis = t_axis[valid]
 
-        p_store, p_lyr_obj = self.add_layer_dataset("line")
-        p_lyr_obj.set_marker_fill("#ff0000")
+        p_lyr_obj = self.add_layer_object("line")
         p_lyr_obj.set_marker_fill("#ff0000")
         p_lyr_obj.set_label("P-Axis")
 
-        b_store, b_lyr_obj = self.add_layer_dataset("line")
+        b_lyr_obj = self.add_layer_object("line")
         b_lyr_obj.set_marker_fill("#ffffff")
         b_lyr_obj.set_marker_style("s")
         b_lyr_obj.set_label("B-Axis")
 
-        t_store, t_lyr_obj = self.add_layer_dataset("line")
+        t_lyr_obj = self.add_layer_object("line")
         t_lyr_obj.set_marker_fill("#0000ff")
         t_lyr_obj.set_marker_style("^")
         t_lyr_obj.set_label("T-Axis")
 
-        pbt_store = [p_store, b_store, t_store]
+        for lyr_obj, vectors in ((p_lyr_obj, p_axis), (b_lyr_obj, b_axis),
+                                 (t_lyr_obj, t_axis)):
+            lyr_obj.add_features(*vector_math.vector_to_line(vectors))
 
-        lyr_store = lyr_obj.get_data_treestore()
-        lyr_store.foreach(iterate_over_data, pbt_store)
+        skipped = len(data) - np.count_nonzero(valid)
+        if skipped > 0:
+            self.statbar.push(1, _("{} faults without sense of movement "
+                                   "only received a B-Axis.").format(skipped))
         self.redraw_plot()
 
     def layer_row_activated(self, treeview, path, column):
@@ -1386,84 +2244,98 @@ class MainWindow(object):
         self.layer_store[path][0] = not self.layer_store[path][0]
         self.redraw_plot()
 
-    def create_layer(self, lyr_type):
+    def create_layer(self, lyr_type, mapped_file=None):
         """
         Creates a layer according to the passed layer type.
 
-        Depending on the layer-type a different TreeStore, TreeView and layer
-        object is created. For folders all of them are None. Returns the new
-        layer object, a TreeStore and a TreeView.
-        """
+        Depending on the layer-type a different layer object is created. Each
+        layer gets a function that creates its TreeView, so the TreeStore and
+        TreeView are only built when the data of the layer is shown or edited.
+        For folders None is returned. If the name of a mapped file is passed,
+        plane and linear layers map their data from that file. If the file
+        can not be mapped, a normal layer is created, which keeps the name of
+        the file in its properties.
+        """
+        if mapped_file is not None and lyr_type in ["plane", "line"]:
+            try:
+                if lyr_type == "plane":
+                    return MappedPlaneLayer(lambda store: PlaneDataView(store,
+                            self.redraw_plot, self.add_feature, self.settings),
+                            mapped_file)
+                return MappedLineLayer(lambda store: LineDataView(store,
+                            self.redraw_plot, self.add_feature, self.settings),
+                            mapped_file)
+            except (OSError, ValueError) as error:
+                self.statbar.push(1, _("Could not map {}: {}").format(
+                                                    mapped_file, error))
+
         if lyr_type == "plane":
-            store = Gtk.ListStore(float, float, str)
-            view = PlaneDataView(store, self.redraw_plot, self.add_feature,
-                                 self.settings)
-            lyr_obj_new = PlaneLayer(store, view)
+            lyr_obj_new = PlaneLayer(lambda store: PlaneDataView(store,
+                            self.redraw_plot, self.add_feature, self.settings))
         elif lyr_type == "faultplane":
-            store = Gtk.ListStore(float, float, float, float, str)
-            view = FaultPlaneDataView(store, self.redraw_plot, self.add_feature,
-                                      self.settings)
-            lyr_obj_new = FaultPlaneLayer(store, view)
+            lyr_obj_new = FaultPlaneLayer(lambda store: FaultPlaneDataView(
+                     store, self.redraw_plot, self.add_feature, self.settings))
         elif lyr_type == "line":
-            store = Gtk.ListStore(float, float, str)
-            view = LineDataView(store, self.redraw_plot, self.add_feature,
-                                self.settings)
-            lyr_obj_new = LineLayer(store, view)
+            lyr_obj_new = LineLayer(lambda store: LineDataView(store,
+                            self.redraw_plot, self.add_feature, self.settings))
         elif lyr_type == "smallcircle":
-            store = Gtk.ListStore(float, float, float)
-            view = SmallCircleDataView(store, self.redraw_plot, self.add_feature,
-                                       self.settings)
-            lyr_obj_new = SmallCircleLayer(store, view)
+            lyr_obj_new = SmallCircleLayer(lambda store: SmallCircleDataView(
+                     store, self.redraw_plot, self.add_feature, self.settings))
         elif lyr_type == "eigenvector":
-            store = Gtk.ListStore(float, float, float)
-            view = EigenVectorView(store, self.redraw_plot, self.add_feature,
-                                   self.settings)
-            lyr_obj_new = EigenVectorLayer(store, view)
+            lyr_obj_new = EigenVectorLayer(lambda store: EigenVectorView(
+                     store, self.redraw_plot, self.add_feature, self.settings))
         elif lyr_type == "folder":
-            store = None
-            view = None
             lyr_obj_new = None
 
-        return lyr_obj_new, store, view
+        return lyr_obj_new
 
-    def add_layer_dataset(self, layer_type):
+    def add_layer_object(self, layer_type):
         """
-        Is called by the different "new layer" toolbuttons. If the number of
-        selected rows are 0 or more than one, the layer is appended at the end.
-        If just one row is selected, and the row is a group, then the new
-        layer is created in that group. Otherwise it is added at the end of the
-        same level as the selection.
+        Adds a new layer next to the selection and returns it.
+
+        If the number of selected rows are 0 or more than one, the layer is
+        appended at the end. If just one row is selected, and the row is a
+        group, then the new layer is created in that group. Otherwise it is
+        added at the end of the same level as the selection. The
+        data-treestore of the layer is only created when it is requested, so
+        the tools that fill layers with add_features use this function.
         """
-        store = None
         lyr_obj_new = None
 
         def add_layer(itr, layer_type):
-            lyr_obj_new, store, view = self.create_layer(layer_type)
-            view.set_layer_object(lyr_obj_new)
+            lyr_obj_new = self.create_layer(layer_type)
             pixbuf = lyr_obj_new.get_pixbuf()
             self.layer_store.append(itr,
                 [True, pixbuf, lyr_obj_new.get_label(), lyr_obj_new])
-            return store, lyr_obj_new
+            return lyr_obj_new
 
         selection = self.layer_view.get_selection()
         model, row_list = selection.get_selected_rows()
 
         rows = len(row_list)
         if rows == 0 or rows > 1:
-            store, lyr_obj_new = add_layer(None, layer_type)
+            lyr_obj_new = add_layer(None, layer_type)
         else:
             #If selected item is group, add to group, else: add to level
             row = row_list[0]
             lyr_obj = model[row][3]
             selection_itr = model.get_iter(row_list[0])
             if lyr_obj is None:
-                store, lyr_obj_new = add_layer(selection_itr, layer_type)
+                lyr_obj_new = add_layer(selection_itr, layer_type)
                 self.layer_view.expand_row(row, True)
             else:
                 parent_itr = model.iter_parent(selection_itr)
-                store, lyr_obj_new = add_layer(parent_itr, layer_type)
+                lyr_obj_new = add_layer(parent_itr, layer_type)
+
+        return lyr_obj_new
 
-        return store, lyr_obj_new
+    def add_layer_dataset(self, layer_type):
+        """
+        Is called by the different "new layer" toolbuttons. Adds a new layer
+        with add_layer_object and returns its data-treestore and the layer.
+        """
+        lyr_obj_new = self.add_layer_object(layer_type)
+        return lyr_obj_new.get_data_treestore(), lyr_obj_new
 
     def on_toolbutton_create_plane_dataset_clicked(self, widget):
         # pylint: disable=unused-argument
@@ -1472,8 +2344,7 @@ class MainWindow(object):
         creates a new dataset in the currently active layer group.
         Each dataset has a corresponding data sheet.
         """
-        store, lyr_obj_new = self.add_layer_dataset("plane")
-        return store, lyr_obj_new
+        return self.add_layer_dataset("plane")
 
     def on_toolbutton_create_faultplane_dataset_clicked(self, widget):
         # pylint: disable=unused-argument
@@ -1482,24 +2353,21 @@ class MainWindow(object):
         creates a new dataset in the currently active layer group.
         Each dataset has a corresponding data sheet.
         """
-        store, lyr_obj_new = self.add_layer_dataset("faultplane")
-        return store, lyr_obj_new
+        return self.add_layer_dataset("faultplane")
 
     def on_toolbutton_create_line_dataset_clicked(self, widget):
         # pylint: disable=unused-argument
         """
         Creates a new line data layer.
         """
-        store, lyr_obj_new = self.add_layer_dataset("line")
-        return store, lyr_obj_new
+        return self.add_layer_dataset("line")
 
     def on_toolbutton_create_small_circle_clicked(self, widget):
         # pylint: disable=unused-argument
         """
         Creates a new small circle layer.
         """
-        store, lyr_obj_new = self.add_layer_dataset("smallcircle")
-        return store, lyr_obj_new
+        return self.add_layer_dataset("smallcircle")
 
     def parse_planes(self, treestore, subset=None):
         """
@@ -1518,13 +2386,16 @@ class MainWindow(object):
             dip.append(float(row[1]))
         return strike, dipdir, dip
 
-    def parse_faultplanes(self, treestore, subset=None):
+    def parse_faultplanes(self, lyr_obj, subset=None):
         """
-        Parses a faultplane treestore. Converts planes from dip-direction to
+        Parses a faultplane layer. Converts planes from dip-direction to
         strikes so they can be plotted.
         #lp_plane = linear-pole_plane (The great circles that connect the
         lineation with the pole of the faultplane. Used for Hoeppener-Plots.
+        The lp_planes of the whole layer are calculated in one step and are
+        cached until the data of the layer changes.
         """
+        treestore = lyr_obj.get_rows()
         strike = []
         plane_dir = []
         plane_dip = []
@@ -1533,11 +2404,11 @@ class MainWindow(object):
         sense = []
         line_sense_dir = []
         line_sense_dip = []
-        lp_plane_dir = []
-        lp_plane_dip = []
+        keys = []
         for key, row in enumerate(treestore):
             if subset is not None and key not in subset:
                 continue
+            keys.append(key)
             strike.append(float(row[0] - 90))
             plane_dir.append(float(row[0]))
             plane_dip.append(float(row[1]))
@@ -1550,15 +2421,31 @@ class MainWindow(object):
             elif row[4] == "dn":
                 line_sense_dir.append(float(row[2]))
                 line_sense_dip.append(float(row[3]))
-            fit_strike, fit_dip = mplstereonet.fit_girdle(
-                                [float(row[3]), 90 - float(row[1])],
-                                [float(row[2]), float(row[0]) + 180],
-                                measurement="lines")
-            lp_plane_dir.append(fit_strike)
-            lp_plane_dip.append(fit_dip)
+
+        lp_strike, lp_dip = lyr_obj.get_cached("lp_planes",
+                                lambda: self.calculate_lp_planes(lyr_obj))
+        lp_plane_dir = lp_strike[keys].tolist()
+        lp_plane_dip = lp_dip[keys].tolist()
         return strike, plane_dir, plane_dip, line_dir, line_dip, sense, \
                line_sense_dir, line_sense_dip, lp_plane_dir, lp_plane_dip
 
+    def calculate_lp_planes(self, lyr_obj):
+        """
+        Calculates the linear-pole-planes of all rows of a faultplane layer.
+
+        The pole of each lp_plane is the cross product of the pole of the
+        faultplane and the lineation. Returns two arrays with the strikes and
+        dips of the lp_planes.
+        """
+        data = lyr_obj.return_data()
+        if len(data) == 0:
+            return np.array([]), np.array([])
+
+        plane_dir, plane_dip, line_dir, line_dip, sense = zip(*data)
+        lp_dir, lp_dip = vector_math.pole_linear_planes(plane_dir, plane_dip,
+                                                        line_dir, line_dip)
+        return lp_dir - 90, lp_dip
+
     def parse_lines(self, treestore, subset=None):
         """
         Parses linear data with the 3 columns dip direction, dip and sense.
@@ -1611,12 +2498,24 @@ class MainWindow(object):
             angle.append(float(row[2]))
         return line_dir, line_dip, angle
 
+    def legend_count(self, lyr_obj, drawn):
+        """
+        Returns the number of features that the legend shows for a layer.
+
+        Mapped layers that are drawn with a level-of-detail sample show the
+        number of drawn features and the number of all rows.
+        """
+        total = lyr_obj.get_row_count()
+        if lyr_obj.is_mapped() and drawn < total:
+            return "{} / {}".format(drawn, total)
+        return drawn
+
     def draw_plane(self, lyr_obj, dipdir, dip, highlight=False):
         """
         Function draws a great circle in the stereonet. It calls the formatting
         from the layer object.
         """
-        num_data = len(dipdir)
+        num_data = self.legend_count(lyr_obj, len(dipdir))
         lbl = "{} ({})".format(lyr_obj.get_label(), num_data)
 
         if highlight is False:
@@ -1638,7 +2537,7 @@ class MainWindow(object):
         Function draws a linear element in the stereonet. It calls the
         formatting from the layer object.
         """
-        num_data = len(dipdir)
+        num_data = self.legend_count(lyr_obj, len(dipdir))
         lbl = "{} ({})".format(lyr_obj.get_label(), num_data)
 
         if highlight is False:
@@ -1736,34 +2635,55 @@ class MainWindow(object):
                     alpha=lyr_obj.get_line_alpha())
         return handler, lbl
 
-    def draw_mean_vector(self, lyr_obj, dipdir, dip, highlight=False):
+    def get_layer_statistics(self, lyr_obj, subset=None):
+        """
+        Returns the summary statistics of a layer or a subset of its rows.
+
+        The statistics of a whole layer are read from the cache of the layer.
+        Subsets are only drawn for highlighting, and are calculated directly
+        from the cached vectors of the layer.
+        """
+        if subset is None:
+            return lyr_obj.get_statistics()
+
+        vectors = lyr_obj.get_vectors()[sorted(subset)]
+        return vector_math.fisher_statistics(vectors,
+                                             lyr_obj.get_fisher_conf())
+
+    def draw_mean_vector(self, lyr_obj, subset=None, highlight=False):
         """
         Draws the mean vector of the current linear layer.
         """
-        if len(dipdir) == 0:
+        stats = self.get_layer_statistics(lyr_obj, subset)
+        if stats["mean_vector"] is None:
             return
 
-        vector, r_value = mplstereonet.find_mean_vector(dip, dipdir)
-        self.ax_stereo.line(vector[0], vector[1], marker="d",
+        dipdir, dip = stats["mean_vector"]
+        lbl = "{} ({:03.0f}/{:02.0f}, R={:.2f})".format(
+                    _("Mean Vector"), dipdir, dip, stats["r_value"])
+        self.ax_stereo.line(dip, dipdir, marker="d",
             markersize=8,
             color="#ff0000",
             markeredgewidth=1,
             markeredgecolor="#000000",
+            label=lbl,
             clip_on=False)
 
-    def draw_fisher_smallcircle(self, lyr_obj, dipdir, dip, highlight=False):
+    def draw_fisher_smallcircle(self, lyr_obj, subset=None, highlight=False):
         """
         Draws the confidence small circle of the current linear layer.
         """
-        if len(dipdir) == 0:
+        stats = self.get_layer_statistics(lyr_obj, subset)
+        if stats["cone"] is None:
             return
 
-        confidence = lyr_obj.get_fisher_conf()
-        vector, stats = mplstereonet.find_fisher_stats(dip, dipdir, conf=confidence)
-        self.ax_stereo.cone(vector[0], vector[1], stats[1], facecolor="None",
+        dipdir, dip = stats["mean_vector"]
+        lbl = "{} ({:.1f}°, k={:.1f})".format(lyr_obj.get_label(),
+                                              stats["cone"], stats["kappa"])
+        self.ax_stereo.cone(dip, dipdir, stats["cone"], facecolor="None",
                     color=lyr_obj.get_line_color(),
                     linewidth=lyr_obj.get_line_width(),
-                    label=lyr_obj.get_label(),
+                    label=lbl,
                     linestyle=lyr_obj.get_line_style())
 
     def draw_poles(self, lyr_obj, dipdir, dip, highlight=False):
@@ -1771,7 +2691,7 @@ class MainWindow(object):
         Function draws a plane pole in the stereonet. It calls the formatting
         from the layer object.
         """
-        num_data = len(dipdir)
+        num_data = self.legend_count(lyr_obj, len(dipdir))
         lbl = "Poles of {} ({})".format(lyr_obj.get_label(), num_data)
 
         if highlight is False:
@@ -1795,7 +2715,8 @@ class MainWindow(object):
         MplStereonet accepts measurements as "poles" for planes and
         "lines" for linear measurements.
         """
-        if len(dipdir) == 0:
+        grid = lyr_obj.get_density_grid()
+        if len(dipdir) == 0 and grid is None:
             return None
 
         if lyr_obj.get_manual_range() == True:
@@ -1806,39 +2727,41 @@ class MainWindow(object):
         else:
             cont_interval = None
 
+        #Layers with a precomputed density grid are contoured directly
+        if grid is None:
+            contourf = self.ax_stereo.density_contourf
+            contour = self.ax_stereo.density_contour
+            data = (dipdir, dips)
+            density = {"measurement": measure_type,
+                       "method": lyr_obj.get_contour_method(),
+                       "gridsize": lyr_obj.get_contour_resolution(),
+                       "sigma": lyr_obj.get_contour_sigma()}
+        else:
+            contourf = self.ax_stereo.contourf
+            contour = self.ax_stereo.contour
+            data = grid
+            density = {}
+
         #Implement hatches = (['-', '+', 'x', '\\', '*', 'o', 'O', '.'])
         if lyr_obj.get_draw_contour_fills() == True:
-            cbar = self.ax_stereo.density_contourf(dipdir, dips,
-                              measurement=measure_type,
-                              method=lyr_obj.get_contour_method(),
-                              gridsize=lyr_obj.get_contour_resolution(),
-                              cmap=lyr_obj.get_colormap(),
-                              sigma=lyr_obj.get_contour_sigma(),
-                              levels=cont_interval)
+            cbar = contourf(*data, cmap=lyr_obj.get_colormap(),
+                            levels=cont_interval, **density)
         else:
             cbar = None
 
         if lyr_obj.get_draw_contour_lines() == True:
             if lyr_obj.get_use_line_color() == True:
-                clines = self.ax_stereo.density_contour(dipdir, dips,
-                                measurement=measure_type,
-                                method = lyr_obj.get_contour_method(),
-                                gridsize = lyr_obj.get_contour_resolution(),
-                                sigma = lyr_obj.get_contour_sigma(),
+                clines = contour(*data,
                                 colors = lyr_obj.get_contour_line_color(),
                                 linewidths = lyr_obj.get_contour_line_width(),
                                 linestyles = lyr_obj.get_contour_line_style(),
-                                levels=cont_interval)
+                                levels=cont_interval, **density)
             else:
-                clines = self.ax_stereo.density_contour(dipdir, dips,
-                                measurement=measure_type,
-                                method = lyr_obj.get_contour_method(),
-                                gridsize = lyr_obj.get_contour_resolution(),
-                                sigma = lyr_obj.get_contour_sigma(),
+                clines = contour(*data,
                                 cmap = lyr_obj.get_colormap(),
                                 linewidths = lyr_obj.get_contour_line_width(),
                                 linestyles = lyr_obj.get_contour_line_style(),
-                                levels=cont_interval)                
+                                levels=cont_interval, **density)
 
         if lyr_obj.get_draw_contour_labels() == True:
             if clines is not None:
@@ -1847,6 +2770,149 @@ class MainWindow(object):
 
         self.cbar.append(cbar)
 
+    def draw_misfit_histogram(self, lyr_obj):
+        """
+        Draws the misfit angles of a stress inversion into ax_fluc.
+
+        Only layers that hold the result of a stress inversion are drawn. The
+        histogram is cached by the layer.
+        """
+        stresses = lyr_obj.get_fault_stresses()
+        if stresses is None:
+            return
+
+        edges = stresses["edges"]
+        self.ax_fluc.set_aspect("auto")
+        self.ax_fluc.bar(edges[:-1], stresses["counts"],
+                         width=np.diff(edges), align="edge",
+                         color=lyr_obj.get_marker_fill(), alpha=0.5,
+                         edgecolor=lyr_obj.get_marker_edge_color(),
+                         label=lyr_obj.get_label())
+        self.ax_fluc.set_xlim(edges[0], edges[-1])
+        self.ax_fluc.set_xlabel(_("Misfit Angle (°)"))
+        self.ax_fluc.set_ylabel(_("Faults"))
+
+    def draw_mohr_circle(self, lyr_obj):
+        """
+        Draws the normalized Mohr diagram of a stress inversion into ax_mohr.
+
+        The three circles are drawn from the principal stresses of the
+        reduced tensor (1, R, 0), and every fault is plotted with its normal
+        and shear stress. The stresses are cached by the layer.
+        """
+        stresses = lyr_obj.get_fault_stresses()
+        if stresses is None:
+            return
+
+        angle = np.linspace(0, np.pi, 91)
+        principal = stresses["principal"]
+        for first, second in [(0, 2), (0, 1), (1, 2)]:
+            center = (principal[first] + principal[second]) / 2
+            radius = (principal[first] - principal[second]) / 2
+            self.ax_mohr.plot(center + radius * np.cos(angle),
+                              radius * np.sin(angle), color="#000000",
+                              linewidth=1)
+        self.ax_mohr.plot(stresses["normal"], stresses["shear"],
+                          linestyle="None", marker="o", markersize=3,
+                          color=lyr_obj.get_marker_fill(),
+                          markeredgecolor=lyr_obj.get_marker_edge_color(),
+                          label=lyr_obj.get_label())
+        self.ax_mohr.set_xlabel(_("Normal Stress"))
+        self.ax_mohr.set_ylabel(_("Shear Stress"))
+
+    def draw_fabric_diagram(self):
+        """
+        Draws all visible layers and folders into a Woodcock or Vollmer plot.
+
+        The eigenvalues are calculated from the orientation tensors that the
+        layers keep up to date, so the data of the layers is not parsed.
+        Folders are plotted with the summed tensors of their visible plane
+        and linear layers.
+        """
+        labels = []
+        values = []
+        styles = []
+
+        def collect(itr):
+            """
+            Collects the visible rows on one level and returns their tensor.
+            """
+            tensor = np.zeros((3, 3))
+            count = 0
+            while itr is not None:
+                row = self.layer_store[itr]
+                lyr_obj = row[3]
+                if row[0] == False:
+                    itr = self.layer_store.iter_next(itr)
+                    continue
+
+                if lyr_obj is None:
+                    row_tensor, row_count = collect(
+                                        self.layer_store.iter_children(itr))
+                    style = ("s", "#000000")
+                elif lyr_obj.get_layer_type() in ["plane", "faultplane"]:
+                    row_tensor, row_count = lyr_obj.get_orientation_tensor()
+                    style = ("o", lyr_obj.get_pole_fill())
+                elif lyr_obj.get_layer_type() == "line":
+                    row_tensor, row_count = lyr_obj.get_orientation_tensor()
+                    style = ("o", lyr_obj.get_marker_fill())
+                else:
+                    itr = self.layer_store.iter_next(itr)
+                    continue
+
+                if row_count > 0:
+                    labels.append(row[2])
+                    values.append(vector_math.tensor_eigenvectors(row_tensor,
+                                                            row_count)[2])
+                    styles.append(style)
+                tensor += row_tensor
+                count += row_count
+                itr = self.layer_store.iter_next(itr)
+            return tensor, count
+
+        collect(self.layer_store.get_iter_first())
+
+        ax = self.ax_fabric
+        ax.cla()
+        ax.set_title("ax_fabric", visible=False)
+        if self.view_mode == "woodcock":
+            x, y = vector_math.woodcock_coordinates(np.reshape(values,
+                                                               (-1, 3)))
+            limit = max([7] + [value for value in np.concatenate((x, y))
+                               if np.isfinite(value)])
+            ax.plot([0, limit], [0, limit], color="#000000", linewidth=1)
+            for strength in range(2, int(2 * limit), 2):
+                ax.plot([0, strength], [strength, 0], color="#808080",
+                        linestyle="dotted", linewidth=1)
+            ax.set_xlim(0, limit)
+            ax.set_ylim(0, limit)
+            ax.set_aspect("equal")
+            ax.set_xlabel("ln(S2/S3)")
+            ax.set_ylabel("ln(S1/S2)")
+        else:
+            x, y = vector_math.vollmer_coordinates(np.reshape(values, (-1, 3)))
+            top = np.sqrt(3) / 2
+            ax.plot([0, 1, 0.5, 0], [0, 0, top, 0], color="#000000",
+                    linewidth=1)
+            for text, position, alignment in [("P", (0, 0), "right"),
+                                              ("G", (1, 0), "left"),
+                                              ("R", (0.5, top), "center")]:
+                ax.annotate(text, xy=position, ha=alignment,
+                            va="bottom" if text == "R" else "top")
+            ax.set_xlim(-0.1, 1.1)
+            ax.set_ylim(-0.1, top + 0.1)
+            ax.set_aspect("equal")
+            ax.axis("off")
+
+        for label, (marker, color), point_x, point_y in zip(labels, styles,
+                                                            x, y):
+            ax.plot(point_x, point_y, marker=marker, color=color,
+                    markeredgecolor="#000000", linestyle="None", label=label)
+
+        if self.settings.get_draw_legend() == True and len(labels) > 0:
+            ax.legend(numpoints=1, loc="upper left",
+                      bbox_to_anchor=(1.02, 1), borderpad=1)
+
     def draw_angelier(self, values):
         """
         Draws the Angelier arrows for a fault plane layer.
@@ -1999,12 +3065,26 @@ class MainWindow(object):
                                         arrowprops = dict(arrowstyle = "->",
                                                       connectionstyle = "arc3"))
 
+    def layer_histogram(self, lyr_obj, values, subset, column, bins, limits):
+        """
+        Returns the counts and the bin edges in radians for a rose diagram.
+
+        Whole layers use the cached histogram of the layer, which mapped
+        layers count over all rows of their file. Subsets are counted from
+        the passed values.
+        """
+        if subset is None:
+            counts, edges = lyr_obj.get_histogram(column, int(bins), limits)
+        else:
+            counts, edges = np.histogram(values, int(bins), range=limits)
+        return counts, np.radians(edges)
+
     def plot_layer(self, lyr_obj, subset=None, highlight=False):
         """
         Plots a certain layer or subset of layer.
 
         The method expect a layer-object which should be plotted. If only a
-        subset should be plotted, a list containing the row number sof the
+        subset should be plotted, a set containing the row numbers of the
         subset has to be passed additionally. If the layer or subset should be
         highlighted the method additionally expect a boolean keyword argument:
         highlight = True. Each layer and subset is parsed and then passed to
@@ -2014,7 +3094,7 @@ class MainWindow(object):
             lyr_type = "group"
         else:
             lyr_type = lyr_obj.get_layer_type()
-            store = lyr_obj.get_data_treestore()
+            store = lyr_obj.get_rows()
 
         if lyr_type == "plane":
             strike, dipdir, dip = self.parse_planes(store, subset)
@@ -2030,9 +3110,8 @@ class MainWindow(object):
             if self.ax_rose is not None:
                 num_bins = 360 / lyr_obj.get_rose_spacing()
                 bin_width = 2 * np.pi / num_bins
-                dipdir = np.radians(dipdir)
-                values, bin_edges = np.histogram(dipdir, num_bins,
-                                                 range = (0, 2 * np.pi))
+                values, bin_edges = self.layer_histogram(lyr_obj, dipdir,
+                                            subset, 0, num_bins, (0, 360))
                 self.ax_rose.bar(left = bin_edges[:-1], height = values,
                                      width = bin_width, alpha=0.5,
                                      color = lyr_obj.get_line_color(),
@@ -2042,9 +3121,8 @@ class MainWindow(object):
             if self.ax_drose is not None:
                 num_bins = 90 / lyr_obj.get_dip_rose_spacing()
                 bin_width = (np.pi / 2) / num_bins
-                dip = np.radians(dip)
-                values, bin_edges = np.histogram(dip, num_bins,
-                                                 range = (0, np.pi / 2))
+                values, bin_edges = self.layer_histogram(lyr_obj, dip,
+                                            subset, 1, num_bins, (0, 90))
                 self.ax_drose.bar(left = bin_edges[:-1], height = values,
                                      width = bin_width, alpha=0.5,
                                      color = lyr_obj.get_line_color(),
@@ -2062,9 +3140,8 @@ class MainWindow(object):
             if self.ax_rose is not None:
                 num_bins = 360 / lyr_obj.get_rose_spacing()
                 bin_width = 2 * np.pi / num_bins
-                dipdir = np.radians(dipdir)
-                values, bin_edges = np.histogram(dipdir, num_bins,
-                                                 range = (0, 2 * np.pi))
+                values, bin_edges = self.layer_histogram(lyr_obj, dipdir,
+                                            subset, 0, num_bins, (0, 360))
 
                 self.ax_rose.bar(left = bin_edges[:-1], height = values,
                                      width = bin_width, alpha=0.5,
@@ -2075,9 +3152,8 @@ class MainWindow(object):
             if self.ax_drose is not None:
                 num_bins = 90 / lyr_obj.get_dip_rose_spacing()
                 bin_width = (np.pi / 2) / num_bins
-                dip = np.radians(dip)
-                values, bin_edges = np.histogram(dip, num_bins,
-                                                 range = (0, np.pi / 2))
+                values, bin_edges = self.layer_histogram(lyr_obj, dip,
+                                            subset, 1, num_bins, (0, 90))
                 self.ax_drose.bar(left = bin_edges[:-1], height = values,
                                      width = bin_width, alpha=0.5,
                                      color = lyr_obj.get_marker_fill(),
@@ -2085,16 +3161,16 @@ class MainWindow(object):
                                      bottom = lyr_obj.get_rose_bottom())
 
             if lyr_obj.get_draw_mean_vector() == True:
-                self.draw_mean_vector(lyr_obj, dipdir, dip)
+                self.draw_mean_vector(lyr_obj, subset)
 
             if lyr_obj.get_draw_fisher_sc() == True:
-                self.draw_fisher_smallcircle(lyr_obj, dipdir, dip)
+                self.draw_fisher_smallcircle(lyr_obj, subset)
 
         elif lyr_type == "faultplane":
             strike, plane_dir, plane_dip, line_dir, line_dip, \
                 sense, line_sense_dir, line_sense_dip, \
                 lp_plane_dir, lp_plane_dip = (
-                self.parse_faultplanes(store, subset))
+                self.parse_faultplanes(lyr_obj, subset))
 
             if lyr_obj.get_draw_gcircles() == True:
                 self.draw_plane(lyr_obj, strike, plane_dip, highlight=highlight)
@@ -2133,6 +3209,10 @@ class MainWindow(object):
 
             self.draw_contours(lyr_obj, dip, dipdir, "lines")
 
+            if self.view_mode == "pt" and subset is None:
+                self.draw_misfit_histogram(lyr_obj)
+                self.draw_mohr_circle(lyr_obj)
+
     def highlight_selection(self, deselected):
         """
         Gets the current selection and highlights it in the plot.
@@ -2163,9 +3243,9 @@ class MainWindow(object):
                 self.plot_layer(lyr_obj, highlight=True)
 
         def highlight_rows(lyr_obj, data_row_list):
-            row_list_ints = []
+            row_list_ints = set()
             for row in data_row_list:
-                row_list_ints.append(row.get_indices()[0])
+                row_list_ints.add(row.get_indices()[0])
             self.plot_layer(lyr_obj, row_list_ints, highlight=True)
 
         if len(row_list) == 1:
@@ -2219,6 +3299,8 @@ class MainWindow(object):
                 self.ax_stereo, self.ax_fluc, self.ax_mohr = (
                                             self.settings.get_pt_view())
                 inverted_transform_stereonet()
+            elif self.view_mode in ["woodcock", "vollmer"]:
+                self.ax_fabric = self.settings.get_fabric_view()
 
         def clear_stereo():
             self.ax_stereo.cla()
@@ -2255,6 +3337,10 @@ class MainWindow(object):
             clear_stereo()
             clear_fluc()
             clear_mohr()
+        elif self.view_mode in ["woodcock", "vollmer"]:
+            self.draw_fabric_diagram()
+            self.canvas.draw()
+            return
 
         if self.settings.get_draw_grid_state() == True:
             self.ax_stereo.grid(linestyle = self.settings.get_grid_linestyle(),
@@ -2299,6 +3385,11 @@ class MainWindow(object):
                 return
 
             self.plot_layer(lyr_obj)
+            if lyr_obj is not None and lyr_obj.get_load_error() is not None:
+                self.statbar.push(1, _("Could not load the data of {0}: {1}")
+                                  .format(lyr_obj.get_label(),
+                                          lyr_obj.get_load_error()))
+                lyr_obj.set_load_error(None)
 
         self.sc_labels = []
         self.sc_handlers = []
@@ -2439,6 +3530,19 @@ class MainWindow(object):
         """
         Gtk.main_quit()
 
+    def check_editable(self, lyr_obj):
+        """
+        Returns True if the rows of a layer can be edited.
+
+        The rows of mapped layers are read from a file and can not be edited.
+        For them a message is pushed to the statusbar and False is returned.
+        """
+        if lyr_obj is not None and lyr_obj.is_mapped():
+            self.statbar.push(1, _("Layers that are mapped from a file can "
+                                   "not be edited!"))
+            return False
+        return True
+
     def on_toolbutton_remove_feature_clicked(self, widget):
         """
         Triggered when the toolbutton "remove feature" is clicked. Removes all
@@ -2450,6 +3554,8 @@ class MainWindow(object):
         if len(row_list) == 1:
             row = row_list[0]
             lyr_obj = model[row][3]
+            if not self.check_editable(lyr_obj):
+                return
             data_treeview = lyr_obj.get_data_treeview()
             data_treestore = lyr_obj.get_data_treestore()
             data_selection = data_treeview.get_selection()
@@ -2586,6 +3692,8 @@ class MainWindow(object):
         if len(row_list) == 1:
             layer = row_list[0]
             current = model[layer][3]
+            if not self.check_editable(current):
+                return
             data_treestore = current.get_data_treestore()
             if data_treestore is not None:
                 layer_type = current.get_layer_type()
@@ -2616,6 +3724,8 @@ class MainWindow(object):
         if event.inaxes is not None:
             if self.draw_features == False:
                 selection.unselect_all()
+                if event.inaxes.get_title() == "ax_stereo":
+                    self.select_nearest_feature(event)
                 return
 
             selection = self.layer_view.get_selection()
@@ -2633,6 +3743,8 @@ class MainWindow(object):
             if lyr_obj == None:
                 #Layer is a layer-group
                 return
+            if not self.check_editable(lyr_obj):
+                return
             data_treestore = lyr_obj.get_data_treestore()
 
             if data_treestore is not None:
@@ -2654,6 +3766,57 @@ class MainWindow(object):
             if self.draw_features == False:
                 selection.unselect_all()
 
+    def find_nearest_feature(self, mpl_event, tolerance=3):
+        """
+        Finds the feature that is closest to the position of a mpl_event.
+
+        All visible layers are searched with their spatial index, so each
+        layer only needs a lookup instead of a scan of its data. Features
+        that are farther away than the tolerance (in degrees) are ignored.
+        Returns the path of the layer, the layer-object, the row number and
+        the angle, or None if no feature is close enough.
+        """
+        dipdir, dip = self.convert_xy_to_dirdip(mpl_event)
+        vector = vector_math.line_to_vector(dipdir, dip)[0]
+        nearest = []
+
+        def iterate_over_rows(model, path, itr):
+            lyr_obj = model[path][3]
+            if lyr_obj is None or model[path][0] == False:
+                return
+            row, angle = lyr_obj.find_nearest_row(vector)
+            if row is None or angle > tolerance:
+                return
+            if len(nearest) == 0 or angle < nearest[3]:
+                nearest[:] = [path.copy(), lyr_obj, row, angle]
+
+        self.layer_store.foreach(iterate_over_rows)
+        if len(nearest) == 0:
+            return None
+        return nearest
+
+    def select_nearest_feature(self, mpl_event):
+        """
+        Selects the feature that was clicked in the stereonet.
+
+        The layer of the closest feature is selected in the layer-view, which
+        shows its data-view, and the row of the feature is selected and
+        scrolled into view.
+        """
+        nearest = self.find_nearest_feature(mpl_event)
+        if nearest is None:
+            return
+
+        path, lyr_obj, row, angle = nearest
+        self.layer_view.expand_to_path(path)
+        selection = self.layer_view.get_selection()
+        selection.select_path(path)
+        data_treeview = lyr_obj.get_data_treeview()
+        data_selection = data_treeview.get_selection()
+        data_selection.unselect_all()
+        data_selection.select_path(row)
+        data_treeview.scroll_to_cell(row, None, False, 0, 0)
+
     def mpl_motion_event(self, mpl_event):
         """
         Catches motion events on the mpl canvas and plots.
@@ -2718,7 +3881,15 @@ class MainWindow(object):
             #Ensure 000/00 formatting
             alpha_deg = str(alpha_deg).rjust(3, "0")
             gamma_deg = str(gamma_deg).rjust(2, "0")
-            self.statbar.push(1, ("{0} / {1}".format(alpha_deg, gamma_deg)))
+            message = "{0} / {1}".format(alpha_deg, gamma_deg)
+            nearest = self.find_nearest_feature(mpl_event)
+            if nearest is not None:
+                path, lyr_obj, row, angle = nearest
+                data = lyr_obj.get_row(row)
+                message = "{0}    {1}: {2}, {3} {4} ({5:03.0f} / {6:02.0f})".format(
+                            message, _("Nearest"), lyr_obj.get_label(),
+                            _("row"), row + 1, data[0], data[1])
+            self.statbar.push(1, message)
 
         def push_rose_coordinates(mpl_event):
             self.statbar.push(1, (_("Rose Diagram")))
@@ -2733,6 +3904,8 @@ class MainWindow(object):
                 self.statbar.push(1, ("Fluctuation Histogram"))
             elif title == "ax_mohr":
                 self.statbar.push(1, ("Mohr Circle"))
+            elif title == "ax_fabric":
+                self.statbar.push(1, _("Fabric Diagram"))
             else:
                 pass
 
@@ -2776,12 +3949,36 @@ class MainWindow(object):
         if len(row_list) == 1:
             row = row_list[0]
             lyr_obj = model[row][3]
+            if text_file.endswith(MAPPED_EXTENSION):
+                self.add_mapped_layer(text_file, lyr_obj, model.get_iter(row))
+                return
+            if not self.check_editable(lyr_obj):
+                return
             fp = FileParseDialog(text_file, lyr_obj, self.redraw_plot,
-                                 self.add_planar_feature,
-                                 self.add_linear_feature,
-                                 self.add_faultplane_feature, self.main_window)
+                                 self.main_window, self.statbar)
             fp.run()
 
+    def add_mapped_layer(self, array_file, lyr_obj, itr):
+        """
+        Adds a layer that maps its data from a .npy file.
+
+        The new layer has the type of the selected plane or linear layer and
+        is added after it. Its columns stay in the file, which is only read
+        in chunks when the layer is drawn.
+        """
+        if lyr_obj is None or lyr_obj.get_layer_type() not in ["plane",
+                                                               "line"]:
+            self.statbar.push(1, _("Please select a plane or line layer!"))
+            return
+
+        lyr_obj_new = self.create_layer(lyr_obj.get_layer_type(), array_file)
+        if not lyr_obj_new.is_mapped():
+            return
+        self.layer_store.insert_after(self.layer_store.iter_parent(itr), itr,
+                [True, lyr_obj_new.get_pixbuf(), lyr_obj_new.get_label(),
+                 lyr_obj_new])
+        self.redraw_plot()
+
     def on_toolbutton_export_clicked(self, toolbutton):
         # pylint: disable=unused-argument
         """
@@ -2789,88 +3986,66 @@ class MainWindow(object):
 
         Triggered when user clicks on the toolbutton_export. Creates an instance
         of the FileChooserExport class and runs the dialog. Checks if the user
-        has selected a layer first.
+        has selected a layer or folder first.
         """
         selection = self.layer_view.get_selection()
         model, row_list = selection.get_selected_rows()
 
-        if len(row_list) == 1:
-            self.redraw_plot()
-            exportdialog = FileChooserExport(self.export_data, self.main_window)
-            exportdialog.run()
-
-        elif len(row_list) == 0:
-            self.statbar.push(1, ("Please select a layer to export."))
+        if len(row_list) == 0:
+            self.statbar.push(1, _("Please select a layer to export."))
             self.canvas.draw()
+            return
 
-        elif len(row_list) > 1:
-            self.statbar.push(1, ("Please select only one layer to export."))
-            self.canvas.draw()
+        self.redraw_plot()
+        exportdialog = FileChooserExport(self.export_data, self.main_window)
+        exportdialog.run()
 
     def export_data(self, save_location):
         """
         Exports data to a location that is passes by the FileExportDialog.
 
         This method receives a save_location from the FileExportDialog class.
-        A CSV file is created at that location. Depending on the layer type a
-        different header is written to the file and it then iterates over
-        all rows.
+        All selected layers and the layers in selected folders are collected
+        in the order of the layer tree and passed to data_export, which
+        writes them in one pass. The format is chosen by the file extension.
+        Mapped layers export all rows of their file.
         """
         selection = self.layer_view.get_selection()
         model, row_list = selection.get_selected_rows()
+        selected = [str(row) for row in row_list]
+        layers = []
 
-        def iterate_over_planes(model, path, itr):
-            r = model[path]
-            writer.writerow({"dip-direction": r[0], "dip": r[1],
-                             "stratigraphy": r[2]})
-
-        def iterate_over_linears(model, path, itr):
-            r = model[path]
-            writer.writerow({"dip-direction": r[0], "dip": r[1],
-                             "sense": r[2]})
-
-        def iterate_over_faultplanes(model, path, itr):
-            r = model[path]
-            writer.writerow({"plane-dip-direction": r[0],
-                             "plane-dip": r[1],
-                             "linear-dip-direction": r[2],
-                             "linear-dip": r[3],
-                             "linear-sense": r[4]})
-
-        def iterate_over_smallcircles(model, path, itr):
-            r = model[path]
-            writer.writerow({"dip-direction": r[0],
-                             "dip": r[1],
-                             "opening-angle": r[2]})
+        def iterate_over_store(model, path, itr):
+            """
+            Collects the selected layers and the layers in selected folders.
+            """
+            path_str = str(path)
+            lyr_obj = model[itr][3]
+            if lyr_obj is None:
+                return
+            for start_path in selected:
+                if (path_str == start_path or
+                        path_str.startswith(start_path + ":")):
+                    layers.append((lyr_obj.get_label(),
+                                   lyr_obj.get_layer_type(),
+                                   lyr_obj.get_row_count(),
+                                   partial(lyr_obj.iter_chunks,
+                                           data_export.EXPORT_ROWS)))
+                    return
 
-        row = row_list[0]
-        lyr_obj = model[row][3]
-        data_obj = lyr_obj.get_data_treestore()
+        self.layer_store.foreach(iterate_over_store)
+        if len(layers) == 0:
+            self.statbar.push(1, _("The selected folders contain no layers."))
+            return
 
-        with open(save_location, "w", newline="") as csvfile:
-            lyr_type = lyr_obj.get_layer_type()
-            if lyr_type == "plane":
-                fieldnames = ["dip-direction", "dip", "stratigraphy"]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                data_obj.foreach(iterate_over_planes)
-            elif lyr_type == "line":
-                fieldnames = ["dip-direction", "dip", "sense"]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                data_obj.foreach(iterate_over_linears)
-            elif lyr_type == "faultplane":
-                fieldnames = ["plane-dip-direction", "plane-dip",
-                              "linear-dip-direction", "linear-dip",
-                              "linear-sense"]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                data_obj.foreach(iterate_over_faultplanes)
-            elif lyr_type == "smallcircle":
-                fieldnames = ["dip-direction", "dip", "opening-angle"]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                data_obj.foreach(iterate_over_smallcircles)
+        try:
+            rows = data_export.export_layers(save_location, layers)
+        except OSError as error:
+            self.statbar.push(1, _("Could not export the data: {}").format(
+                                                                    error))
+            return
+        self.statbar.push(1, _("Exported {0} rows of {1} layers.").format(
+                                                        rows, len(layers)))
 
     def on_eb_lbl_layerview_button_press_event(self, eventbox, eventbutton):
         """
@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+
+"""
+Reductions over memory-mapped layer data.
+
+Layers can be backed by a .npy file that is opened with numpy.load in
+mmap_mode, so datasets that are larger than the memory can be viewed. Only
+the parts of the file that are used are read from the disk. The reductions
+in this module (sums of vectors, histograms and density grids) walk over the
+data in chunks of CHUNK_ROWS rows, so they never hold more than one chunk in
+memory. For drawing and for the tools that work on single rows an evenly
+spaced sample of at most DRAW_ROWS rows is used. This module does not depend
+on Gtk.
+"""
+
+import numpy as np
+from . import orientation_statistics
+
+#File extension of arrays that can be mapped into a layer
+MAPPED_EXTENSION = ".npy"
+
+#Number of rows that are reduced at once
+CHUNK_ROWS = 1000000
+
+#Largest number of rows that are drawn for a mapped layer
+DRAW_ROWS = 20000
+
+#Fraction of the area of the hemisphere that the Schmidt method counts in
+SCHMIDT_AREA = 0.01
+
+
+def open_columns(filename):
+    """
+    Opens a .npy file as memory-mapped columns.
+
+    The file can either hold a two-dimensional array with one column for
+    each column of the layer, or a structured array with one field for each
+    column, as they are written by project_archive.columns_to_array. At
+    least the dip-directions and dips are needed. Returns a list of
+    memory-mapped arrays. Raises a ValueError for other arrays.
+    """
+    array = np.load(filename, mmap_mode="r", allow_pickle=False)
+    if array.dtype.names is not None:
+        columns = [array[name] for name in array.dtype.names]
+    elif array.ndim == 2:
+        columns = [array[:, i] for i in range(array.shape[1])]
+    else:
+        columns = []
+    if len(columns) < 2:
+        raise ValueError("Expected an array with at least two columns")
+    return columns
+
+
+def iter_chunks(columns, rows=CHUNK_ROWS):
+    """
+    Iterates over the columns in chunks of rows.
+
+    Yields lists with one in-memory array for each column.
+    """
+    for start in range(0, len(columns[0]), rows):
+        yield [np.asarray(column[start:start + rows]) for column in columns]
+
+
+def sample_rows(count, rows=DRAW_ROWS):
+    """
+    Returns the row numbers of a level-of-detail sample.
+
+    Up to the given number of rows all rows are returned. Larger datasets are
+    represented by evenly spaced rows, so the sample keeps the distribution of
+    data that is stored in any order.
+    """
+    if count <= rows:
+        return np.arange(count)
+    return np.linspace(0, count - 1, rows).astype(int)
+
+
+def finite_vectors(vectors):
+    """
+    Drops the vectors of rows with missing or invalid angles.
+    """
+    return vectors[np.all(np.isfinite(vectors), axis=1)]
+
+
+def vector_sums(chunks, to_vectors):
+    """
+    Sums the vectors of all rows chunk by chunk.
+
+    Expects an iterable of chunks of columns and a function that converts
+    the first two columns into unit vectors. Returns the resultant vector,
+    the orientation tensor and the number of vectors, which are everything
+    that vector_math.resultant_statistics and the eigenvectors need.
+    """
+    resultant = np.zeros(3)
+    tensor = np.zeros((3, 3))
+    count = 0
+    for chunk in chunks:
+        vectors = finite_vectors(to_vectors(chunk[0], chunk[1]))
+        resultant += np.sum(vectors, axis=0)
+        tensor += np.dot(vectors.T, vectors)
+        count += len(vectors)
+    return resultant, tensor, count
+
+
+def chunked_histogram(chunks, column, bins, limits):
+    """
+    Counts the values of one column in a histogram, chunk by chunk.
+
+    Returns the counts and the edges of the bins like numpy.histogram.
+    """
+    edges = np.linspace(limits[0], limits[1], int(bins) + 1)
+    counts = np.zeros(int(bins), dtype=int)
+    for chunk in chunks:
+        values = np.asarray(chunk[column], dtype=float)
+        values = values[np.isfinite(values)]
+        counts += np.histogram(values, edges)[0]
+    return counts, edges
+
+
+def contour_kernel(method, cosine, smoothing):
+    """
+    Returns the weights of a contour method for the cosines to a station.
+
+    The kernels are the ones of the contour methods of mplstereonet. Their
+    width is given by the factor f of the exponential Kamb kernel
+    exp(f * (|cos| - 1)). The counting circle of the other Kamb methods has
+    the radius 1 - 2 / f, which is the same for the same number of rows and
+    sigma, and the Schmidt method counts in a circle of 1 % of the area.
+    Raises a ValueError for other methods.
+    """
+    radius = 1 - 2.0 / smoothing
+    inside = cosine >= radius
+    if method == "exponential_kamb":
+        return np.exp(smoothing * (cosine - 1))
+    elif method == "linear_kamb":
+        return np.where(inside, 2 / (1 - radius) * (cosine - radius), 0)
+    elif method == "square_kamb":
+        return np.where(inside, 3 / (1 - radius) ** 2 *
+                                (cosine - radius) ** 2, 0)
+    elif method == "kamb":
+        return inside.astype(float)
+    elif method == "schmidt":
+        return (cosine >= 1 - SCHMIDT_AREA).astype(float)
+    raise ValueError("Unknown contour method {}".format(method))
+
+
+def contour_units(method, total, smoothing):
+    """
+    Returns the offset and unit that convert the kernel sums into densities.
+
+    The Kamb methods give standard deviations from a uniform distribution,
+    the Schmidt method gives the number of rows per 1 % of the area, like
+    the contour methods of mplstereonet.
+    """
+    if method == "schmidt":
+        return 0, total * SCHMIDT_AREA
+    if method == "exponential_kamb":
+        return 0.5, np.sqrt(total * (smoothing / 2 - 1) / smoothing ** 2)
+    radius = 1 - 2.0 / smoothing
+    return 0.5, np.sqrt(total * radius * (1 - radius))
+
+
+def density_grid(chunks, to_vectors, gridsize=100, sigma=3, bins=256,
+                 method="exponential_kamb"):
+    """
+    Calculates the density contours of all rows, chunk by chunk.
+
+    The vectors of each chunk are counted in an equal-area grid of bins, and
+    the counts are summed at the counting grid of the stereonet with the
+    kernel of the contour method (see contour_kernel) for the total number
+    of rows. For very large datasets the kernels would be narrower than the
+    bins, so they are limited to a width of about two bins. The densities
+    are given in the same units as the contours of mplstereonet, so mapped
+    layers can use the same contour intervals as other layers. Returns the
+    longitudes, latitudes and densities, or None if there are no rows.
+    """
+    counts = np.zeros(bins * bins)
+    for chunk in chunks:
+        vectors = finite_vectors(to_vectors(chunk[0], chunk[1]))
+        counts += np.bincount(orientation_statistics.lambert_bins(vectors,
+                                                                  bins),
+                              minlength=bins * bins)
+    total = np.sum(counts)
+    if total == 0:
+        return None
+
+    smoothing = min(2 * (1 + total / float(sigma ** 2)), (bins / 4.0) ** 2)
+    lon, lat, sums = orientation_statistics.kernel_sums(counts, bins,
+                    gridsize,
+                    lambda cosine: contour_kernel(method, cosine, smoothing))
+    offset, units = contour_units(method, total, smoothing)
+    density = np.maximum((sums - offset) / units, 0)
+    if method not in ("kamb", "schmidt"):
+        density[density == 0] = np.finfo(float).tiny
+    return lon, lat, density.reshape(gridsize, gridsize)
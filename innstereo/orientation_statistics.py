@@ -0,0 +1,800 @@
+#!/usr/bin/python3
+
+"""
+Statistical methods for orientation data that need a lot of calculations.
+
+This module contains the bootstrap confidence regions of eigenvectors and mean
+vectors, the clustering into sets, the beta-diagram of plane intersections,
+the analyses of slopes and faults and the fitting of small circles. The
+calculations are done in batches of arrays, and large jobs are spread over a
+pool of processes by the vector_math.parallel_map function. The functions
+expect the data as (n, 3)-arrays of unit vectors, as they are returned by the
+layers.
+"""
+
+import numpy as np
+import scipy.optimize as optimize
+import mplstereonet
+from . import vector_math
+
+#Largest number of counts that one batch of resamples may hold
+BATCH_ELEMENTS = 1000000
+
+#Jobs with fewer counts are not sent to the process pool
+PARALLEL_ELEMENTS = 20000000
+
+#Largest batch of long element-wise calculations, which stay in the cache
+CACHE_ELEMENTS = 100000
+
+
+def resample_sums(values, size, seed):
+    """
+    Returns the column sums of a number of bootstrap resamples.
+
+    Expects an (n, m)-array of values. Each resample draws n rows with
+    replacement. Instead of gathering the rows, the number of times each row
+    was drawn is counted, and the sums of a whole batch are calculated as one
+    matrix product. Batches contain at most BATCH_ELEMENTS counts. Returns a
+    (size, m)-array. This function is called in the worker processes.
+    """
+    random_state = np.random.RandomState(seed)
+    rows = len(values)
+    batch = max(1, BATCH_ELEMENTS // rows)
+    sums = []
+    for start in range(0, size, batch):
+        count = min(batch, size - start)
+        index = random_state.randint(0, rows, (count, rows))
+        index += np.arange(count)[:, np.newaxis] * rows
+        weights = np.bincount(index.ravel(), minlength=count * rows)
+        sums.append(np.dot(weights.reshape(count, rows), values))
+    return np.concatenate(sums)
+
+
+def bootstrap_sums(values, samples, seed=None):
+    """
+    Calculates the column sums of bootstrap resamples on all processors.
+
+    The number of samples is split into one task per processor if the job
+    is large enough. Each task gets its own seed, so that the resamples are
+    independent. Returns a (samples, m)-array.
+    """
+    values = np.asarray(values, dtype=float)
+    tasks = vector_math.split_tasks(samples,
+                                    PARALLEL_ELEMENTS // max(1, len(values)))
+    seeds = np.random.RandomState(seed).randint(0, 2**31 - 1, len(tasks))
+    sums = vector_math.parallel_map(resample_sums,
+                    [(values, size, task_seed)
+                     for size, task_seed in zip(tasks, seeds)])
+    return np.concatenate(sums)
+
+
+def cone_angles(samples, center, confidence, axial):
+    """
+    Returns the opening angle that contains a percentage of the samples.
+
+    Expects an (n, 3)-array of resampled directions and the direction of the
+    whole dataset. Axial data is compared without its sign.
+    """
+    cosine = np.dot(vector_math.normalize(samples), center)
+    if axial:
+        cosine = np.abs(cosine)
+    angles = np.degrees(np.arccos(np.clip(cosine, -1, 1)))
+    return np.percentile(angles, confidence)
+
+
+def bootstrap_eigenvectors(vectors, samples=1000, confidence=95, seed=None):
+    """
+    Calculates bootstrap confidence cones for the three eigenvectors.
+
+    Expects an (n, 3)-array of unit vectors. The orientation tensors of the
+    resamples are calculated from the six independent products of each
+    vector. Returns the eigenvectors of the whole dataset as a (3, 3)-array
+    (largest eigenvalue first), the three cone angles in degrees and a
+    (samples, 3, 3)-array of the resampled eigenvectors.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    x, y, z = vectors.T
+    products = np.column_stack((x * x, y * y, z * z, x * y, x * z, y * z))
+    sums = bootstrap_sums(products, samples, seed)
+
+    tensors = np.empty((len(sums), 3, 3))
+    for k, (i, j) in enumerate([(0, 0), (1, 1), (2, 2),
+                                (0, 1), (0, 2), (1, 2)]):
+        tensors[:, i, j] = sums[:, k]
+        tensors[:, j, i] = sums[:, k]
+
+    resampled = np.linalg.eigh(tensors)[1][:, :, ::-1].transpose(0, 2, 1)
+    center = np.linalg.eigh(vector_math.orientation_tensor(vectors))[1]
+    center = center[:, ::-1].T
+    cones = np.array([cone_angles(resampled[:, k], center[k], confidence,
+                                  axial=True) for k in range(3)])
+    return center, cones, resampled
+
+
+def bootstrap_mean_vector(vectors, samples=1000, confidence=95, seed=None):
+    """
+    Calculates a bootstrap confidence cone for the mean vector.
+
+    Expects an (n, 3)-array of unit vectors. Returns the mean vector of the
+    whole dataset, the cone angle in degrees and a (samples, 3)-array of the
+    resampled mean vectors.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    resampled = vector_math.normalize(bootstrap_sums(vectors, samples, seed))
+    center = vector_math.normalize(np.sum(vectors, axis=0))[0]
+    cone = cone_angles(resampled, center, confidence, axial=False)
+    return center, cone, resampled
+
+
+def assign_clusters(vectors, centers, axial):
+    """
+    Assigns each vector to the most similar center.
+
+    The cosines between vectors and centers are calculated in batches of at
+    most BATCH_ELEMENTS elements. Axial data is compared without its sign.
+    Returns the index of the closest center and the cosine to it for each
+    vector.
+    """
+    labels = np.empty(len(vectors), dtype=int)
+    similarity = np.empty(len(vectors))
+    batch = max(1, BATCH_ELEMENTS // len(centers))
+    for start in range(0, len(vectors), batch):
+        cosine = np.dot(vectors[start:start + batch], centers.T)
+        if axial:
+            cosine = np.abs(cosine)
+        labels[start:start + batch] = np.argmax(cosine, axis=1)
+        similarity[start:start + batch] = np.max(cosine, axis=1)
+    return labels, similarity
+
+
+def initial_centers(vectors, sets, random_state, axial):
+    """
+    Chooses the starting centers of the k-means clustering.
+
+    The first center is a random vector, each further center is drawn with a
+    probability that increases with the angular distance to the centers that
+    were already chosen (k-means++).
+    """
+    centers = [vectors[random_state.randint(len(vectors))]]
+    for k in range(1, sets):
+        labels, similarity = assign_clusters(vectors, np.array(centers), axial)
+        weights = np.clip(1 - similarity, 0, None)
+        if np.sum(weights) == 0:
+            weights = np.ones(len(vectors))
+        centers.append(vectors[random_state.choice(len(vectors),
+                                                   p=weights / np.sum(weights))])
+    return np.array(centers)
+
+
+def spherical_kmeans(vectors, sets, seed, axial=True, iterations=100):
+    """
+    Runs one spherical k-means clustering from a random start.
+
+    Each center is the normalized resultant of its vectors. For axial data
+    the vectors are flipped towards their center before they are added.
+    Returns the centers, the labels and the summed similarity of all vectors
+    to their centers. This function is called in the worker processes.
+    """
+    random_state = np.random.RandomState(seed)
+    centers = initial_centers(vectors, sets, random_state, axial)
+    labels = None
+    for i in range(iterations):
+        new_labels, similarity = assign_clusters(vectors, centers, axial)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+
+        for k in range(sets):
+            members = vectors[labels == k]
+            if len(members) == 0:
+                centers[k] = vectors[np.argmin(similarity)]
+                continue
+            if axial:
+                members = members * np.where(
+                    np.dot(members, centers[k]) < 0, -1, 1)[:, np.newaxis]
+            centers[k] = vector_math.normalize(np.sum(members, axis=0))[0]
+
+    labels, similarity = assign_clusters(vectors, centers, axial)
+    return centers, labels, np.sum(similarity)
+
+
+def cluster_sets(vectors, sets, restarts=8, axial=True, seed=None):
+    """
+    Divides orientation data into sets by spherical k-means clustering.
+
+    The clustering is repeated from several random starts, which are run on
+    a pool of processes, and the result with the highest summed similarity is
+    kept. The sets are sorted by their number of vectors. Returns the centers
+    as a (sets, 3)-array and the label of each vector.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    seeds = np.random.RandomState(seed).randint(0, 2**31 - 1, restarts)
+    if len(vectors) * sets * restarts < PARALLEL_ELEMENTS:
+        processes = 1
+    else:
+        processes = None
+    results = vector_math.parallel_map(spherical_kmeans,
+                    [(vectors, sets, restart_seed, axial)
+                     for restart_seed in seeds], processes)
+    centers, labels, score = max(results, key=lambda result: result[2])
+
+    order = np.argsort(np.bincount(labels, minlength=sets))[::-1]
+    new_labels = np.empty(sets, dtype=int)
+    new_labels[order] = np.arange(sets)
+    return centers[order], new_labels[labels]
+
+
+def lambert_bins(vectors, bins):
+    """
+    Returns the bin number of each vector in an equal-area grid.
+
+    The vectors are flipped into the lower hemisphere and projected with the
+    Lambert azimuthal equal-area projection onto a square of bins x bins
+    cells. Returns a flat array of bin numbers.
+    """
+    vectors = vector_math.lower_hemisphere(vectors)
+    scale = np.sqrt(2 / (1 + vectors[:, 2]))
+    cells = (vectors[:, :2] * scale[:, np.newaxis] + np.sqrt(2)) \
+            / (2 * np.sqrt(2)) * bins
+    cells = np.clip(cells.astype(int), 0, bins - 1)
+    return cells[:, 0] * bins + cells[:, 1]
+
+
+def bin_centers(bins):
+    """
+    Returns the unit vectors of the centers of an equal-area grid of bins.
+
+    This is the inverse of lambert_bins. Cells outside of the projected
+    hemisphere get the vector of the closest point on the primitive circle.
+    """
+    edges = (np.arange(bins) + 0.5) / bins * 2 * np.sqrt(2) - np.sqrt(2)
+    x, y = [grid.ravel() for grid in np.meshgrid(edges, edges,
+                                                 indexing="ij")]
+    radius = np.minimum(x * x + y * y, 2)
+    scale = np.sqrt(1 - radius / 4)
+    return vector_math.normalize(np.column_stack((x * scale, y * scale,
+                                                  1 - radius / 2)))
+
+
+def intersection_counts(vectors, start, stop, bins, minimum_angle):
+    """
+    Counts the intersections of a range of planes with all following planes.
+
+    Expects the poles of all planes as an (n, 3)-array. The intersections of
+    each plane from start to stop with every plane that comes after it are
+    calculated as cross products, in batches of at most BATCH_ELEMENTS pairs,
+    and counted in an equal-area grid. Pairs of planes that are closer than
+    the minimum angle (in degrees) have no defined intersection and are
+    skipped. Returns the flat array of counts. This function is called in the
+    worker processes.
+    """
+    counts = np.zeros(bins * bins)
+    minimum = np.sin(np.radians(minimum_angle))
+    row = start
+    while row < stop:
+        rows = max(1, min(stop - row,
+                          BATCH_ELEMENTS // max(1, len(vectors) - row)))
+        others = vectors[row + 1:]
+        lines = np.cross(vectors[row:row + rows, np.newaxis], others)
+        later = np.arange(len(others)) >= np.arange(rows)[:, np.newaxis]
+        lines = lines[later]
+        length = np.sqrt(np.sum(lines * lines, axis=1))
+        lines = lines[length >= minimum] / length[length >= minimum,
+                                                  np.newaxis]
+        counts += np.bincount(lambert_bins(lines, bins),
+                              minlength=bins * bins)
+        row += rows
+    return counts
+
+
+def beta_histogram(vectors, bins=256, minimum_angle=1):
+    """
+    Counts all pairwise intersections of a set of planes in a grid of bins.
+
+    Expects the poles of the planes as an (n, 3)-array. The n * (n - 1) / 2
+    intersections are never held in memory at once. The planes are split
+    into ranges with similar numbers of pairs, which are counted on a pool of
+    processes. Returns a flat array of bins * bins counts.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    count = len(vectors)
+    pairs = np.cumsum(np.arange(count - 1, -1, -1))
+    tasks = vector_math.split_tasks(int(pairs[-1]) if count else 0,
+                                    PARALLEL_ELEMENTS)
+    limits = np.searchsorted(pairs, np.cumsum(tasks)[:-1])
+    limits = np.unique(np.concatenate(([0], limits, [count])))
+    counts = vector_math.parallel_map(intersection_counts,
+                    [(vectors, start, stop, bins, minimum_angle)
+                     for start, stop in zip(limits[:-1], limits[1:])])
+    return np.sum(counts, axis=0)
+
+
+def counting_grid(gridsize):
+    """
+    Returns the longitudes and latitudes of the counting grid of mplstereonet.
+
+    Both are (gridsize, gridsize)-arrays.
+    """
+    bound = np.pi / 2
+    return np.mgrid[-bound:bound:gridsize * 1j, -bound:bound:gridsize * 1j]
+
+
+def counting_stations(gridsize):
+    """
+    Returns the counting grid that mplstereonet uses for density contours.
+
+    Returns the longitudes and latitudes of the stations as (gridsize,
+    gridsize)-arrays and their unit vectors as an (n, 3)-array.
+    """
+    lon, lat = counting_grid(gridsize)
+    plunge, bearing = mplstereonet.geographic2plunge_bearing(lon.ravel(),
+                                                             lat.ravel())
+    return lon, lat, vector_math.line_to_vector(bearing, plunge)
+
+
+def kernel_sums(counts, bins, gridsize, kernel):
+    """
+    Sums a grid of counts with a kernel at the counting stations.
+
+    Expects the flat counts of an equal-area grid of bins (see lambert_bins)
+    and a kernel function of the absolute cosines between the stations and
+    the centers of the bins. The stations are the same as the ones of the
+    density contours of mplstereonet, and are calculated in batches.
+    Returns the longitudes and latitudes as (gridsize, gridsize)-arrays and
+    the flat array of sums.
+    """
+    lon, lat, stations = counting_stations(gridsize)
+    occupied = np.flatnonzero(counts)
+    centers = bin_centers(bins)[occupied]
+    weights = counts[occupied]
+    sums = np.empty(len(stations))
+    batch = max(1, BATCH_ELEMENTS // max(1, len(occupied)))
+    for start in range(0, len(stations), batch):
+        cosine = np.abs(np.dot(stations[start:start + batch], centers.T))
+        sums[start:start + batch] = np.dot(kernel(cosine), weights)
+    return lon, lat, sums
+
+
+def histogram_density(counts, bins, gridsize=100, smoothing=100):
+    """
+    Smooths a grid of counts onto the counting grid of the stereonet.
+
+    The counts of all bins are summed with an exponential kernel
+    exp(smoothing * (|cos| - 1)) by kernel_sums. The result is given in
+    multiples of a uniform distribution. Returns the longitudes, latitudes
+    and densities as (gridsize, gridsize)-arrays.
+    """
+    lon, lat, density = kernel_sums(counts, bins, gridsize,
+                            lambda cosine: np.exp(smoothing * (cosine - 1)))
+    uniform = np.sum(counts) * (1 - np.exp(-smoothing)) / smoothing
+    if uniform > 0:
+        density /= uniform
+    return lon, lat, density.reshape(gridsize, gridsize)
+
+
+def beta_density(vectors, gridsize=100, sigma=3, bins=256, minimum_angle=1):
+    """
+    Calculates the density of all pairwise intersections of a set of planes.
+
+    Expects the poles of the planes as an (n, 3)-array. The intersections are
+    counted by beta_histogram and smoothed by histogram_density. The width
+    of the kernel follows the exponential Kamb method for the number of
+    planes, because the intersections are not independent of each other.
+    Returns the longitudes, latitudes and densities of the counting grid and
+    the number of intersections.
+    """
+    counts = beta_histogram(vectors, bins, minimum_angle)
+    smoothing = 2 * (1 + len(vectors) / float(sigma ** 2))
+    lon, lat, density = histogram_density(counts, bins, gridsize, smoothing)
+    return lon, lat, density, int(np.sum(counts))
+
+
+def sample_intersections(vectors, samples, minimum_angle=1, seed=None):
+    """
+    Returns the intersections of randomly drawn pairs of planes.
+
+    Expects the poles of the planes as an (n, 3)-array. Draws pairs of
+    different planes with replacement, so every intersection is equally
+    likely. Pairs closer than the minimum angle are dropped. Returns an
+    (m, 3)-array of unit vectors with m <= samples.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    random_state = np.random.RandomState(seed)
+    first = random_state.randint(0, len(vectors), samples)
+    second = random_state.randint(0, len(vectors) - 1, samples)
+    second[second >= first] += 1
+    lines = np.cross(vectors[first], vectors[second])
+    length = np.sqrt(np.sum(lines * lines, axis=1))
+    keep = length >= np.sin(np.radians(minimum_angle))
+    return lines[keep] / length[keep, np.newaxis]
+
+
+def wedge_counts(vectors, start, stop, slope_dipdir, slope_dip, friction,
+                 minimum_angle):
+    """
+    Counts the sliding wedges of a range of planes with all following planes.
+
+    Expects the poles of all planes as an (n, 3)-array. The intersections of
+    each plane from start to stop with every plane that comes after it are
+    calculated in batches of at most BATCH_ELEMENTS pairs and tested with
+    vector_math.wedge_sliding. Returns the number of sliding wedges that each
+    plane is part of and the number of pairs that were tested. This function
+    is called in the worker processes.
+    """
+    counts = np.zeros(len(vectors), dtype=int)
+    tested = 0
+    minimum = np.sin(np.radians(minimum_angle))
+    row = start
+    while row < stop:
+        rows = max(1, min(stop - row,
+                          BATCH_ELEMENTS // max(1, len(vectors) - row)))
+        others = vectors[row + 1:]
+        lines = np.cross(vectors[row:row + rows, np.newaxis], others)
+        length = np.sqrt(np.sum(lines * lines, axis=2))
+        later = np.arange(len(others)) >= np.arange(rows)[:, np.newaxis]
+        valid = later & (length >= minimum)
+        trend, plunge = vector_math.vector_to_line(lines[valid])
+        sliding = np.zeros(valid.shape, dtype=bool)
+        sliding[valid] = vector_math.wedge_sliding(trend, plunge,
+                                            slope_dipdir, slope_dip, friction)
+        counts[row:row + rows] += np.sum(sliding, axis=1)
+        counts[row + 1:] += np.sum(sliding, axis=0)
+        tested += np.sum(valid)
+        row += rows
+    return counts, tested
+
+
+def wedge_analysis(vectors, slope_dipdir, slope_dip, friction,
+                   minimum_angle=1):
+    """
+    Tests all pairs of planes for wedge sliding on a slope.
+
+    Expects the poles of the planes as an (n, 3)-array. Like the
+    beta-diagram, the pairs are processed in batches, and ranges of planes
+    with similar numbers of pairs are calculated on a pool of processes.
+    Pairs closer than the minimum angle (in degrees) are not tested. Returns
+    the number of sliding wedges that each plane is part of, the number of
+    sliding wedges and the number of tested pairs.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    count = len(vectors)
+    pairs = np.cumsum(np.arange(count - 1, -1, -1))
+    tasks = vector_math.split_tasks(int(pairs[-1]) if count else 0,
+                                    PARALLEL_ELEMENTS)
+    limits = np.searchsorted(pairs, np.cumsum(tasks)[:-1])
+    limits = np.unique(np.concatenate(([0], limits, [count])))
+    results = vector_math.parallel_map(wedge_counts,
+                    [(vectors, start, stop, slope_dipdir, slope_dip,
+                      friction, minimum_angle)
+                     for start, stop in zip(limits[:-1], limits[1:])])
+    counts = np.sum([result[0] for result in results], axis=0)
+    tested = int(sum(result[1] for result in results))
+    return counts, int(np.sum(counts)) // 2, tested
+
+
+def dihedra_counts(stations, normals, slips):
+    """
+    Counts for how many faults each station lies in the compressional field.
+
+    Expects the unit vectors of the stations, and the normals and
+    slip-vectors of the faults as returned by vector_math.fault_slip_vectors.
+    A station lies in the compressional dihedron of a fault if the products
+    of the station with the normal and with the slip-vector have opposite
+    signs. The faults are processed in batches of at most BATCH_ELEMENTS
+    evaluations. This function is called in the worker processes.
+    """
+    counts = np.zeros(len(stations), dtype=int)
+    batch = max(1, BATCH_ELEMENTS // len(stations))
+    for start in range(0, len(normals), batch):
+        normal = np.dot(stations, normals[start:start + batch].T)
+        slip = np.dot(stations, slips[start:start + batch].T)
+        counts += np.sum(normal * slip < 0, axis=1)
+    return counts
+
+
+def right_dihedra(normals, slips, gridsize=100):
+    """
+    Calculates the right-dihedra diagram of a set of faults.
+
+    Each fault divides the sphere into a compressional and an extensional
+    pair of dihedra (Angelier and Mechler, 1977). For every station of the
+    counting grid the percentage of faults that put it into the compressional
+    field is calculated. The faults are split into one task per processor if
+    the job is large enough. Returns the longitudes, latitudes and
+    percentages as (gridsize, gridsize)-arrays.
+    """
+    normals = np.asarray(normals, dtype=float)
+    slips = np.asarray(slips, dtype=float)
+    lon, lat, stations = counting_stations(gridsize)
+    tasks = vector_math.split_tasks(len(normals),
+                                    PARALLEL_ELEMENTS // len(stations))
+    limits = np.concatenate(([0], np.cumsum(tasks)))
+    counts = vector_math.parallel_map(dihedra_counts,
+                    [(stations, normals[start:stop], slips[start:stop])
+                     for start, stop in zip(limits[:-1], limits[1:])])
+    percentage = 100.0 * np.sum(counts, axis=0) / max(1, len(normals))
+    return lon, lat, percentage.reshape(gridsize, gridsize)
+
+
+def stress_tensors(spacing=10, ratio_step=0.1):
+    """
+    Returns a grid of reduced stress tensors for the stress inversion.
+
+    The sigma-1 axes are spread evenly over the lower hemisphere with the
+    given angular spacing (in degrees). For each of them the sigma-3 axis is
+    rotated around sigma-1 in steps of the same spacing, and the stress ratio
+    (sigma-2 - sigma-3) / (sigma-1 - sigma-3) is varied from 0 to 1. Returns
+    the principal axes as a (k, 3, 3)-array with one axis per row, and the
+    ratios.
+    """
+    sigma1 = []
+    for plunge in np.arange(0, 90 + spacing / 2.0, spacing):
+        count = max(1, int(round(360 * np.cos(np.radians(plunge)) /
+                                 spacing)))
+        trends = np.arange(count) * 360.0 / count
+        sigma1.append(vector_math.line_to_vector(trends,
+                                                 np.full(count, plunge)))
+    sigma1 = vector_math.normalize(np.concatenate(sigma1))
+
+    reference = np.where(np.abs(sigma1[:, 2:3]) > 0.9, [[1, 0, 0]],
+                         [[0, 0, 1]])
+    first = vector_math.normalize(np.cross(sigma1, reference))
+    second = np.cross(sigma1, first)
+    angles = np.radians(np.arange(0, 180, spacing))
+    sigma3 = (first[:, np.newaxis] * np.cos(angles)[:, np.newaxis] +
+              second[:, np.newaxis] * np.sin(angles)[:, np.newaxis])
+    sigma1 = np.repeat(sigma1, len(angles), axis=0)
+    sigma3 = sigma3.reshape(-1, 3)
+    axes = np.stack((sigma1, np.cross(sigma3, sigma1), sigma3), axis=1)
+    return expand_ratios(axes, np.arange(0, 1 + ratio_step / 2.0,
+                                         ratio_step))
+
+
+def refined_tensors(axes, spacing=2.5, extent=10, ratio_step=0.05):
+    """
+    Returns a finer grid of stress tensors around a given tensor.
+
+    The principal axes are rotated around all rotation vectors of a cubic
+    grid with the given spacing and extent (in degrees), and the stress ratio
+    is varied from 0 to 1 in finer steps. Returns the axes and ratios like
+    stress_tensors.
+    """
+    steps = np.radians(np.arange(-extent, extent + spacing / 2.0, spacing))
+    rotation = np.array(np.meshgrid(steps, steps, steps)).reshape(3, -1).T
+    angle = np.sqrt(np.sum(rotation * rotation, axis=1))
+    axis = vector_math.normalize(rotation)
+    cross = np.zeros((len(axis), 3, 3))
+    cross[:, 0, 1], cross[:, 0, 2], cross[:, 1, 2] = (-axis[:, 2],
+                                                      axis[:, 1], -axis[:, 0])
+    cross -= cross.transpose(0, 2, 1)
+    matrices = (np.eye(3) + np.sin(angle)[:, np.newaxis, np.newaxis] * cross +
+                (1 - np.cos(angle))[:, np.newaxis, np.newaxis] *
+                np.matmul(cross, cross))
+    return expand_ratios(np.matmul(axes, matrices.transpose(0, 2, 1)),
+                         np.arange(0, 1 + ratio_step / 2.0, ratio_step))
+
+
+def expand_ratios(axes, ratios):
+    """
+    Combines each set of principal axes with each stress ratio.
+    """
+    return (np.repeat(axes, len(ratios), axis=0),
+            np.tile(ratios, len(axes)))
+
+
+def slip_cosines(normals, slips, axes, ratios):
+    """
+    Returns the cosines between the observed and predicted slip directions.
+
+    The reduced tensors have the principal values (1, ratio, 0), with
+    compression positive, so the traction on a fault only depends on the
+    projections of the normal and slip-vector onto sigma-1 and sigma-2. The
+    predicted slip is opposite to the shear traction on the hanging wall.
+    Faults without shear stress get a cosine of 0. Returns an (n, k)-array.
+    """
+    normal1 = np.dot(normals, axes[:, 0].T)
+    normal2 = np.dot(normals, axes[:, 1].T)
+    slip = np.dot(slips, axes[:, 0].T) * normal1 + \
+           ratios * np.dot(slips, axes[:, 1].T) * normal2
+    normal1 *= normal1
+    normal2 *= normal2
+    normal = normal1 + ratios * normal2
+    shear = normal1 + ratios * ratios * normal2 - normal * normal
+    shear = np.sqrt(np.clip(shear, 0, None, out=shear), out=shear)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cosine = np.where(shear > 0, -slip / shear, 0)
+    return np.clip(cosine, -1, 1, out=cosine)
+
+
+def stress_misfit(normals, slips, axes, ratios):
+    """
+    Returns the mean cosine of the slip misfit for each stress tensor.
+
+    The tensors are evaluated in batches of at most CACHE_ELEMENTS fault and
+    tensor combinations. This function is called in the worker processes.
+    """
+    batch = max(1, CACHE_ELEMENTS // len(normals))
+    scores = np.empty(len(ratios))
+    for start in range(0, len(ratios), batch):
+        scores[start:start + batch] = np.mean(slip_cosines(normals, slips,
+                        axes[start:start + batch], ratios[start:start + batch]),
+                        axis=0)
+    return scores
+
+
+def best_tensor(normals, slips, axes, ratios):
+    """
+    Returns the index of the tensor with the largest mean slip cosine.
+
+    The tensors are split into one task per processor if the job is large
+    enough.
+    """
+    tasks = vector_math.split_tasks(len(ratios),
+                                    PARALLEL_ELEMENTS // len(normals))
+    limits = np.concatenate(([0], np.cumsum(tasks)))
+    scores = vector_math.parallel_map(stress_misfit,
+                    [(normals, slips, axes[start:stop], ratios[start:stop])
+                     for start, stop in zip(limits[:-1], limits[1:])])
+    return np.argmax(np.concatenate(scores))
+
+
+def stress_inversion(normals, slips, spacing=10):
+    """
+    Finds the reduced stress tensor that best explains a set of faults.
+
+    Expects the normals and slip-vectors as returned by
+    vector_math.fault_slip_vectors. Following the Wallace-Bott hypothesis,
+    each fault slips parallel to the resolved shear stress. The tensor with
+    the largest mean cosine between observed and predicted slip is searched
+    on the grid of stress_tensors, and then on a finer grid around the best
+    tensor. Returns a dictionary with the principal axes ("axes", sigma-1
+    first), the stress ratio ("ratio"), the tensor ("tensor"), the misfit
+    angle of each fault in degrees ("misfits") and the normals and
+    slip-vectors of the faults ("normals", "slips").
+    """
+    normals = np.asarray(normals, dtype=float)
+    slips = np.asarray(slips, dtype=float)
+    axes, ratios = stress_tensors(spacing)
+    best = best_tensor(normals, slips, axes, ratios)
+    axes, ratios = refined_tensors(axes[best], spacing / 4.0, spacing)
+    best = best_tensor(normals, slips, axes, ratios)
+
+    axes, ratio = axes[best], ratios[best]
+    cosine = slip_cosines(normals, slips, axes[np.newaxis],
+                          np.array([ratio]))[:, 0]
+    tensor = np.dot(axes.T, np.dot(np.diag([1, ratio, 0]), axes))
+    return {"axes": vector_math.lower_hemisphere(axes), "ratio": ratio,
+            "tensor": tensor, "misfits": np.degrees(np.arccos(cosine)),
+            "normals": normals, "slips": slips}
+
+
+def small_circle_misfit(axis, vectors):
+    """
+    Returns the least-squares misfit of a small circle and its gradient.
+
+    Expects an unnormalized axis and an (n, 3)-array of unit vectors. For a
+    given axis the best opening angle is the one whose cosine is the mean of
+    the absolute cosines between vectors and axis, so the misfit is the sum
+    of the squared deviations from that mean. The directions are axial. This
+    function is passed to scipy.optimize.minimize.
+    """
+    length = np.sqrt(np.dot(axis, axis))
+    unit = axis / length
+    cosine = np.dot(vectors, unit)
+    sign = np.where(cosine < 0, -1, 1)
+    deviation = sign * cosine
+    deviation -= np.mean(deviation)
+    gradient = np.dot(deviation * sign, vectors)
+    gradient = 2 * (gradient - np.dot(gradient, unit) * unit) / length
+    return np.dot(deviation, deviation), gradient
+
+
+def fit_small_circle_from(vectors, start):
+    """
+    Fits a small circle to a set of vectors from one starting axis.
+
+    Uses the analytic gradient of small_circle_misfit with a quasi-Newton
+    optimizer. Returns the axis as a unit vector, the opening angle in
+    degrees and the misfit. This function is called in the worker processes.
+    """
+    result = optimize.minimize(small_circle_misfit, start, args=(vectors,),
+                               jac=True, method="BFGS")
+    axis = vector_math.normalize(result.x)[0]
+    angle = np.degrees(np.arccos(np.clip(np.mean(np.abs(
+                                    np.dot(vectors, axis))), -1, 1)))
+    return axis, angle, result.fun
+
+
+def fit_small_circle(vectors, starts=8, seed=None):
+    """
+    Finds the small circle that fits a set of directions best.
+
+    This is used for conical folds, whose poles lie on a small circle around
+    the fold axis. The optimization is started from the three eigenvectors
+    of the orientation tensor and from random axes, which are run on a pool
+    of processes for large datasets, and the best result is kept. Returns the
+    axis as a lower hemisphere unit vector, the opening angle in degrees (at
+    most 90) and the root mean square deviation of the vectors from the
+    circle in degrees.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    eigenvectors = np.linalg.eigh(vector_math.orientation_tensor(vectors))[1]
+    random_axes = np.random.RandomState(seed).normal(size=(max(0, starts -
+                                                               3), 3))
+    start_axes = np.concatenate((eigenvectors.T, random_axes))
+    if len(vectors) * len(start_axes) < PARALLEL_ELEMENTS:
+        processes = 1
+    else:
+        processes = None
+    results = vector_math.parallel_map(fit_small_circle_from,
+                    [(vectors, start) for start in start_axes], processes)
+    axis, angle, misfit = min(results, key=lambda result: result[2])
+
+    residual = np.degrees(np.arccos(np.clip(np.abs(np.dot(vectors, axis)),
+                                            -1, 1))) - angle
+    return (vector_math.lower_hemisphere(axis)[0], angle,
+            np.sqrt(np.mean(residual * residual)))
+
+
+def uniform_statistics(count, samples, seed):
+    """
+    Calculates test statistics of random samples from a uniform distribution.
+
+    Each sample contains count uniformly distributed axes, which are flipped
+    into the lower hemisphere like the measured vectors. The samples are
+    drawn in batches of at most BATCH_ELEMENTS vectors. Returns
+    a (samples, 3)-array of the Rayleigh statistic, the Bingham statistic
+    and the Woodcock strength parameter of each sample. This function is
+    called in the worker processes.
+    """
+    random_state = np.random.RandomState(seed)
+    statistics = []
+    batch = max(1, BATCH_ELEMENTS // count)
+    for start in range(0, samples, batch):
+        size = min(batch, samples - start)
+        vectors = random_state.normal(size=(size, count, 3))
+        vectors /= np.sqrt(np.sum(vectors * vectors, axis=2))[:, :, np.newaxis]
+        vectors = np.where(vectors[:, :, 2:3] < 0, -vectors, vectors)
+        resultant = np.sum(vectors, axis=1)
+        values = np.linalg.eigvalsh(np.matmul(vectors.transpose(0, 2, 1),
+                                              vectors)) / count
+        values = np.clip(values, np.finfo(float).tiny, None)
+        statistics.append(np.column_stack((
+            3 * np.sum(resultant * resultant, axis=1) / count,
+            7.5 * count * np.sum((values - 1 / 3.0) ** 2, axis=1),
+            np.log(values[:, 2] / values[:, 0]))))
+    return np.concatenate(statistics)
+
+
+def uniformity_tests(vectors, simulations=10000, seed=None):
+    """
+    Tests a set of vectors against a uniform distribution.
+
+    The statistics of vector_math.fabric_statistics are compared with the
+    same statistics of simulated uniform samples of the same size (Monte
+    Carlo test). The vectors are flipped into the lower hemisphere first, so
+    that the Rayleigh statistic of the axes is compared with that of
+    uniformly distributed axes. The simulations are split into one task per
+    processor if the job is large enough. Returns the dictionary of
+    fabric_statistics with the p-values of the Rayleigh test ("rayleigh_p"),
+    the Bingham test ("bingham_p") and of the strength parameter
+    ("strength_p") added.
+    """
+    vectors = vector_math.lower_hemisphere(
+                        np.asarray(vectors, dtype=float).reshape(-1, 3))
+    stats = vector_math.fabric_statistics(vectors)
+    stats.update({"rayleigh_p": None, "bingham_p": None, "strength_p": None})
+    if len(vectors) < 2 or simulations < 1:
+        return stats
+
+    tasks = vector_math.split_tasks(simulations,
+                                    PARALLEL_ELEMENTS // len(vectors))
+    seeds = np.random.RandomState(seed).randint(0, 2**31 - 1, len(tasks))
+    simulated = np.concatenate(vector_math.parallel_map(uniform_statistics,
+                    [(len(vectors), size, task_seed)
+                     for size, task_seed in zip(tasks, seeds)]))
+    for column, key in enumerate(["rayleigh", "bingham", "strength"]):
+        if stats[key] is not None:
+            stats[key + "_p"] = ((np.sum(simulated[:, column] >= stats[key])
+                                  + 1.0) / (len(simulated) + 1))
+    return stats
@@ -57,6 +57,8 @@ class PlotSettings(object):
                       "highlight": False
                       }.items()))
         self.night_mode = False
+        self.set_colors = ["#e41a1c", "#377eb8", "#4daf4a", "#984ea3",
+                           "#ff7f00", "#ffff33", "#a65628", "#f781bf"]
         self.fig = Figure(dpi=self.props["pixel_density"])
         if testing == False:
             try:
@@ -140,6 +142,15 @@ class PlotSettings(object):
         """
         self.props["draw_grid"] = new_state
 
+    def get_set_color(self, index):
+        """
+        Returns a color for a layer that was created by a calculation.
+
+        Layers that belong together, like the sets of a clustering, are given
+        the colors of a fixed list, which are repeated after eight layers.
+        """
+        return self.set_colors[index % len(self.set_colors)]
+
     def get_folder_icon(self):
         """
         Returns the folder icon used for the group-layer pixbuf.
@@ -391,6 +402,23 @@ class PlotSettings(object):
         ax_mohr = self.fig.add_subplot(sp_mohr, aspect="equal")
         return ax_stereo, ax_fluc, ax_mohr
 
+    def get_fabric_view(self):
+        """
+        Resets the figure and returns the axis of the fabric diagrams.
+
+        When the view in the main window is changed to a Woodcock or Vollmer
+        diagram the figure is reset and one subplot is created. This method
+        is called by the MainWindow "redraw_plot"-method when the view has
+        been changed.
+        """
+        self.fig.clf()
+        self.fig.patch.set_facecolor(self.props["canvas_color"])
+        self.fig.set_dpi(self.props["pixel_density"])
+        gridspec = GridSpec(1, 1)
+        sp_fabric = gridspec.new_subplotspec((0, 0))
+        ax_fabric = self.fig.add_subplot(sp_fabric)
+        return ax_fabric
+
     def get_show_north(self):
         """
         Returns if the stereonet should show the North symbol or degrees
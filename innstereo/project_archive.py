@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+
+"""
+Reading and writing of project archives.
+
+A project archive is a zip file that contains a small JSON manifest and one
+numpy array for the data of each layer. The manifest has the same structure as
+the "InnStereo data file 1.0" JSON format, but instead of the rows each layer
+refers to the name of its array in the archive. The manifest can be read
+without touching the data, so the layers of a project are loaded only when
+they are needed. This module does not depend on Gtk.
+"""
+
+import io
+import json
+import os
+import zipfile
+import numpy as np
+
+#File type that is stored in the manifest
+ARCHIVE_TYPE = "InnStereo project archive 1.0"
+
+#File extension of project archives
+ARCHIVE_EXTENSION = ".innstereo"
+
+#Name of the manifest in the archive
+MANIFEST = "manifest.json"
+
+
+def is_archive(filename):
+    """
+    Returns True if the file is a project archive and not a JSON file.
+    """
+    return zipfile.is_zipfile(filename)
+
+
+def columns_to_array(columns):
+    """
+    Combines the columns of a layer into one structured array.
+
+    Expects a list of array-likes of equal length. Each column becomes a
+    field of the array, text columns are stored as unicode strings.
+    """
+    columns = [np.asarray(column) for column in columns]
+    dtype = [("c{}".format(i), column.dtype)
+             for i, column in enumerate(columns)]
+    array = np.empty(len(columns[0]), dtype=dtype)
+    for name, column in zip(array.dtype.names, columns):
+        array[name] = column
+    return array
+
+
+def array_to_columns(array):
+    """
+    Splits a structured array into the list of its columns.
+    """
+    return [array[name] for name in array.dtype.names]
+
+
+def read_manifest(filename):
+    """
+    Reads the manifest of a project archive.
+
+    Returns the manifest as a dictionary with the keys "filetype",
+    "settings" and "layers". Each layer is a list of the path in the layer
+    tree, the properties and the name of the data array, which is None for
+    folders and empty layers.
+    """
+    with zipfile.ZipFile(filename, "r") as archive:
+        manifest = json.loads(archive.read(MANIFEST).decode("utf-8"))
+    if manifest["filetype"] != ARCHIVE_TYPE:
+        raise ValueError("Not a valid InnStereo project archive")
+    return manifest
+
+
+def read_layer(filename, name):
+    """
+    Reads the data of one layer from a project archive.
+
+    Returns the list of columns of the layer. Raises an OSError if the
+    archive can not be read, a ValueError if it is not a zip file and a
+    KeyError if it does not contain the array.
+    """
+    try:
+        with zipfile.ZipFile(filename, "r") as archive:
+            data = archive.read(name)
+    except zipfile.BadZipFile as error:
+        raise ValueError(str(error))
+    array = np.load(io.BytesIO(data), allow_pickle=False)
+    return array_to_columns(array)
+
+
+def write_archive(filename, manifest, arrays):
+    """
+    Writes a project archive.
+
+    Expects the file name, the manifest dictionary and a list of tuples of
+    an array name and its content. The content is either a list of columns,
+    or a tuple of the file name and array name of an existing archive from
+    which the unchanged array is copied without being parsed. The archive is
+    written to a temporary file first, so an archive can be saved over
+    itself.
+    """
+    temp_file = filename + ".tmp"
+    sources = {}
+    try:
+        with zipfile.ZipFile(temp_file, "w", zipfile.ZIP_STORED) as archive:
+            archive.writestr(MANIFEST, json.dumps(manifest))
+            for name, content in arrays:
+                if isinstance(content, tuple):
+                    source_file, source_name = content
+                    if source_file not in sources:
+                        sources[source_file] = zipfile.ZipFile(source_file,
+                                                               "r")
+                    archive.writestr(name,
+                                     sources[source_file].read(source_name))
+                else:
+                    buffer = io.BytesIO()
+                    np.save(buffer, columns_to_array(content),
+                            allow_pickle=False)
+                    archive.writestr(name, buffer.getvalue())
+    except (OSError, KeyError, zipfile.BadZipFile):
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    finally:
+        for source in sources.values():
+            source.close()
+    os.replace(temp_file, filename)
@@ -27,7 +27,7 @@ class RotationDialog(object):
     widgets and has methods for the signals defined in Glade.
     """
 
-    def __init__(self, main_window, settings, data, add_layer_dataset, add_feature, redraw_main):
+    def __init__(self, main_window, settings, data, add_layer_dataset, redraw_main):
         """
         Initializes the RotationDialog class.
 
@@ -51,7 +51,6 @@ class RotationDialog(object):
         self.data = data
         self.trans = self.settings.get_transform()
         self.add_layer_dataset = add_layer_dataset
-        self.add_feature = add_feature
         self.redraw_main = redraw_main
 
         self.adjustment_rotation_dipdir = self.builder.get_object("adjustment_rotation_dipdir")
@@ -124,32 +123,28 @@ class RotationDialog(object):
 
         for lyr_obj in self.data:
             lyr_type = lyr_obj.get_layer_type()
-            lyr_store = lyr_obj.get_data_treestore()
+            lyr_store = lyr_obj.get_rows()
 
             if lyr_type == "plane":
                 dipdir_org, dips_org, dipdir_lst, dips_lst, strat, dipdir_az = \
                     self.parse_plane(lyr_store, raxis, raxis_angle)
 
                 store, new_lyr_obj = self.add_layer_dataset("plane")
-                for dipdir, dip, strt in zip(dipdir_az, dips_lst, strat):
-                    self.add_feature("plane", store, dipdir, dip, strt)
+                new_lyr_obj.add_features(dipdir_az, dips_lst, strat)
 
             elif lyr_type == "line":
                 ldipdir_org, ldips_org, ldipdir_lst, ldips_lst, sense = \
                     self.parse_line(lyr_store, raxis, raxis_angle)
 
                 store, new_lyr_obj = self.add_layer_dataset("line")
-
-                for dipdir, dip, sns in zip(ldipdir_lst, ldips_lst, sense):
-                    self.add_feature("line", store, dipdir, dip, sns)
+                new_lyr_obj.add_features(ldipdir_lst, ldips_lst, sense)
 
             elif lyr_type == "smallcircle":
                 ldipdir_org, ldips_org, ldipdir_lst, ldips_lst, angle = \
                     self.parse_line(lyr_store, raxis, raxis_angle)
 
                 store, new_lyr_obj = self.add_layer_dataset("smallcircle")
-                for dipdir, dip, ang in zip(ldipdir_lst, ldips_lst, angle):
-                    self.add_feature("smallcircle", store, dipdir, dip, ang)
+                new_lyr_obj.add_features(ldipdir_lst, ldips_lst, angle)
 
             elif lyr_type == "faultplane":
                 rtrn = self.parse_faultplane(lyr_store, raxis, raxis_angle)
@@ -159,11 +154,11 @@ class RotationDialog(object):
                 rtrn[8], rtrn[9]
 
                 store, new_lyr_obj = self.add_layer_dataset("faultplane")
-                for dipdir, dip, ldipdir, ldip, sns in zip(dipdir_az, dips_lst,
-                                                             ldipdir_lst, ldips_lst, sense):
-                    self.add_feature("faultplane", store, dipdir, dip, ldipdir, ldip, sns)
+                new_lyr_obj.add_features(dipdir_az, dips_lst, ldipdir_lst,
+                                         ldips_lst, sense)
 
             new_lyr_obj.set_properties(lyr_obj.get_properties())
+            new_lyr_obj.clear_results()
 
         self.dialog.hide()
         self.redraw_main()
@@ -410,7 +405,7 @@ class RotationDialog(object):
 
         for lyr_obj in self.data:
             lyr_type = lyr_obj.get_layer_type()
-            lyr_store = lyr_obj.get_data_treestore()
+            lyr_store = lyr_obj.get_rows()
 
             if lyr_type == "plane":
                 dipdir_org, dips_org, dipdir_lst, dips_lst, strat, dipdir_az = \
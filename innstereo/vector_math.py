@@ -0,0 +1,499 @@
+#!/usr/bin/python3
+
+"""
+Vectorized calculations on orientation data.
+
+This module contains the array based geometry that the calculation tools of the
+main window use. All functions take and return numpy arrays, so that a whole
+layer can be processed in one call instead of iterating over the rows of the
+data-store. Directions are handled as unit vectors in a north-east-down
+coordinate system. Linear features are returned as dip-direction (trend) and
+dip (plunge) pointing into the lower hemisphere. This module does not depend on
+Gtk, so it can also be used by worker processes.
+"""
+
+import numpy as np
+import scipy.spatial as spatial
+import scipy.sparse as sparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def line_to_vector(dipdir, dip):
+    """
+    Converts linear features into unit vectors.
+
+    Expects two array-likes of dip-directions (trends) and dips (plunges) in
+    degrees. Returns an (n, 3)-array of north-east-down unit vectors.
+    """
+    trend = np.radians(np.asarray(dipdir, dtype=float))
+    plunge = np.radians(np.asarray(dip, dtype=float))
+    return np.column_stack((np.cos(plunge) * np.cos(trend),
+                            np.cos(plunge) * np.sin(trend),
+                            np.sin(plunge)))
+
+
+def plane_to_vector(dipdir, dip):
+    """
+    Converts planes into the unit vectors of their poles.
+
+    Expects two array-likes of dip-directions and dips in degrees. Returns an
+    (n, 3)-array of the poles, which point into the lower hemisphere.
+    """
+    dipdir = np.asarray(dipdir, dtype=float)
+    dip = np.asarray(dip, dtype=float)
+    return line_to_vector(dipdir + 180, 90 - dip)
+
+
+def wrap_angles(angles, period):
+    """
+    Wraps angles into the range from 0 to the period.
+
+    Works like the checks of single features that are entered by hand:
+    angles above the period are reduced and negative angles are increased by
+    whole periods, so an angle equal to the period stays unchanged. Expects an
+    array-like and returns a float array.
+    """
+    angles = np.asarray(angles, dtype=float)
+    return np.where(angles > period,
+                    angles - period * np.ceil(angles / period - 1),
+                    np.where(angles < 0,
+                             angles + period * np.ceil(-angles / period),
+                             angles))
+
+
+def normalize(vectors):
+    """
+    Scales an (n, 3)-array of vectors to unit length.
+
+    Vectors with zero length are returned unchanged.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=float))
+    length = np.sqrt(np.sum(vectors * vectors, axis=1))
+    length[length == 0] = 1
+    return vectors / length[:, np.newaxis]
+
+
+def lower_hemisphere(vectors):
+    """
+    Flips all vectors that point upwards into the lower hemisphere.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=float))
+    return np.where(vectors[:, 2:3] < 0, -vectors, vectors)
+
+
+def vector_to_line(vectors):
+    """
+    Converts an (n, 3)-array of vectors into linear features.
+
+    The vectors are normalized and flipped into the lower hemisphere. Returns
+    two arrays of dip-directions (0 to 360) and dips (0 to 90) in degrees.
+    """
+    vectors = lower_hemisphere(normalize(vectors))
+    dip = np.abs(np.degrees(np.arcsin(np.clip(vectors[:, 2], -1, 1))))
+    dipdir = np.degrees(np.arctan2(vectors[:, 1], vectors[:, 0])) % 360
+    dipdir[dipdir >= 360] = 0
+    return dipdir, dip
+
+
+def vector_to_plane(vectors):
+    """
+    Converts an (n, 3)-array of pole-vectors into planes.
+
+    Returns two arrays of dip-directions and dips of the planes that are normal
+    to the given vectors.
+    """
+    pole_dir, pole_dip = vector_to_line(vectors)
+    return (pole_dir + 180) % 360, 90 - pole_dip
+
+
+def fault_slip_vectors(plane_dir, plane_dip, line_dir, line_dip, sense):
+    """
+    Returns the normals and slip-vectors of a set of faultplanes.
+
+    The normal points upwards into the hanging wall. The lineation is projected
+    onto the faultplane and oriented so that it gives the direction in which
+    the hanging wall moved. The sense of each fault is given as one of the
+    codes used in the faultplane-layers ("dn", "up", "dex", "sin"). Returns the
+    normals, the slip-vectors and a boolean array that is False for faults
+    without a usable sense of movement. The slip-vectors of those faults keep
+    the orientation of the lineation.
+    """
+    normal = -plane_to_vector(plane_dir, plane_dip)
+    slip = line_to_vector(line_dir, line_dip)
+    slip = normalize(slip - np.sum(slip * normal, axis=1)[:, np.newaxis]
+                     * normal)
+
+    sense = np.asarray(sense)
+    sign = np.zeros(len(sense))
+    sign[sense == "dn"] = 1
+    sign[sense == "up"] = -1
+    dextral = np.sign(np.sum(slip * np.cross([0, 0, 1], normal), axis=1))
+    sign = np.where(sense == "dex", dextral, sign)
+    sign = np.where(sense == "sin", -dextral, sign)
+    valid = sign != 0
+    sign[~valid] = 1
+    return normal, slip * sign[:, np.newaxis], valid
+
+
+def pt_axes(normal, slip, angle=30):
+    """
+    Calculates the P-, B- and T-axes for faults.
+
+    Expects the normals and slip-vectors as returned by fault_slip_vectors.
+    The B-axis is the cross product of normal and slip. The P- and T-axes lie
+    in the plane of movement and are rotated by the given angle (in degrees)
+    away from the faultplane. Returns three (n, 3)-arrays in the lower
+    hemisphere.
+    """
+    theta = np.radians(angle)
+    b_axis = np.cross(normal, slip)
+    p_axis = normal * np.sin(theta) - slip * np.cos(theta)
+    t_axis = normal * np.cos(theta) + slip * np.sin(theta)
+    return (lower_hemisphere(normalize(p_axis)),
+            lower_hemisphere(normalize(b_axis)),
+            lower_hemisphere(normalize(t_axis)))
+
+
+def pole_linear_planes(plane_dir, plane_dip, line_dir, line_dip):
+    """
+    Returns the planes that contain the pole and lineation of faults.
+
+    The pole of each pole-linear-plane is the cross product of the pole of
+    the faultplane and the lineation. Returns two arrays of dip-directions
+    and dips.
+    """
+    poles = plane_to_vector(plane_dir, plane_dip)
+    lines = line_to_vector(line_dir, line_dip)
+    return vector_to_plane(np.cross(poles, lines))
+
+
+def orientation_tensor(vectors):
+    """
+    Returns the orientation tensor of an (n, 3)-array of vectors.
+
+    The tensor is the sum of the outer products of all vectors. It is not
+    normalized, so that the tensors of several datasets can be added.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=float))
+    return np.dot(vectors.T, vectors)
+
+
+def tensor_eigenvectors(tensor, count):
+    """
+    Returns the eigenvectors and eigenvalues of an orientation tensor.
+
+    Expects a summed tensor and the number of vectors it contains. Returns
+    the dip-directions, dips and normalized eigenvalues of the three
+    eigenvectors, sorted with the largest eigenvalue first.
+    """
+    values, vectors = np.linalg.eigh(np.asarray(tensor) / count)
+    order = np.argsort(values)[::-1]
+    dipdir, dip = vector_to_line(vectors[:, order].T)
+    values = values[order]
+    return dipdir, dip, values / np.sum(values)
+
+
+def parallel_map(function, arguments, processes=None):
+    """
+    Calls a function for each tuple of arguments on a pool of processes.
+
+    The function has to be defined at the module level, so that it can be
+    sent to the worker processes. Returns the results in the order of the
+    arguments. A single task is calculated in this process, and so are all
+    tasks if no process pool can be started.
+    """
+    arguments = list(arguments)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    if len(arguments) < 2 or processes < 2:
+        return [function(*args) for args in arguments]
+
+    try:
+        with ProcessPoolExecutor(max_workers=min(processes,
+                                                 len(arguments))) as pool:
+            return list(pool.map(function, *zip(*arguments)))
+    except (OSError, RuntimeError):
+        return [function(*args) for args in arguments]
+
+
+def split_tasks(total, minimum):
+    """
+    Splits a number of repetitions into one task per processor.
+
+    Returns a list of task sizes that add up to the total. Jobs that are
+    smaller than the minimum are not split, because starting the process
+    pool would take longer than the calculation.
+    """
+    if total < minimum:
+        return [total]
+    tasks = min(multiprocessing.cpu_count(), total)
+    return [len(part) for part in np.array_split(np.arange(total), tasks)]
+
+
+def fisher_statistics(vectors, confidence=95):
+    """
+    Returns the summary statistics of an (n, 3)-array of unit vectors.
+
+    Returns a dictionary with the number of vectors ("count"), the resultant
+    vector ("resultant") and its length ("resultant_length"), the mean
+    resultant length between 0 and 1 ("r_value"), the dip-direction and dip
+    of the mean vector ("mean_vector"), the Fisher dispersion ("kappa") and
+    the opening angle of the confidence cone in degrees ("cone"). The Fisher
+    values are None if they are undefined for the data.
+    """
+    vectors = np.asarray(vectors, dtype=float).reshape(-1, 3)
+    return resultant_statistics(np.sum(vectors, axis=0), len(vectors),
+                                confidence)
+
+
+def resultant_statistics(resultant, count, confidence=95):
+    """
+    Returns the summary statistics of a resultant vector.
+
+    Expects the sum of a number of unit vectors and that number, so the
+    statistics of data that is summed in parts can be calculated. Returns the
+    same dictionary as fisher_statistics.
+    """
+    resultant = np.asarray(resultant, dtype=float)
+    length = np.sqrt(np.sum(resultant * resultant))
+    stats = {"count": count, "resultant": resultant,
+             "resultant_length": length, "r_value": None,
+             "mean_vector": None, "kappa": None, "cone": None}
+    if count == 0 or length == 0:
+        return stats
+
+    dipdir, dip = vector_to_line(resultant)
+    stats["r_value"] = length / count
+    stats["mean_vector"] = (dipdir[0], dip[0])
+    if count > 1 and length < count:
+        p = (100.0 - confidence) / 100.0
+        fraction = (count - length) / length
+        cosine = 1 - fraction * ((1 / p) ** (1.0 / (count - 1)) - 1)
+        stats["cone"] = np.degrees(np.arccos(np.clip(cosine, -1, 1)))
+        stats["kappa"] = (count - 1.0) / (count - length)
+    return stats
+
+
+def duplicate_groups(vectors, tolerance, lineations=None):
+    """
+    Finds groups of directions that lie within a tolerance of each other.
+
+    Expects an (n, 3)-array of unit vectors and a tolerance in degrees. The
+    directions are axial, so directions close to the primitive circle also
+    match the antipodes of each other. Close pairs are found with a KD-tree,
+    so only neighbouring directions are compared. If an (n, 3)-array of
+    lineations is given (for faultplanes), the lineations of a pair have to
+    match as well. Each group is formed by the first row that is not yet in a
+    group and all its neighbours that are not yet in a group, so that groups
+    do not chain across dense data. Returns a list of arrays of row numbers,
+    one for each group of at least two rows.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    if len(vectors) < 2:
+        return []
+
+    chord = 2 * np.sin(np.radians(tolerance) / 2)
+    tree = spatial.cKDTree(vectors)
+    try:
+        pairs = [tree.query_pairs(chord, output_type="ndarray")]
+    except TypeError:
+        #Older versions of scipy only return a set of tuples
+        pairs = [np.array(list(tree.query_pairs(chord)), dtype=int)]
+
+    near_primitive = np.flatnonzero(np.abs(vectors[:, 2]) <= chord)
+    if len(near_primitive) > 0:
+        antipodal = [(i, j) for i, matches in zip(near_primitive,
+                         tree.query_ball_point(-vectors[near_primitive],
+                                               chord))
+                     for j in matches if j > i]
+        pairs.append(np.array(antipodal, dtype=int))
+
+    pairs = np.concatenate([pair.reshape(-1, 2) for pair in pairs])
+    if lineations is not None and len(pairs) > 0:
+        lineations = np.asarray(lineations, dtype=float)
+        cosine = np.abs(np.sum(lineations[pairs[:, 0]] *
+                               lineations[pairs[:, 1]], axis=1))
+        pairs = pairs[cosine >= np.cos(np.radians(tolerance))]
+    if len(pairs) == 0:
+        return []
+
+    pairs = np.concatenate((pairs, pairs[:, ::-1]))
+    graph = sparse.csr_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+                              shape=(len(vectors), len(vectors)))
+    assigned = np.zeros(len(vectors), dtype=bool)
+    groups = []
+    for row in np.unique(pairs[:, 0]):
+        if assigned[row]:
+            continue
+        neighbours = graph.indices[graph.indptr[row]:graph.indptr[row + 1]]
+        neighbours = neighbours[~assigned[neighbours]]
+        if len(neighbours) == 0:
+            continue
+        group = np.concatenate(([row], np.sort(neighbours)))
+        assigned[group] = True
+        groups.append(group)
+    return groups
+
+
+def axial_mean(vectors):
+    """
+    Returns the mean direction of a group of axial unit vectors.
+
+    All vectors are flipped towards the first one before they are added, so
+    that antipodal directions do not cancel out.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    signs = np.where(np.dot(vectors, vectors[0]) < 0, -1, 1)
+    return normalize(np.sum(vectors * signs[:, np.newaxis], axis=0))
+
+
+def angle_difference(first, second):
+    """
+    Returns the angle between two azimuths in degrees (0 to 180).
+    """
+    difference = np.abs(np.asarray(first, dtype=float) - second) % 360
+    return np.minimum(difference, 360 - difference)
+
+
+def apparent_dip(slope_dipdir, slope_dip, azimuth):
+    """
+    Returns the apparent dip of a plane in the given azimuths.
+
+    The apparent dip is negative for azimuths that point more than 90
+    degrees away from the dip-direction.
+    """
+    return np.degrees(np.arctan(np.tan(np.radians(slope_dip)) *
+                      np.cos(np.radians(np.asarray(azimuth, dtype=float) -
+                                        slope_dipdir))))
+
+
+def planar_sliding(dipdir, dip, slope_dipdir, slope_dip, friction,
+                   lateral=20):
+    """
+    Tests planes for planar sliding on a slope.
+
+    A plane can slide if it dips steeper than the friction angle, less steep
+    than the slope face (so that it daylights), and if its dip-direction is
+    within the lateral limit of the dip-direction of the slope. Returns a
+    boolean array.
+    """
+    dip = np.asarray(dip, dtype=float)
+    return ((dip > friction) & (dip < slope_dip) &
+            (angle_difference(dipdir, slope_dipdir) <= lateral))
+
+
+def flexural_toppling(dipdir, dip, slope_dipdir, slope_dip, friction,
+                      lateral=20):
+    """
+    Tests planes for flexural toppling on a slope.
+
+    A plane can topple if it dips into the slope within the lateral limit,
+    and if the plunge of its pole is less than the dip of the slope face
+    minus the friction angle. Returns a boolean array.
+    """
+    dip = np.asarray(dip, dtype=float)
+    return ((90 - dip < slope_dip - friction) &
+            (angle_difference(dipdir, slope_dipdir + 180) <= lateral))
+
+
+def wedge_sliding(trend, plunge, slope_dipdir, slope_dip, friction):
+    """
+    Tests the intersections of planes for wedge sliding on a slope.
+
+    A wedge can slide if the intersection plunges steeper than the friction
+    angle and less steep than the apparent dip of the slope face in the
+    direction of the intersection. Returns a boolean array.
+    """
+    plunge = np.asarray(plunge, dtype=float)
+    return ((plunge > friction) &
+            (plunge < apparent_dip(slope_dipdir, slope_dip, trend)))
+
+
+def fault_stresses(tensor, normals, slips):
+    """
+    Resolves a stress tensor onto a set of faults.
+
+    Expects a (3, 3) stress tensor with compression positive, and the normals
+    and slip-vectors as returned by fault_slip_vectors. The predicted slip is
+    opposite to the shear traction on the hanging wall. Returns arrays of the
+    normal stress, the shear stress and the angle between observed and
+    predicted slip in degrees.
+    """
+    normals = np.asarray(normals, dtype=float)
+    traction = np.dot(normals, tensor)
+    normal = np.sum(traction * normals, axis=1)
+    shear = traction - normal[:, np.newaxis] * normals
+    length = np.sqrt(np.sum(shear * shear, axis=1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cosine = np.where(length > 0, -np.sum(shear * slips, axis=1) / length,
+                          0)
+    return normal, length, np.degrees(np.arccos(np.clip(cosine, -1, 1)))
+
+
+def fabric_statistics(vectors):
+    """
+    Returns the fabric shape and uniformity statistics of a set of vectors.
+
+    Returns a dictionary with the number of vectors ("count"), the
+    normalized eigenvalues S1 >= S2 >= S3 ("eigenvalues"), the Woodcock shape
+    parameter K = ln(S1/S2) / ln(S2/S3) ("shape") and strength parameter
+    C = ln(S1/S3) ("strength"), the Rayleigh statistic 3 R^2 / n
+    ("rayleigh") for directed data and the Bingham statistic
+    15 n / 2 * sum((S - 1/3)^2) ("bingham") for axial data. Undefined
+    values are None.
+    """
+    vectors = np.asarray(vectors, dtype=float).reshape(-1, 3)
+    count = len(vectors)
+    stats = {"count": count, "eigenvalues": None, "shape": None,
+             "strength": None, "rayleigh": None, "bingham": None}
+    if count == 0:
+        return stats
+
+    values = np.clip(np.linalg.eigvalsh(orientation_tensor(vectors)), 0,
+                     None)[::-1] / count
+    resultant = np.sum(vectors, axis=0)
+    stats["eigenvalues"] = values
+    stats["rayleigh"] = 3 * np.dot(resultant, resultant) / count
+    stats["bingham"] = 7.5 * count * np.sum((values - 1 / 3.0) ** 2)
+    if values[2] > 0:
+        stats["strength"] = np.log(values[0] / values[2])
+        if values[1] > values[2]:
+            stats["shape"] = (np.log(values[0] / values[1]) /
+                              np.log(values[1] / values[2]))
+    return stats
+
+
+def woodcock_coordinates(values):
+    """
+    Returns the coordinates of normalized eigenvalues in a Woodcock diagram.
+
+    Expects an (n, 3)-array of eigenvalues S1 >= S2 >= S3. Returns the
+    arrays ln(S2/S3) and ln(S1/S2). Rows with S3 = 0 are undefined and
+    returned as nan.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        logs = np.log(values)
+        x = logs[:, 1] - logs[:, 2]
+        y = logs[:, 0] - logs[:, 1]
+    undefined = ~np.isfinite(x) | ~np.isfinite(y)
+    x[undefined] = np.nan
+    y[undefined] = np.nan
+    return x, y
+
+
+def vollmer_coordinates(values):
+    """
+    Returns the coordinates of normalized eigenvalues in a Vollmer triangle.
+
+    Expects an (n, 3)-array of eigenvalues S1 >= S2 >= S3. The point,
+    girdle and random indices P = S1 - S2, G = 2 (S2 - S3) and R = 3 S3 add
+    up to 1 and are plotted in a triangle with P at (0, 0), G at (1, 0) and
+    R at (0.5, sqrt(3) / 2). Returns the x- and y-coordinates.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    girdle = 2 * (values[:, 1] - values[:, 2])
+    random = 3 * values[:, 2]
+    return girdle + random / 2, random * np.sqrt(3) / 2
@@ -33,14 +33,21 @@ setup(
                       "matplotlib >= 1.4.0",
                       "mplstereonet >= 0.4"],
     py_modules = [pjoin("innstereo","__init__"),
+                  pjoin("innstereo","data_export"),
                   pjoin("innstereo","dataview_classes"),
                   pjoin("innstereo","dialog_windows"),
                   pjoin("innstereo","file_parser"),
+                  pjoin("innstereo","import_worker"),
+                  pjoin("innstereo","json_stream"),
                   pjoin("innstereo","layer_types"),
                   pjoin("innstereo","layer_view"),
                   pjoin("innstereo","main_ui"),
+                  pjoin("innstereo","mapped_data"),
+                  pjoin("innstereo","orientation_statistics"),
                   pjoin("innstereo","plot_control"),
-                  pjoin("innstereo","polar_axes")],
+                  pjoin("innstereo","polar_axes"),
+                  pjoin("innstereo","project_archive"),
+                  pjoin("innstereo","vector_math")],
     package_data = {"ibk_st": ["calculate_bestfit_points.svg",
                                "calculate_eigenvector.svg",
                                "calculate_plane_intersect.svg",
@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+
+import csv
+import json
+import numpy as np
+import pytest
+from innstereo import data_export
+
+def make_layer(label, layer_type, columns, rows=2):
+    """
+    Returns a layer tuple as it is passed to export_layers. The columns are
+    passed in chunks of the given number of rows.
+    """
+    columns = [np.asarray(column) for column in columns]
+
+    def chunks():
+        for start in range(0, len(columns[0]), rows):
+            yield [column[start:start + rows] for column in columns]
+
+    return (label, layer_type, len(columns[0]), chunks)
+
+PLANES = [[120.5, 30.0, 0.1234567], [30.25, 80.0, 90.0],
+          ["bed #3", 'say "hi"', "a,b"]]
+
+LINES = [[45.0, 200.0], [10.0, -0.0], ["up", "dn"]]
+
+def test_format_floats():
+    """
+    Asserts the formatting of numbers, negative numbers and missing values.
+    """
+    text = data_export.format_floats([1.0, 0.5, -2.25, 0.1234567, np.nan])
+    assert text.tolist() == ["1.0", "0.5", "-2.25", "0.123457", ""]
+
+def test_csv_single_layer(tmp_path):
+    """
+    Exports one plane layer. Asserts the header and that texts with commas,
+    quotes and hashes are read back unchanged.
+    """
+    filename = str(tmp_path / "planes.csv")
+    rows = data_export.export_layers(filename,
+                                     [make_layer("Planes", "plane", PLANES)])
+    assert rows == 3
+    with open(filename, newline="") as csv_file:
+        result = list(csv.reader(csv_file))
+    assert result[0] == ["dip-direction", "dip", "stratigraphy"]
+    assert [row[2] for row in result[1:]] == PLANES[2]
+    assert [float(row[0]) for row in result[1:]] == [120.5, 30.0, 0.123457]
+
+def test_tsv_multiple_layers(tmp_path):
+    """
+    Exports a plane and a line layer. Asserts the shared header, the layer
+    column and the empty cells of columns that a layer does not have.
+    """
+    filename = str(tmp_path / "layers.tsv")
+    rows = data_export.export_layers(filename,
+                                     [make_layer("Planes", "plane", PLANES),
+                                      make_layer("Lines", "line", LINES)])
+    assert rows == 5
+    with open(filename, newline="") as tsv_file:
+        result = list(csv.reader(tsv_file, delimiter="\t"))
+    assert result[0] == ["layer", "dip-direction", "dip", "stratigraphy",
+                         "sense"]
+    assert result[1][0] == "Planes"
+    assert result[4] == ["Lines", "45.0", "10.0", "", "up"]
+    assert result[5] == ["Lines", "200.0", "0.0", "", "dn"]
+
+def test_npy_round_trip(tmp_path):
+    """
+    Exports two layers into one array. Asserts the fields and values.
+    """
+    filename = str(tmp_path / "layers.npy")
+    data_export.export_layers(filename,
+                              [make_layer("Planes", "plane", PLANES),
+                               make_layer("Lines", "line", LINES)])
+    array = np.load(filename, allow_pickle=False)
+    assert array.dtype.names == ("layer", "dip-direction", "dip",
+                                 "stratigraphy", "sense")
+    assert array["layer"].tolist() == ["Planes"] * 3 + ["Lines"] * 2
+    assert array["dip-direction"].tolist() == PLANES[0] + LINES[0]
+    assert array["stratigraphy"].tolist() == PLANES[2] + ["", ""]
+    assert np.isnan(array["dip"]).sum() == 0
+
+def test_npz_round_trip(tmp_path):
+    """
+    Exports two layers with the same label into an archive. Asserts that
+    each layer is its own array with its own columns.
+    """
+    filename = str(tmp_path / "layers.npz")
+    data_export.export_layers(filename,
+                              [make_layer("Set", "plane", PLANES),
+                               make_layer("Set", "line", LINES)])
+    with np.load(filename, allow_pickle=False) as archive:
+        assert sorted(archive.files) == ["Set", "Set_2"]
+        planes = archive["Set"]
+        lines = archive["Set_2"]
+    assert planes.dtype.names == tuple(data_export.FIELDNAMES["plane"])
+    assert planes["dip"].tolist() == PLANES[1]
+    assert lines["sense"].tolist() == LINES[2]
+
+def test_geojson(tmp_path):
+    """
+    Exports a layer with a missing number. Asserts that the file is valid
+    JSON with one point feature per row.
+    """
+    filename = str(tmp_path / "planes.json")
+    columns = [[120.5, np.nan], [30.0, 40.0], ['say "hi"', ""]]
+    data_export.export_layers(filename,
+                              [make_layer("Planes", "plane", columns),
+                               make_layer("Empty", "line", [[], [], []])])
+    with open(filename) as json_file:
+        collection = json.load(json_file)
+    assert collection["type"] == "FeatureCollection"
+    features = collection["features"]
+    assert len(features) == 2
+    assert features[0]["geometry"] == {"type": "Point",
+                                       "coordinates": [120.5, 30.0]}
+    assert features[0]["properties"]["stratigraphy"] == 'say "hi"'
+    assert features[0]["properties"]["layer-type"] == "plane"
+    assert features[1]["properties"]["dip-direction"] is None
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+
+import warnings
+import numpy as np
+import pytest
+from innstereo import file_parser
+
+def test_parse_columns_numbers():
+    """
+    Parses lines that numpy reads in one call, with semicolons and commas
+    as delimiters. Asserts the float and text columns.
+    """
+    lines = ["120.5;30,bed 1\n", "10,80.25;bed 2\n"]
+    floats, texts = file_parser.parse_columns(lines, [0, 1], [2])
+    assert floats.tolist() == [[120.5, 30.0], [10.0, 80.25]]
+    assert texts[0].tolist() == ["bed 1", "bed 2"]
+
+def test_parse_columns_fallback():
+    """
+    Parses a header line, a short row and a row with text in a number
+    column. Asserts that the invalid cells become nan and the other rows
+    are kept.
+    """
+    lines = ["dip-direction;dip;sense\n", "120,30,up\n", "45\n",
+             "ten,20,dn\n", "200;60;dex\n"]
+    floats, texts = file_parser.parse_columns(lines, [0, 1], [2])
+    assert floats.shape == (5, 2)
+    assert np.isnan(floats[0]).all()
+    assert floats[1].tolist() == [120.0, 30.0]
+    assert floats[2][0] == 45 and np.isnan(floats[2][1])
+    assert np.isnan(floats[3][0]) and floats[3][1] == 20
+    assert floats[4].tolist() == [200.0, 60.0]
+    assert texts[0].tolist() == ["sense", "up", "", "dn", "dex"]
+
+@pytest.mark.parametrize("extra", [[], ["ten,20,#1\n"]])
+def test_parse_columns_hash(extra):
+    """
+    Parses texts that contain "#", with and without a line that needs the
+    fallback. Asserts that the texts and numbers after it are kept.
+    """
+    lines = ["120,30,#3 bed\n", "10,80,a # b\n"] + extra
+    floats, texts = file_parser.parse_columns(lines, [0, 1], [2])
+    assert floats[:2].tolist() == [[120.0, 30.0], [10.0, 80.0]]
+    assert texts[0][:2].tolist() == ["#3 bed", "a # b"]
+
+def test_parse_columns_empty_lines():
+    """
+    Parses chunks with empty lines and without any data. Asserts that the
+    empty lines are skipped and that no warning is raised.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        floats, texts = file_parser.parse_columns(["1,2\n", "\n", "3,4\n"],
+                                                  [0, 1], [])
+        assert floats.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+        floats, texts = file_parser.parse_columns(["\n", "  \n"], [0, 1], [2])
+        assert floats.shape == (0, 2)
+        assert texts[0].tolist() == []
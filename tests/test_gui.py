@@ -1,7 +1,9 @@
 #!/usr/bin/python3
 
 import pytest
+import json
 import innstereo
+from innstereo import orientation_statistics, vector_math
 
 gui = innstereo.startup(testing=True)
 
@@ -255,6 +257,103 @@ def test_mean_vector():
     data = gui.on_toolbutton_save_clicked(widget=None, testing=True)
     assert data == lyr_copy
 
+def test_pt_axis():
+    """
+    Calculates the PT-axes of a normal fault and a fault without sense.
+    Asserts the orientations of the P-, B- and T-axes.
+    """
+    reset_project()
+    store, lyr_obj_new = gui.on_toolbutton_create_faultplane_dataset_clicked(widget=None)
+    gui.add_faultplane_feature(store, 90, 60, 90, 60, "dn")
+    gui.add_faultplane_feature(store, 90, 60, 90, 60, "")
+    selection = gui.layer_view.get_selection()
+    selection.select_path(0)
+    gui.on_toolbutton_ptaxis_clicked(toolbutton=None)
+    p_data = gui.layer_store[1][3].return_data()
+    b_data = gui.layer_store[2][3].return_data()
+    t_data = gui.layer_store[3][3].return_data()
+    assert len(p_data) == 1
+    assert len(b_data) == 2
+    assert len(t_data) == 1
+    assert round(p_data[0][1], 6) == 90
+    assert round(b_data[0][1], 6) == 0
+    assert round(t_data[0][0], 6) == 90
+    assert round(t_data[0][1], 6) == 0
+
+def test_eigenvector_folder():
+    """
+    Calculates the eigenvectors of two plane layers inside a folder. Asserts
+    that the tensor of an edited layer is equal to a complete recalculation.
+    """
+    reset_project()
+    store, lyr_obj_one = gui.on_toolbutton_create_plane_dataset_clicked(widget=None)
+    gui.add_planar_feature(store, 140, 50, "")
+    gui.add_planar_feature(store, 150, 40, "")
+    store, lyr_obj_two = gui.on_toolbutton_create_plane_dataset_clicked(widget=None)
+    gui.add_planar_feature(store, 130, 45, "")
+    data_view = lyr_obj_two.get_data_treeview()
+    data_view.renderer_dir_edited(widget=None, path=0, new_string="135")
+    tensor, count = lyr_obj_two.get_orientation_tensor()
+    lyr_obj_two.rebuild_tensor()
+    assert count == 1
+    assert (abs(tensor - lyr_obj_two.get_orientation_tensor()[0]) < 1e-12).all()
+    selection = gui.layer_view.get_selection()
+    selection.select_all()
+    gui.on_toolbutton_create_group_layer_clicked(widget=None)
+    selection.unselect_all()
+    selection.select_path(0)
+    gui.on_toolbutton_eigenvector_clicked(widget=None)
+    eigen_data = gui.layer_store["0:2"][3].return_data()
+    assert len(eigen_data) == 3
+    assert round(sum([row[2] for row in eigen_data]), 6) == 1
+
+def test_right_dihedra_copy():
+    """
+    Copies and pastes a right-dihedra layer and adds a row to the copy.
+    Asserts that the density grid is pasted and removed by the edit.
+    """
+    reset_project()
+    normals = vector_math.plane_to_vector([90], [60])
+    slips = vector_math.line_to_vector([90], [60])
+    lon, lat, percentage = orientation_statistics.right_dihedra(normals,
+                                                                slips, 20)
+    store, lyr_obj_new = gui.add_layer_dataset("line")
+    lyr_obj_new.set_density_grid(percentage)
+    selection = gui.layer_view.get_selection()
+    selection.select_path(0)
+    data = gui.on_toolbutton_copy_clicked(toolbutton=None)
+    gui.insert_layer_data(json.loads(data))
+    pasted = gui.layer_store[1][3]
+    grid = pasted.get_density_grid()
+    assert grid is not None
+    assert (abs(grid[0] - lon) < 1e-12).all()
+    assert (abs(grid[2] - percentage) < 1e-6).all()
+    gui.add_linear_feature(pasted.get_data_treestore(), 120, 30)
+    assert pasted.get_density_grid() is None
+    assert lyr_obj_new.get_density_grid() is not None
+
+def test_stress_inversion_copy():
+    """
+    Copies and pastes the layer of a stress inversion. Asserts that the
+    stresses of the faults are kept.
+    """
+    reset_project()
+    dipdir = [0, 60, 120, 200, 280]
+    normals = vector_math.plane_to_vector(dipdir, [60] * 5)
+    slips = vector_math.line_to_vector(dipdir, [60] * 5)
+    result = orientation_statistics.stress_inversion(normals, slips, 30)
+    store, lyr_obj_new = gui.add_layer_dataset("eigenvector")
+    lyr_obj_new.set_stress_inversion(result)
+    stresses = lyr_obj_new.get_fault_stresses()
+    selection = gui.layer_view.get_selection()
+    selection.select_path(0)
+    data = gui.on_toolbutton_copy_clicked(toolbutton=None)
+    gui.insert_layer_data(json.loads(data))
+    pasted = gui.layer_store[1][3].get_fault_stresses()
+    assert pasted is not None
+    assert (pasted["counts"] == stresses["counts"]).all()
+    assert (abs(pasted["shear"] - stresses["shear"]) < 1e-12).all()
+
 def plane_input(inp, inp_type):
     """
     Tests different data inputs into a plane layer. Called from test-functions.
@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+
+import io
+import json
+import pytest
+from innstereo import json_stream
+
+def small_reads(monkeypatch):
+    """
+    Makes the stream read the file in pieces of a few characters, so that
+    values are cut at the end of the buffer.
+    """
+    monkeypatch.setattr(json_stream, "READ_SIZE", 5)
+
+def write_project(tmp_path, layers):
+    """
+    Writes a project with the passed layers and returns the file name.
+    """
+    project = {"filetype": "InnStereo data file 1.0",
+               "layers": layers,
+               "settings": {"draw_grid": True, "pixel_density": 75}}
+    filename = str(tmp_path / "project.json")
+    with open(filename, "w") as project_file:
+        json.dump(project, project_file)
+    return filename
+
+def test_stream_values(monkeypatch):
+    """
+    Decodes nested containers and long numbers with a tiny read size.
+    Asserts that the decoded values are equal to the document.
+    """
+    small_reads(monkeypatch)
+    document = {"a": [1.2345678901234, [], {}, "text, with [brackets]"],
+                "b": {"c": [[1, 2], [3, 4]]}}
+    stream = json_stream.JsonStream(io.StringIO(json.dumps(document)))
+    decoded = {}
+    for key in stream.keys():
+        if key == "a":
+            decoded[key] = []
+            for _ in stream.items():
+                decoded[key].append(stream.value())
+        else:
+            decoded[key] = stream.value()
+    assert decoded == document
+
+def test_stream_error():
+    """
+    Asserts that a document that ends too early raises a ValueError.
+    """
+    stream = json_stream.JsonStream(io.StringIO('{"layers": [1, 2'))
+    with pytest.raises(ValueError):
+        for key in stream.keys():
+            for _ in stream.items():
+                stream.value()
+
+def test_read_project_round_trip(monkeypatch, tmp_path):
+    """
+    Reads a project with a tiny read size. Asserts that the layers, rows
+    and settings are the same as in the file.
+    """
+    small_reads(monkeypatch)
+    rows = [[120.5, 30.25, "bed #3"], [10.0, 80.0, ""], [359.9, 0.1, "a"]]
+    filename = write_project(tmp_path, [["0", {"type": "plane"}, rows]])
+    chunks = list(json_stream.read_project(filename, 1000))
+    assert [chunk[0] for chunk in chunks] == ["layer", "rows", "settings"]
+    assert chunks[0][1] == ("0", {"type": "plane"})
+    assert [list(row) for row in zip(*chunks[1][1])] == rows
+    assert chunks[2][1] == {"draw_grid": True, "pixel_density": 75}
+    assert 0 < chunks[0][2] < chunks[-1][2] <= 1
+
+def test_read_project_chunks(tmp_path):
+    """
+    Reads the rows of layers in chunks. Asserts the size of the chunks at
+    the boundaries.
+    """
+    five = [[i, i, ""] for i in range(5)]
+    four = [[i, i, ""] for i in range(4)]
+    filename = write_project(tmp_path, [["0", {"type": "plane"}, five],
+                                        ["1", {"type": "line"}, four]])
+    chunks = list(json_stream.read_project(filename, 2))
+    sizes = [(kind, len(content[0])) for kind, content, fraction in chunks
+             if kind == "rows"]
+    assert sizes == [("rows", 2), ("rows", 2), ("rows", 1),
+                     ("rows", 2), ("rows", 2)]
+    fractions = [fraction for kind, content, fraction in chunks]
+    assert fractions == sorted(fractions)
+
+def test_read_project_folders(monkeypatch, tmp_path):
+    """
+    Reads a folder, an empty layer and a layer inside the folder. Asserts
+    that only the layer with data yields rows.
+    """
+    small_reads(monkeypatch)
+    filename = write_project(tmp_path,
+                    [["0", {"type": "folder", "label": "Group Layer"}, []],
+                     ["0:0", {"type": "line"}, [[45.0, 10.0, "up"]]],
+                     ["1", {"type": "plane"}, []]])
+    chunks = list(json_stream.read_project(filename, 10))
+    kinds = [(kind, content[0] if kind == "layer" else None)
+             for kind, content, fraction in chunks]
+    assert kinds == [("layer", "0"), ("layer", "0:0"), ("rows", None),
+                     ("layer", "1"), ("settings", None)]
+    assert chunks[2][1] == [(45.0,), (10.0,), ("up",)]
+
+def test_read_project_filetype(tmp_path):
+    """
+    Reads a JSON file of another type. Asserts that a ValueError is raised
+    before any layer is yielded.
+    """
+    filename = str(tmp_path / "other.json")
+    with open(filename, "w") as other_file:
+        json.dump({"filetype": "Other file",
+                   "layers": [["0", {"type": "plane"}, [[1, 2, ""]]]]},
+                  other_file)
+    chunks = []
+    with pytest.raises(ValueError):
+        for chunk in json_stream.read_project(filename, 10):
+            chunks.append(chunk)
+    assert chunks == []
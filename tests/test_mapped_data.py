@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+
+import numpy as np
+import mplstereonet
+import pytest
+from innstereo import mapped_data, vector_math
+
+def random_lines(count=2000, seed=1):
+    """
+    Returns the dip-directions and dips of a cluster and a uniform
+    background of linears.
+    """
+    rng = np.random.RandomState(seed)
+    dipdir = np.concatenate([rng.normal(120, 10, count // 2),
+                             rng.uniform(0, 360, count - count // 2)]) % 360
+    dip = np.clip(np.abs(rng.normal(40, 10, count)), 0, 90)
+    return dipdir, dip
+
+def test_open_columns(tmp_path):
+    """
+    Maps a structured and a two-dimensional array. Asserts the columns and
+    that a one-dimensional array raises a ValueError.
+    """
+    structured = np.zeros(3, dtype=[("c0", float), ("c1", float),
+                                    ("c2", "U4")])
+    structured["c0"] = [1, 2, 3]
+    structured["c2"] = ["a", "b", "c"]
+    np.save(str(tmp_path / "structured.npy"), structured)
+    columns = mapped_data.open_columns(str(tmp_path / "structured.npy"))
+    assert len(columns) == 3
+    assert columns[0].tolist() == [1, 2, 3]
+    assert columns[2].tolist() == ["a", "b", "c"]
+
+    np.save(str(tmp_path / "plain.npy"), np.arange(8.0).reshape(4, 2))
+    columns = mapped_data.open_columns(str(tmp_path / "plain.npy"))
+    assert columns[1].tolist() == [1, 3, 5, 7]
+
+    np.save(str(tmp_path / "flat.npy"), np.arange(8.0))
+    with pytest.raises(ValueError):
+        mapped_data.open_columns(str(tmp_path / "flat.npy"))
+
+def test_chunks_and_samples():
+    """
+    Asserts the sizes of the chunks and of the level-of-detail sample.
+    """
+    columns = [np.arange(10), np.arange(10)]
+    sizes = [len(chunk[0]) for chunk in mapped_data.iter_chunks(columns, 4)]
+    assert sizes == [4, 4, 2]
+    assert mapped_data.sample_rows(5, 10).tolist() == [0, 1, 2, 3, 4]
+    sample = mapped_data.sample_rows(1000, 10)
+    assert len(sample) == 10
+    assert sample[0] == 0 and sample[-1] == 999
+
+def test_vector_sums():
+    """
+    Sums the vectors in chunks, with a missing value. Asserts that the sums
+    are equal to a calculation over all valid rows at once.
+    """
+    dipdir, dip = random_lines(1001)
+    dip[5] = np.nan
+    columns = [dipdir, dip]
+    resultant, tensor, count = mapped_data.vector_sums(
+                                mapped_data.iter_chunks(columns, 100),
+                                vector_math.line_to_vector)
+    vectors = mapped_data.finite_vectors(
+                                vector_math.line_to_vector(dipdir, dip))
+    assert count == 1000
+    assert np.allclose(resultant, vectors.sum(axis=0))
+    assert np.allclose(tensor, np.dot(vectors.T, vectors))
+
+def test_chunked_histogram():
+    """
+    Counts a column in chunks. Asserts that the counts are equal to
+    numpy.histogram.
+    """
+    dipdir, dip = random_lines(1001)
+    counts, edges = mapped_data.chunked_histogram(
+                            mapped_data.iter_chunks([dipdir, dip], 100),
+                            0, 36.0, (0, 360))
+    expected, expected_edges = np.histogram(dipdir, 36, (0, 360))
+    assert counts.tolist() == expected.tolist()
+    assert np.allclose(edges, expected_edges)
+
+@pytest.mark.parametrize("method", ["exponential_kamb", "linear_kamb",
+                                    "square_kamb", "kamb", "schmidt"])
+def test_density_grid_units(method):
+    """
+    Contours linears in chunks with each contour method. Asserts that the
+    densities are in the same units as the contours of mplstereonet.
+    """
+    dipdir, dip = random_lines()
+    lon, lat, density = mapped_data.density_grid(
+                            mapped_data.iter_chunks([dipdir, dip], 300),
+                            vector_math.line_to_vector, 40, 3, method=method)
+    expected = mplstereonet.density_grid(dip, dipdir, measurement="lines",
+                                         method=method, sigma=3, gridsize=40)
+    assert np.allclose(lon, expected[0])
+    assert np.allclose(lat, expected[1])
+    assert np.corrcoef(density.ravel(), expected[2].ravel())[0, 1] > 0.999
+    assert abs(density.max() / expected[2].max() - 1) < 0.02
+
+def test_density_grid_method():
+    """
+    Asserts that an unknown contour method raises a ValueError.
+    """
+    dipdir, dip = random_lines(10)
+    with pytest.raises(ValueError):
+        mapped_data.density_grid(mapped_data.iter_chunks([dipdir, dip]),
+                                 vector_math.line_to_vector, method="other")
+
+def test_density_grid_empty():
+    """
+    Asserts that a file without valid rows has no density grid.
+    """
+    columns = [np.array([np.nan]), np.array([np.nan])]
+    assert mapped_data.density_grid(mapped_data.iter_chunks(columns),
+                                    vector_math.line_to_vector) is None
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+
+import numpy as np
+import pytest
+from innstereo import orientation_statistics, vector_math
+
+def random_axes(count, seed):
+    """
+    Returns uniformly distributed axes as lower hemisphere unit vectors.
+    """
+    vectors = np.random.RandomState(seed).normal(size=(count, 3))
+    return vector_math.lower_hemisphere(vector_math.normalize(vectors))
+
+def cluster(dipdir, dip, spread, count, seed):
+    """
+    Returns linears scattered around one direction as lower hemisphere unit
+    vectors.
+    """
+    random_state = np.random.RandomState(seed)
+    return vector_math.line_to_vector(
+                        dipdir + random_state.normal(0, spread, count),
+                        dip + random_state.normal(0, spread, count))
+
+def test_uniformity_of_uniform_axes():
+    """
+    Tests uniformly distributed axes. Asserts that none of the statistics
+    rejects uniformity.
+    """
+    stats = orientation_statistics.uniformity_tests(random_axes(200, 3),
+                                                    2000, seed=1)
+    assert stats["rayleigh_p"] > 0.05
+    assert stats["bingham_p"] > 0.05
+    assert stats["strength_p"] > 0.05
+
+def test_uniformity_of_cluster():
+    """
+    Tests a tight cluster of linears. Asserts that all statistics reject
+    uniformity.
+    """
+    stats = orientation_statistics.uniformity_tests(
+                                    cluster(120, 60, 5, 50, 4), 2000, seed=1)
+    assert stats["rayleigh_p"] < 0.01
+    assert stats["bingham_p"] < 0.01
+    assert stats["strength_p"] < 0.01
+
+def test_spherical_kmeans():
+    """
+    Clusters two sets of linears, one of them close to the horizontal with
+    axes that point to both sides. Asserts that every linear is assigned to
+    its own set and that the centers are the mean directions.
+    """
+    steep = cluster(120, 60, 4, 60, 5)
+    flat = cluster(10, 2, 4, 40, 6)
+    flat[::2] = -flat[::2]
+    vectors = np.concatenate((steep, flat))
+    centers, labels, score = orientation_statistics.spherical_kmeans(
+                                                    vectors, 2, seed=7)
+    assert len(set(labels[:60])) == 1
+    assert len(set(labels[60:])) == 1
+    assert labels[0] != labels[60]
+    assert score > 0.99 * len(vectors)
+
+    centers, labels = orientation_statistics.cluster_sets(vectors, 2, seed=3)
+    assert labels.tolist() == [0] * 60 + [1] * 40
+    dipdir, dip = vector_math.vector_to_line(centers)
+    assert np.allclose(dipdir, [120, 10], atol=3)
+    assert np.allclose(dip, [60, 2], atol=3)
+
+def test_wedge_counts():
+    """
+    Tests four planes dipping 60 degrees towards 150, 210, 90 and 270 on a
+    slope of 180/70 with a friction angle of 30 degrees. The intersections
+    of 150/210 (180/56), 150/270 (210/41) and 210/90 (150/41) daylight, the
+    others plunge too steep or too shallow. Asserts the number of wedges of
+    each plane, also when the planes are split into two ranges.
+    """
+    vectors = vector_math.plane_to_vector([150, 210, 90, 270], [60] * 4)
+    counts, wedges, tested = orientation_statistics.wedge_analysis(
+                                                    vectors, 180, 70, 30)
+    assert counts.tolist() == [2, 2, 1, 1]
+    assert wedges == 3
+    assert tested == 6
+    first = orientation_statistics.wedge_counts(vectors, 0, 2, 180, 70, 30, 1)
+    second = orientation_statistics.wedge_counts(vectors, 2, 4, 180, 70, 30, 1)
+    assert (first[0] + second[0]).tolist() == [2, 2, 1, 1]
+    assert first[1] + second[1] == 6
+
+def test_fit_small_circle():
+    """
+    Fits a small circle to noisy poles on a cone around 030/20 with an
+    opening angle of 50 degrees. Asserts that the axis, the angle and the
+    misfit are recovered.
+    """
+    axis = vector_math.line_to_vector([30], [20])[0]
+    first = vector_math.normalize(np.cross(axis, [0, 0, 1]))[0]
+    second = np.cross(axis, first)
+    random_state = np.random.RandomState(8)
+    angles = random_state.uniform(0, 2 * np.pi, 200)[:, np.newaxis]
+    circle = np.cos(angles) * first + np.sin(angles) * second
+    vectors = (np.cos(np.radians(50)) * axis +
+               np.sin(np.radians(50)) * circle)
+    vectors = vector_math.lower_hemisphere(vector_math.normalize(
+                        vectors + random_state.normal(0, 0.02, (200, 3))))
+    result, angle, misfit = orientation_statistics.fit_small_circle(vectors,
+                                                                    seed=2)
+    dipdir, dip = vector_math.vector_to_line(result)
+    assert abs(dipdir[0] - 30) < 2
+    assert abs(dip[0] - 20) < 2
+    assert abs(angle - 50) < 1
+    assert 0.5 < misfit < 2
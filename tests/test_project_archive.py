@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+
+import json
+import os
+import pytest
+from innstereo import project_archive
+
+def make_manifest(names):
+    """
+    Returns a manifest with a folder and one plane layer for each array.
+    """
+    layers = [["0", {"type": "folder", "label": "Group Layer"}, None]]
+    for i, name in enumerate(names):
+        layers.append(["0:{}".format(i), {"type": "plane"}, name])
+    return {"filetype": project_archive.ARCHIVE_TYPE,
+            "settings": {"draw_grid": True},
+            "layers": layers}
+
+def test_columns_round_trip():
+    """
+    Combines columns into a structured array and splits them again.
+    Asserts that the numbers and texts are unchanged.
+    """
+    columns = [[120.5, 30.0], [30.25, 80.0], ["bed #3", ""]]
+    array = project_archive.columns_to_array(columns)
+    result = project_archive.array_to_columns(array)
+    assert [list(column) for column in result] == columns
+
+def test_write_and_read(tmp_path):
+    """
+    Writes an archive and reads its manifest and layers. Asserts the
+    content and that no temporary file is left.
+    """
+    filename = str(tmp_path / "project.innstereo")
+    first = [[1.0, 2.0], [3.0, 4.0], ["a", "b"]]
+    second = [[5.0], [6.0], ["c"]]
+    manifest = make_manifest(["layers/0.npy", "layers/1.npy"])
+    project_archive.write_archive(filename, manifest,
+                                  [("layers/0.npy", first),
+                                   ("layers/1.npy", second)])
+    assert project_archive.is_archive(filename)
+    assert project_archive.read_manifest(filename) == manifest
+    result = project_archive.read_layer(filename, "layers/1.npy")
+    assert [list(column) for column in result] == second
+    assert os.listdir(str(tmp_path)) == ["project.innstereo"]
+
+def test_save_over_self(tmp_path):
+    """
+    Saves an archive over itself, with the second array copied to a new
+    name and the first one dropped. Asserts that the copied array is read
+    from the new name.
+    """
+    filename = str(tmp_path / "project.innstereo")
+    first = [[1.0, 2.0], [3.0, 4.0], ["a", "b"]]
+    second = [[5.0], [6.0], ["c"]]
+    project_archive.write_archive(filename,
+                                  make_manifest(["layers/0.npy",
+                                                 "layers/1.npy"]),
+                                  [("layers/0.npy", first),
+                                   ("layers/1.npy", second)])
+    project_archive.write_archive(filename, make_manifest(["layers/0.npy"]),
+                                  [("layers/0.npy",
+                                    (filename, "layers/1.npy"))])
+    result = project_archive.read_layer(filename, "layers/0.npy")
+    assert [list(column) for column in result] == second
+    with pytest.raises(KeyError):
+        project_archive.read_layer(filename, "layers/1.npy")
+    assert os.listdir(str(tmp_path)) == ["project.innstereo"]
+
+def test_failed_copy_keeps_archive(tmp_path):
+    """
+    Copies an array that does not exist. Asserts that the archive is not
+    replaced and the temporary file is removed.
+    """
+    filename = str(tmp_path / "project.innstereo")
+    first = [[1.0], [2.0], ["a"]]
+    project_archive.write_archive(filename, make_manifest(["layers/0.npy"]),
+                                  [("layers/0.npy", first)])
+    with pytest.raises(KeyError):
+        project_archive.write_archive(filename,
+                                      make_manifest(["layers/0.npy"]),
+                                      [("layers/0.npy",
+                                        (filename, "layers/9.npy"))])
+    result = project_archive.read_layer(filename, "layers/0.npy")
+    assert [list(column) for column in result] == first
+    assert os.listdir(str(tmp_path)) == ["project.innstereo"]
+
+def test_invalid_files(tmp_path):
+    """
+    Reads a JSON project and an archive of another type. Asserts the
+    errors.
+    """
+    json_file = str(tmp_path / "project.json")
+    with open(json_file, "w") as project_file:
+        json.dump({"filetype": "InnStereo data file 1.0"}, project_file)
+    assert not project_archive.is_archive(json_file)
+    with pytest.raises(ValueError):
+        project_archive.read_layer(json_file, "layers/0.npy")
+
+    filename = str(tmp_path / "other.innstereo")
+    manifest = make_manifest([])
+    manifest["filetype"] = "Other archive"
+    project_archive.write_archive(filename, manifest, [])
+    with pytest.raises(ValueError):
+        project_archive.read_manifest(filename)
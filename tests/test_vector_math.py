@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+
+import numpy as np
+import pytest
+from innstereo import vector_math
+
+def test_duplicate_groups():
+    """
+    Groups linears with a tolerance of 3 degrees. Asserts that pairs 2.9
+    degrees apart and antipodal pairs near the primitive circle are grouped,
+    and that a pair 3.1 degrees apart is not.
+    """
+    vectors = vector_math.line_to_vector([0, 0, 90, 90, 50, 230, 200],
+                                         [45, 47.9, 45, 48.1, 1, 1, 70])
+    groups = vector_math.duplicate_groups(vectors, 3)
+    assert [group.tolist() for group in groups] == [[0, 1], [4, 5]]
+    assert vector_math.duplicate_groups(vectors[:1], 3) == []
+
+def test_duplicate_groups_lineations():
+    """
+    Groups faultplanes with the same plane. Asserts that only the pair whose
+    lineations also match is grouped.
+    """
+    normals = vector_math.plane_to_vector([120, 120, 120], [50, 50, 50])
+    lineations = vector_math.line_to_vector([120, 120, 130], [50, 50, 49])
+    groups = vector_math.duplicate_groups(normals, 3, lineations)
+    assert [group.tolist() for group in groups] == [[0, 1]]
+
+def test_planar_sliding():
+    """
+    Tests planes on a slope of 180/60 with a friction angle of 30 degrees.
+    Asserts that only planes that daylight, dip steeper than the friction
+    angle and lie within the lateral limit can slide.
+    """
+    dipdir = [180, 180, 180, 195, 205, 350]
+    dip = [45, 25, 65, 45, 45, 45]
+    sliding = vector_math.planar_sliding(dipdir, dip, 180, 60, 30)
+    assert sliding.tolist() == [True, False, False, True, False, False]
+    sliding = vector_math.planar_sliding([5, 330, 325], [45, 45, 45], 350,
+                                         60, 30)
+    assert sliding.tolist() == [True, True, False]
+
+def test_flexural_toppling():
+    """
+    Tests planes dipping into a slope of 180/60 with a friction angle of 30
+    degrees. Asserts that only planes whose poles plunge less than 30
+    degrees and that lie within the lateral limit can topple.
+    """
+    toppling = vector_math.flexural_toppling([0, 0, 30, 180],
+                                             [70, 55, 80, 80], 180, 60, 30)
+    assert toppling.tolist() == [True, False, False, False]
+
+def test_wedge_sliding():
+    """
+    Tests intersections on a slope of 180/60. Asserts the apparent dips of
+    the slope and that only intersections that plunge between the friction
+    angle and the apparent dip can slide.
+    """
+    assert np.allclose(vector_math.apparent_dip(180, 60, [180, 240, 270]),
+                       [60, 40.893, 0], atol=1e-3)
+    sliding = vector_math.wedge_sliding([180, 180, 240, 240],
+                                        [40, 25, 40, 42], 180, 60, 30)
+    assert sliding.tolist() == [True, False, True, False]